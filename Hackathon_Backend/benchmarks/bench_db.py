@@ -0,0 +1,154 @@
+"""
+benchmarks/bench_db.py - Sync vs Async Database Path Under Concurrent Load
+
+Serves the same indexed user lookup three ways from `async def` routes and
+drives each with concurrent requests in-process (no network):
+
+    sync     sync session queried directly on the event loop (the old pattern)
+    thread   sync session pushed to a worker thread (asyncio.to_thread)
+    async    AsyncSession on the async engine (get_async_db)
+
+A probe hits a DB-free route every 10 ms to show how long other requests
+stall behind DB calls. On a local SQLite file queries take microseconds, so
+the sync path looks cheap; point --url at a networked Postgres to see the
+round-trip latency the event loop would otherwise sit through.
+
+    python -m benchmarks.bench_db                                  # temp SQLite file
+    python -m benchmarks.bench_db --url postgresql://u:p@host/db --requests 5000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+def _seed(users: int) -> None:
+    from models.database import Base, SessionLocal, engine
+    from models.models import User
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if db.query(User).count() >= users:
+            return
+        db.query(User).delete()
+        db.add_all(
+            User(email=f"bench{i}@mindvest.pro", full_name=f"Bench {i}", hashed_password="x")
+            for i in range(users)
+        )
+        db.commit()
+
+
+def _build_app():
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select
+
+    from models.database import get_async_db, SessionLocal
+    from models.models import User
+
+    app = FastAPI()
+
+    def _lookup_sync(email):
+        with SessionLocal() as db:
+            return db.query(User.id).filter(User.email == email).scalar()
+
+    # The session is opened and closed inside the route: holding a get_db session
+    # across the request while blocking the loop on pool checkout can deadlock
+    @app.get("/sync/{email}")
+    async def sync_lookup(email: str):
+        return {"id": _lookup_sync(email)}
+
+    @app.get("/thread/{email}")
+    async def thread_lookup(email: str):
+        return {"id": await asyncio.to_thread(_lookup_sync, email)}
+
+    @app.get("/async/{email}")
+    async def async_lookup(email: str, db=Depends(get_async_db)):
+        result = await db.execute(select(User.id).where(User.email == email))
+        return {"id": result.scalar()}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def _drive(app, mode: str, requests: int, concurrency: int, users: int) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        sem = asyncio.Semaphore(concurrency)
+        statuses = []
+        done = asyncio.Event()
+        probe_latencies = []
+
+        async def one(i):
+            async with sem:
+                r = await client.get(f"/{mode}/bench{i % users}@mindvest.pro")
+                statuses.append(r.status_code)
+
+        async def probe():
+            while not done.is_set():
+                t = time.perf_counter()
+                await client.get("/ping")
+                probe_latencies.append((time.perf_counter() - t) * 1000)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "req_per_sec": round(requests / elapsed, 1),
+        "ok": statuses.count(200),
+        "probe_p50_ms": round(statistics.median(probe_latencies), 2) if probe_latencies else 0.0,
+        "probe_p99_ms": round(_percentile(probe_latencies, 99), 2),
+    }
+
+
+async def _run(modes, requests: int, concurrency: int, users: int) -> None:
+    from models.database import dispose_engines
+
+    app = _build_app()
+    for mode in modes:
+        await _drive(app, mode, min(200, requests), concurrency, users)  # warm pools
+        result = await _drive(app, mode, requests, concurrency, users)
+        print(f"{mode:>6}  requests={requests} concurrency={concurrency} -> {result}")
+    await dispose_engines()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="DATABASE_URL (default: temporary SQLite file)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--modes", default="sync,thread,async")
+    args = parser.parse_args(argv)
+
+    # Settings are read at import time, so configure the environment first
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+    os.environ["DB_ASYNC"] = "True"
+    os.environ.setdefault("DB_POOL_SIZE", str(args.concurrency))
+
+    _seed(args.users)
+    asyncio.run(_run(args.modes.split(","), args.requests, args.concurrency, args.users))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+benchmarks/bench_login.py - Login Throughput & Event-Loop Stall Benchmark
+
+Drives /api/auth/login in-process (no network) with concurrent first-time
+logins, while a probe hits /health every 10 ms to measure how long other
+requests stall behind bcrypt.
+
+    python -m benchmarks.bench_login --logins 200 --concurrency 32
+    python -m benchmarks.bench_login --compare       # inline vs pool
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+async def _run(logins: int, concurrency: int) -> dict:
+    import httpx
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            sem = asyncio.Semaphore(concurrency)
+            statuses = []
+            done = asyncio.Event()
+            probe_latencies = []
+
+            async def login(i):
+                async with sem:
+                    r = await client.post("/api/auth/login", json={
+                        "email": f"user{i}@mindvest.pro", "password": f"secret-{i}",
+                    })
+                    statuses.append(r.status_code)
+
+            async def probe():
+                while not done.is_set():
+                    t = time.perf_counter()
+                    await client.get("/health")
+                    probe_latencies.append((time.perf_counter() - t) * 1000)
+                    await asyncio.sleep(0.01)
+
+            probe_task = asyncio.create_task(probe())
+            started = time.perf_counter()
+            await asyncio.gather(*(login(i) for i in range(logins)))
+            elapsed = time.perf_counter() - started
+            done.set()
+            await probe_task
+
+    return {
+        "logins_per_sec": round(logins / elapsed, 1),
+        "ok": statuses.count(200),
+        "rejected_503": statuses.count(503),
+        "health_probes": len(probe_latencies),
+        "health_p50_ms": round(statistics.median(probe_latencies), 1) if probe_latencies else 0.0,
+        "health_p99_ms": round(_percentile(probe_latencies, 99), 1),
+        "health_max_ms": round(max(probe_latencies, default=0.0), 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, help="HASH_POOL_WORKERS (0 = inline)")
+    parser.add_argument("--rounds", type=int, help="BCRYPT_ROUNDS")
+    parser.add_argument("--compare", action="store_true", help="Run inline and pooled in subprocesses")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        import subprocess
+        pooled = str(args.workers or os.cpu_count() or 2)
+        for workers in ("0", pooled):
+            cmd = [sys.executable, "-m", "benchmarks.bench_login", "--logins", str(args.logins),
+                   "--concurrency", str(args.concurrency), "--workers", workers]
+            if args.rounds:
+                cmd += ["--rounds", str(args.rounds)]
+            subprocess.run(cmd, check=True)
+        return 0
+
+    # Settings are read at import time, so configure the environment first
+    if args.workers is not None:
+        os.environ["HASH_POOL_WORKERS"] = str(args.workers)
+    if args.rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ.setdefault("HASH_POOL_MAX_PENDING", str(max(64, args.concurrency)))
+
+    result = asyncio.run(_run(args.logins, args.concurrency))
+    from core.config import settings
+    print(f"workers={settings.HASH_POOL_WORKERS} rounds={settings.BCRYPT_ROUNDS} "
+          f"logins={args.logins} concurrency={args.concurrency} -> {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
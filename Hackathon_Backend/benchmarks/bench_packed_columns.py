@@ -0,0 +1,130 @@
+"""
+benchmarks/bench_packed_columns.py - Packed vs JSON Forecast/Allocation Columns
+
+Stores the same forecasts and allocations in a JSON column and in the packed
+column types from models/packed.py (in-memory SQLite), then reports the
+stored size per row and the time to read every row back into the pydantic
+schemas.
+
+    python -m benchmarks.bench_packed_columns --rows 2000 --days 365
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+
+def _forecast(days: int):
+    price = random.uniform(100, 3000)
+    start = date.today()
+    points = []
+    for i in range(1, days + 1):
+        price = round(price * random.uniform(0.99, 1.015), 2)
+        points.append({
+            "date": str(start + timedelta(days=i)),
+            "predicted_price": price,
+            "lower_bound": round(price * 0.97, 2),
+            "upper_bound": round(price * 1.03, 2),
+        })
+    return points
+
+
+def _allocations():
+    from engines.investment import ALLOCATION_TEMPLATES
+
+    amount = random.uniform(1_000, 1_000_000)
+    return [
+        {"asset": item["asset"], "percentage": item["percentage"],
+         "amount": round(amount * item["percentage"] / 100, 2)}
+        for item in random.choice(list(ALLOCATION_TEMPLATES.values()))
+    ]
+
+
+def _timed_read(engine, table, column, decode):
+    from sqlalchemy import select
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        values = conn.execute(select(table.c[column])).scalars().all()
+    decoded = [decode(v) for v in values]
+    return (time.perf_counter() - started) * 1000, decoded
+
+
+def run(rows: int, days: int) -> None:
+    from sqlalchemy import (
+        JSON, Column, Integer, LargeBinary, MetaData, Table, create_engine, func, insert, select, type_coerce,
+    )
+
+    from models.packed import PackedAllocations, PackedForecast, unpack_forecast_arrays
+    from models.schemas import AssetAllocation, PredictionPoint
+
+    metadata = MetaData()
+    layouts = {
+        "json": (JSON, JSON),
+        "packed": (PackedForecast, PackedAllocations),
+    }
+    tables = {
+        name: Table(
+            f"bench_{name}", metadata,
+            Column("id", Integer, primary_key=True),
+            Column("predictions", forecast_type, nullable=False),
+            Column("allocations", allocation_type, nullable=False),
+        )
+        for name, (forecast_type, allocation_type) in layouts.items()
+    }
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+
+    data = [{"predictions": _forecast(days), "allocations": _allocations()} for _ in range(rows)]
+    to_points = lambda v: [PredictionPoint(**p) for p in v]
+    to_allocations = lambda v: [AssetAllocation(**a) for a in v]
+    decoders = {
+        "json": {"predictions": to_points, "allocations": to_allocations},
+        "packed": {"predictions": lambda v: v, "allocations": lambda v: v},   # column type decodes
+    }
+
+    print(f"rows={rows} days={days}")
+    for name, table in tables.items():
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert(table), data)
+        write_ms = (time.perf_counter() - started) * 1000
+
+        with engine.connect() as conn:
+            sizes = conn.execute(select(
+                func.avg(func.length(table.c.predictions)),
+                func.avg(func.length(table.c.allocations)),
+            )).one()
+        forecast_ms, forecasts = _timed_read(engine, table, "predictions", decoders[name]["predictions"])
+        allocation_ms, _ = _timed_read(engine, table, "allocations", decoders[name]["allocations"])
+        assert forecasts[0][0].predicted_price == data[0]["predictions"][0]["predicted_price"]
+
+        print(f"{name:>7}  forecast {sizes[0]:8.0f} B/row  read {forecast_ms:8.1f} ms"
+              f" | allocations {sizes[1]:5.0f} B/row  read {allocation_ms:6.1f} ms"
+              f" | write {write_ms:7.1f} ms")
+
+    # Packed rows can also skip object construction entirely (analytics, charts)
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        blobs = conn.execute(
+            select(type_coerce(tables["packed"].c.predictions, LargeBinary))
+        ).scalars().all()
+    arrays = [unpack_forecast_arrays(b) for b in blobs]
+    print(f" arrays  forecast read as numpy arrays {(time.perf_counter() - started) * 1000:8.1f} ms"
+          f" ({len(arrays)} rows)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args(argv)
+    random.seed(7)
+    run(args.rows, args.days)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
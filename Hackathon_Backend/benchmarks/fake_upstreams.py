@@ -0,0 +1,289 @@
+"""
+benchmarks/fake_upstreams.py - Local Stand-ins for Yahoo, NewsData and Gemini
+
+One ASGI app that answers the upstream calls the backend makes, with
+deterministic synthetic data and configurable latency and errors:
+
+    GET  /yahoo/v8/finance/chart/{symbol}?interval=&range=      chart / quote / OHLC
+    GET  /yahoo2/v8/finance/chart/{symbol}                        fallback Yahoo host (quotes)
+    GET  /newsdata/api/1/news?q=&size=                            NewsData.io
+    GET  /mirror/top-headlines.json                               news mirror fallback
+    POST /gemini/v1beta/models/{model}:generateContent            Gemini REST
+    POST /gemini/v1beta/models/{model}:streamGenerateContent      (SSE, per-chunk latency)
+    GET|POST /_config                                             read / change profiles
+
+Each upstream has a latency (mean + uniform jitter, ms) and an error rate;
+injected errors return `error_status` (Gemini 429s carry Retry-After).
+The load test mounts this app in-process by default; to run it as a real
+server for a separately started backend:
+
+    python -m benchmarks.fake_upstreams --port 9100 --latency yahoo=80 --errors gemini=0.02
+    # then start the backend with the base URLs from `base_urls("http://127.0.0.1:9100")`
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+
+
+@dataclass
+class UpstreamProfile:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    chunk_ms: float = 0.0          # Gemini streaming: delay between SSE chunks
+
+
+DEFAULT_PROFILES = {
+    "yahoo":       UpstreamProfile(latency_ms=60, jitter_ms=40),
+    "yahoo_fallback": UpstreamProfile(latency_ms=60, jitter_ms=40),
+    "newsdata":    UpstreamProfile(latency_ms=150, jitter_ms=100),
+    "news_mirror": UpstreamProfile(latency_ms=120, jitter_ms=60),
+    "gemini":      UpstreamProfile(latency_ms=700, jitter_ms=400, chunk_ms=40),
+}
+
+
+def base_urls(root: str) -> Dict[str, str]:
+    """Backend settings that point every upstream at a fake server rooted at `root`."""
+    root = root.rstrip("/")
+    return {
+        "YAHOO_API_BASE": f"{root}/yahoo",
+        "YAHOO_FALLBACK_BASE": f"{root}/yahoo2",
+        "NEWSDATA_API_BASE": f"{root}/newsdata/api/1",
+        "NEWS_MIRROR_URL": f"{root}/mirror/top-headlines.json",
+        "GEMINI_API_BASE": f"{root}/gemini/v1beta",
+    }
+
+
+# ─── Synthetic Data ───────────────────────────────────────────────────────────
+
+RANGE_DAYS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504,
+              "5y": 1260, "10y": 2520, "max": 5000}
+BARS_PER_DAY = {"1m": 375, "2m": 188, "5m": 75, "15m": 25, "30m": 13, "60m": 7, "1h": 7}
+SECONDS_PER_DAY = 86_400
+IST_OFFSET = 19_800
+MARKET_OPEN = 9 * 3600 + 15 * 60      # 09:15 local
+
+
+def _seed(*parts) -> int:
+    return zlib.crc32("|".join(map(str, parts)).encode())
+
+
+def _trading_days(count: int) -> np.ndarray:
+    """The last `count` weekdays up to today, as day numbers since 1970-01-01."""
+    today = int(time.time() // SECONDS_PER_DAY)
+    days = np.arange(today - count * 7 // 5 - 7, today + 1)
+    days = days[(days + 3) % 7 < 5]              # 1970-01-01 was a Thursday
+    return days[-count:]
+
+
+@lru_cache(maxsize=2048)
+def chart_body(symbol: str, interval: str, range_: str) -> bytes:
+    """Yahoo v8 chart JSON: a seeded geometric random walk per symbol."""
+    rng = np.random.default_rng(_seed(symbol, interval, range_, int(time.time() // SECONDS_PER_DAY)))
+    offset = IST_OFFSET if symbol.endswith((".NS", ".BO")) else 0
+    days = _trading_days(RANGE_DAYS.get(range_, 21))
+
+    per_day = 1                                  # bars per session (previous close lookup)
+    if interval in BARS_PER_DAY:
+        per_day = BARS_PER_DAY[interval]
+        step = (375 * 60) // per_day
+        stamps = (days[:, None] * SECONDS_PER_DAY + MARKET_OPEN - offset + np.arange(per_day) * step).ravel()
+        vol = 0.015 / np.sqrt(per_day)
+    elif interval == "1wk":
+        stamps = days[::5] * SECONDS_PER_DAY
+        vol = 0.015 * np.sqrt(5)
+    else:
+        stamps = days * SECONDS_PER_DAY
+        vol = 0.015
+
+    start = 100 + (_seed(symbol) % 3000)
+    closes = start * np.exp(np.cumsum(rng.normal(0.0003, vol, len(stamps))))
+    opens = np.r_[start, closes[:-1]]
+    spread = np.abs(rng.normal(0, vol / 2, len(stamps)))
+    highs = np.maximum(opens, closes) * (1 + spread)
+    lows = np.minimum(opens, closes) * (1 - spread)
+    volumes = rng.integers(10_000, 5_000_000, len(stamps))
+
+    def r2(a):
+        return np.round(a, 2).tolist()
+
+    return json.dumps({"chart": {"error": None, "result": [{
+        "meta": {
+            "symbol": symbol,
+            "currency": "INR" if offset else "USD",
+            "gmtoffset": offset,
+            "regularMarketPrice": round(float(closes[-1]), 2),
+            "chartPreviousClose": round(float(opens[-min(per_day, len(opens))]), 2),
+        },
+        "timestamp": stamps.tolist(),
+        "indicators": {
+            "quote": [{"open": r2(opens), "high": r2(highs), "low": r2(lows), "close": r2(closes),
+                       "volume": volumes.tolist()}],
+            "adjclose": [{"adjclose": r2(closes)}],
+        },
+    }]}}).encode()
+
+
+HEADLINES = (
+    "{q}: markets surge as foreign inflows gain pace",
+    "{q} shares fall on profit booking after a strong rally",
+    "Analysts see steady growth for {q} this quarter",
+    "{q} faces regulatory risk over new disclosure rules",
+    "RBI policy keeps {q} investors cautious",
+    "{q} hits record high on strong earnings",
+)
+
+
+def news_items(query: str, size: int):
+    rng = random.Random(_seed(query, size))
+    now = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    for i in range(size):
+        title = HEADLINES[(i + rng.randrange(len(HEADLINES))) % len(HEADLINES)].format(q=query)
+        yield {
+            "title": title,
+            "description": f"{title}. Synthetic article {i} for load testing.",
+            "link": f"https://news.example/{_seed(query, i)}",
+            "pubDate": now,
+            "source_id": rng.choice(("economictimes", "livemint", "moneycontrol")),
+        }
+
+
+ADVICE = (
+    "Based on your profile, keep a diversified core in large-cap index funds, hold six months "
+    "of expenses in liquid funds, and add mid-cap or international exposure gradually through "
+    "SIPs. Review the allocation yearly and rebalance when any asset drifts by more than five "
+    "percentage points. This is educational guidance, not personalised investment advice."
+)
+
+
+def llm_reply(prompt: str) -> str:
+    if "sentiment" in prompt.lower() and "json" in prompt.lower():
+        text = prompt.rsplit("Text:", 1)[-1].lower()
+        score = 0.6 if any(w in text for w in ("surge", "gain", "growth", "record")) else (
+            -0.6 if any(w in text for w in ("fall", "risk", "cautious")) else 0.0)
+        label = "positive" if score > 0 else "negative" if score < 0 else "neutral"
+        return json.dumps({"sentiment": label, "score": score, "summary": text.strip()[:120]})
+    return ADVICE
+
+
+# ─── App ──────────────────────────────────────────────────────────────────────
+
+def build_app(profiles: Optional[Dict[str, UpstreamProfile]] = None, seed: int = 7):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+    profiles = {name: UpstreamProfile(**asdict(p)) for name, p in (profiles or DEFAULT_PROFILES).items()}
+    rng = random.Random(seed)
+    app = FastAPI(title="MindVest fake upstreams")
+    app.state.profiles = profiles
+    app.state.calls = {name: 0 for name in profiles}
+
+    async def simulate(name: str) -> Optional[Response]:
+        """Wait the upstream's latency; return an error response if one is injected."""
+        profile = profiles[name]
+        app.state.calls[name] += 1
+        delay = profile.latency_ms + rng.uniform(-profile.jitter_ms, profile.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if profile.error_rate and rng.random() < profile.error_rate:
+            headers = {"Retry-After": "1"} if profile.error_status == 429 else None
+            return JSONResponse({"error": "injected"}, status_code=profile.error_status, headers=headers)
+        return None
+
+    @app.get("/yahoo/v8/finance/chart/{symbol}")
+    async def chart(symbol: str, interval: str = "1d", range: str = "1mo"):
+        return await simulate("yahoo") or Response(chart_body(symbol, interval, range), media_type="application/json")
+
+    @app.get("/yahoo2/v8/finance/chart/{symbol}")
+    async def chart_fallback(symbol: str, interval: str = "1d", range: str = "1mo"):
+        return await simulate("yahoo_fallback") or Response(chart_body(symbol, interval, range),
+                                                            media_type="application/json")
+
+    @app.get("/newsdata/api/1/news")
+    async def newsdata(q: str = "markets", size: int = 10):
+        return await simulate("newsdata") or {"status": "success", "results": list(news_items(q, size))}
+
+    @app.get("/mirror/top-headlines.json")
+    async def mirror():
+        return await simulate("news_mirror") or {"articles": [
+            {"title": n["title"], "description": n["description"], "url": n["link"],
+             "publishedAt": n["pubDate"], "source": {"name": n["source_id"]}}
+            for n in news_items("Sensex", 20)
+        ]}
+
+    @app.post("/gemini/v1beta/models/{target}")
+    async def gemini(target: str, request: Request):
+        error = await simulate("gemini")
+        if error is not None:
+            return error
+        body = await request.json()
+        reply = llm_reply(body["contents"][-1]["parts"][0]["text"])
+        if not target.endswith(":streamGenerateContent"):
+            return {"candidates": [{"content": {"parts": [{"text": reply}], "role": "model"}}]}
+
+        chunk_delay = profiles["gemini"].chunk_ms / 1000
+
+        async def events():
+            words = reply.split(" ")
+            for i in range(0, len(words), 8):
+                text = " ".join(words[i:i + 8]) + (" " if i + 8 < len(words) else "")
+                yield "data: " + json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}) + "\r\n\r\n"
+                if chunk_delay:
+                    await asyncio.sleep(chunk_delay)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/_config")
+    async def get_config():
+        return {"profiles": {n: asdict(p) for n, p in profiles.items()}, "calls": app.state.calls}
+
+    @app.post("/_config")
+    async def set_config(changes: Dict[str, dict]):
+        for name, fields in changes.items():
+            for key, value in fields.items():
+                setattr(profiles[name], key, type(getattr(profiles[name], key))(value))
+        return await get_config()
+
+    return app
+
+
+def parse_overrides(items, field: str, profiles: Dict[str, UpstreamProfile]) -> None:
+    """Apply `name=value` CLI overrides (name may be `all`)."""
+    for item in items or []:
+        name, _, value = item.partition("=")
+        for target in (profiles if name == "all" else [name]):
+            setattr(profiles[target], field, type(getattr(profiles[target], field))(value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", nargs="*", metavar="NAME=MS", help="mean latency per upstream")
+    parser.add_argument("--jitter", nargs="*", metavar="NAME=MS")
+    parser.add_argument("--errors", nargs="*", metavar="NAME=RATE", help="error rate 0-1 per upstream")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    profiles = {name: UpstreamProfile(**asdict(p)) for name, p in DEFAULT_PROFILES.items()}
+    parse_overrides(args.latency, "latency_ms", profiles)
+    parse_overrides(args.jitter, "jitter_ms", profiles)
+    parse_overrides(args.errors, "error_rate", profiles)
+    for key, value in base_urls(f"http://{args.host}:{args.port}").items():
+        print(f"{key}={value}")
+    uvicorn.run(build_app(profiles), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
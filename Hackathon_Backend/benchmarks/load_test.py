@@ -0,0 +1,294 @@
+"""
+benchmarks/load_test.py - Scripted Load Profiles Against Local Upstream Stand-ins
+
+Drives the backend in-process (no network, like the other benchmarks) with
+Yahoo, NewsData and Gemini replaced by benchmarks/fake_upstreams.py, so runs
+are reproducible offline and comparable between commits. Reports
+throughput, p50/p90/p99 latency and error rate per endpoint, plus process
+memory, and can fail the run against a stored baseline:
+
+    python -m benchmarks.load_test --profile mixed --duration 20 --concurrency 32
+    python -m benchmarks.load_test --profile market --latency yahoo=200 --errors yahoo=0.05
+    python -m benchmarks.load_test --profile mixed --save-baseline benchmarks/baselines/mixed.json
+    python -m benchmarks.load_test --profile mixed --baseline benchmarks/baselines/mixed.json   # exit 1 on regression
+
+Profiles: market, predict, news, advisor, mixed. With --upstreams URL the
+backend calls a separately started fake server over HTTP instead (see
+fake_upstreams.py); baselines are only comparable on the same machine and
+settings.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: memory columns are left empty
+    resource = None
+
+
+# ─── Load Profiles ────────────────────────────────────────────────────────────
+
+SYMBOLS = ("RELIANCE", "TCS", "INFY", "HDFCBANK", "TATAMOTORS", "ICICIBANK", "SBIN", "ITC")
+TIMEFRAMES = ("1D", "1W", "1M", "3M", "1Y")
+QUERIES = ("Indian stock market", "Reliance", "TCS", "Infosys", "HDFC Bank")
+QUESTIONS = (
+    "How should I start investing 10,000 a month?",
+    "Is it a good time to buy IT stocks?",
+    "How much gold should I hold?",
+    "Should I prepay my home loan or invest?",
+)
+
+Request = Tuple[str, str, Optional[dict]]            # method, path, json body
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str                                        # report label (endpoint template)
+    weight: float
+    build: Callable[[random.Random], Request]
+    ok: Tuple[int, ...] = ()                         # statuses >= 400 that still count as success
+
+
+def _ns(rng):
+    return rng.choice(SYMBOLS) + ".NS"
+
+
+STEPS = {
+    "quotes": Step("GET /api/market/quotes", 5, lambda r: (
+        "GET", "/api/market/quotes?symbols=" + ",".join(r.sample([s + ".NS" for s in SYMBOLS], 5)), None)),
+    "chart": Step("GET /api/market/chart", 3, lambda r: (
+        "GET", f"/api/market/chart?symbol={r.choice(SYMBOLS)}&timeframe={r.choice(TIMEFRAMES)}", None)),
+    "predict": Step("POST /api/predict", 2, lambda r: (
+        "POST", "/api/predict/?model=lstm", {"ticker": _ns(r), "days": r.choice((7, 30, 90))})),
+    "news": Step("GET /api/news", 3, lambda r: (
+        "GET", f"/api/news/?query={r.choice(QUERIES)}&limit=10", None)),
+    "sentiment": Step("GET /api/news/sentiment", 1, lambda r: (
+        "GET", f"/api/news/sentiment/{r.choice(SYMBOLS)}", None), ok=(404,)),   # 404: no articles yet
+    "ask": Step("POST /api/advisor/ask", 2, lambda r: (
+        "POST", "/api/advisor/ask", {"user_id": r.randrange(1, 500), "query": r.choice(QUESTIONS)})),
+    "chat": Step("POST /api/advisor/chat", 2, lambda r: (
+        "POST", "/api/advisor/chat", {"user_id": r.randrange(1, 500), "message": r.choice(QUESTIONS)})),
+    "insight": Step("POST /api/advisor/predict-insight", 1, lambda r: (
+        "POST", f"/api/advisor/predict-insight?ticker={_ns(r)}&days=7", None)),
+}
+
+PROFILES: Dict[str, List[str]] = {
+    "market": ["quotes", "chart"],
+    "predict": ["predict"],
+    "news": ["news", "sentiment"],
+    "advisor": ["ask", "chat", "insight"],
+    "mixed": list(STEPS),
+}
+
+
+# ─── Environment ──────────────────────────────────────────────────────────────
+
+def _configure(upstreams: Optional[str], database_url: str) -> None:
+    """Point settings at the fakes; must run before the app is imported."""
+    from benchmarks.fake_upstreams import base_urls
+
+    os.environ.update(base_urls(upstreams or "http://fake-upstreams"))
+    os.environ.update({
+        "GEMINI_API_KEY": "bench-key",
+        "NEWS_API_KEY": "pub_bench",
+        "LLM_RPM": "1000000",              # the fake has no quota; keep the gateway's own limits
+        "DATABASE_URL": database_url,
+    })
+
+
+def _mount_fakes(profiles) -> None:
+    import httpx
+    from benchmarks.fake_upstreams import build_app
+    from core import http_client
+
+    transport = httpx.ASGITransport(app=build_app(profiles))
+    for name in ("yahoo", "newsdata", "news_mirror", "gemini"):
+        http_client.override_transport(name, transport)
+
+
+def _rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# ─── Runner ───────────────────────────────────────────────────────────────────
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+async def _drive(client, steps: List[Step], seconds: float, concurrency: int, seed: int, results) -> float:
+    weights = [s.weight for s in steps]
+    deadline = time.perf_counter() + seconds
+
+    async def worker(i):
+        rng = random.Random(seed * 1000 + i)
+        while time.perf_counter() < deadline:
+            step = rng.choices(steps, weights)[0]
+            method, path, body = step.build(rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400 or response.status_code in step.ok
+            except Exception:
+                ok = False
+            if results is not None:
+                results.setdefault(step.name, []).append(((time.perf_counter() - started) * 1000, ok))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return time.perf_counter() - started
+
+
+async def run(profile: str, duration: float, warmup: float, concurrency: int, seed: int) -> dict:
+    import httpx
+    from main import app
+
+    steps = [STEPS[name] for name in PROFILES[profile]]
+    results: Dict[str, List[Tuple[float, bool]]] = {}
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            if warmup > 0:
+                await _drive(client, steps, warmup, concurrency, seed + 1, None)
+            rss_before = _current_rss_mb()
+            elapsed = await _drive(client, steps, duration, concurrency, seed, results)
+            rss_after = _current_rss_mb()
+
+    def summary(samples):
+        latencies = [ms for ms, _ in samples]
+        errors = sum(1 for _, ok in samples if not ok)
+        return {
+            "requests": len(samples),
+            "rps": round(len(samples) / elapsed, 1),
+            "p50_ms": round(_percentile(latencies, 50), 1),
+            "p90_ms": round(_percentile(latencies, 90), 1),
+            "p99_ms": round(_percentile(latencies, 99), 1),
+            "max_ms": round(max(latencies, default=0.0), 1),
+            "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        }
+
+    everything = [s for samples in results.values() for s in samples]
+    return {
+        "profile": profile,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 1),
+        "overall": summary(everything),
+        "endpoints": {name: summary(samples) for name, samples in sorted(results.items())},
+        "memory_mb": {"rss_before": rss_before, "rss_after": rss_after, "peak_rss": _rss_mb()},
+    }
+
+
+# ─── Report & Baseline ────────────────────────────────────────────────────────
+
+def print_report(report: dict) -> None:
+    print(f"\nprofile={report['profile']} concurrency={report['concurrency']} duration={report['duration_s']}s")
+    print(f"{'endpoint':<36}{'reqs':>7}{'rps':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'err%':>7}")
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, s in rows:
+        print(f"{name:<36}{s['requests']:>7}{s['rps']:>8}{s['p50_ms']:>9}{s['p90_ms']:>9}"
+              f"{s['p99_ms']:>9}{s['error_rate'] * 100:>7.1f}")
+    mem = report["memory_mb"]
+    print(f"memory: rss {mem['rss_before']} -> {mem['rss_after']} MB, peak {mem['peak_rss']} MB")
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_ms: float = 5.0) -> List[str]:
+    """Regressions beyond `tolerance` (relative); latency also needs `min_ms` absolute."""
+    problems = []
+    current = {"overall": report["overall"], **report["endpoints"]}
+    previous = {"overall": baseline["overall"], **baseline["endpoints"]}
+    for name, base in previous.items():
+        now = current.get(name)
+        if now is None:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if now[metric] > base[metric] * (1 + tolerance) and now[metric] - base[metric] > min_ms:
+                problems.append(f"{name}: {metric} {base[metric]} -> {now[metric]}")
+        if now["rps"] < base["rps"] * (1 - tolerance):
+            problems.append(f"{name}: rps {base['rps']} -> {now['rps']}")
+        if now["error_rate"] > base["error_rate"] + 0.01:
+            problems.append(f"{name}: error rate {base['error_rate']} -> {now['error_rate']}")
+
+    peak, base_peak = report["memory_mb"]["peak_rss"], baseline["memory_mb"].get("peak_rss")
+    if peak and base_peak and peak > base_peak * (1 + tolerance):
+        problems.append(f"peak rss {base_peak} -> {peak} MB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--duration", type=float, default=15.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds (fills caches)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", nargs="*", metavar="NAME=MS", help="fake upstream mean latency")
+    parser.add_argument("--jitter", nargs="*", metavar="NAME=MS")
+    parser.add_argument("--errors", nargs="*", metavar="NAME=RATE")
+    parser.add_argument("--upstreams", help="URL of a running fake_upstreams server (default: in-process)")
+    parser.add_argument("--database-url", default="", help="default: no database (write-behind disabled)")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="fail (exit 1) on regression against this report")
+    parser.add_argument("--save-baseline", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    _configure(args.upstreams, args.database_url)
+    if not args.upstreams:
+        from dataclasses import asdict
+        from benchmarks.fake_upstreams import DEFAULT_PROFILES, UpstreamProfile, parse_overrides
+
+        profiles = {name: UpstreamProfile(**asdict(p)) for name, p in DEFAULT_PROFILES.items()}
+        parse_overrides(args.latency, "latency_ms", profiles)
+        parse_overrides(args.jitter, "jitter_ms", profiles)
+        parse_overrides(args.errors, "error_rate", profiles)
+        _mount_fakes(profiles)
+
+    report = asyncio.run(run(args.profile, args.duration, args.warmup, args.concurrency, args.seed))
+    print_report(report)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("profile") != report["profile"]:
+            sys.exit(f"baseline is for profile {baseline.get('profile')!r}, not {report['profile']!r}")
+        problems = compare(report, baseline, args.tolerance)
+        if problems:
+            print("\nREGRESSIONS (tolerance {:.0%}):".format(args.tolerance))
+            for problem in problems:
+                print("  " + problem)
+            sys.exit(1)
+        print(f"\nno regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+core/cache.py - In-Process TTL Cache with In-Flight Coalescing
+"""
+
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a TTL.
+
+    `get_or_set` coalesces concurrent misses for the same key: the first caller
+    starts the computation and every other caller awaits that same task, so at
+    most one upstream call per key is in flight.
+    """
+
+    instances: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()   # for /metrics
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        TTLCache.instances.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the entry; a computation in flight for it still answers its waiters but isn't stored."""
+        self._data.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    async def get_or_set(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the cached value for `key`, or compute it with `factory`.
+        `cache_if` can veto storing a result (e.g. error replies) — waiters
+        still share it, it just isn't kept.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+
+            async def compute():
+                try:
+                    result = await factory()
+                    # Detached by invalidate() meanwhile: the result may be stale
+                    current = self._inflight.get(key) is task
+                    if current and (cache_if is None or cache_if(result)):
+                        self.set(key, result, ttl)
+                    return result
+                finally:
+                    if self._inflight.get(key) is task:
+                        del self._inflight[key]
+
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+
+        # Shield so one cancelled caller doesn't cancel the shared computation
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._data),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
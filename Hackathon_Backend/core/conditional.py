@@ -0,0 +1,126 @@
+"""
+core/conditional.py - ETags & Conditional GET for JSON Routes
+
+Endpoints whose payloads rarely change get an ETag, and a request whose
+If-None-Match still matches is answered with an empty 304:
+
+- `ConditionalGetMiddleware` covers the configured paths. It keeps an ETag
+  the route already set (pre-serialized or cached bodies carry their
+  version), otherwise hashes the buffered body.
+- `FrozenJSON` holds a static payload serialized once, ETag included, so
+  those routes skip validation and JSON encoding on every call.
+"""
+
+import hashlib
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse, Response
+
+
+CONDITIONAL_PATHS = (
+    "/api/learning/quiz/questions",
+    "/api/learning/topics",
+    "/api/predict/tickers",
+    "/api/investment/allocation-templates",
+    "/api/market/chart",
+)
+DEFAULT_CACHE_CONTROL = "no-cache"      # cache, but revalidate every time
+
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=10).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()) == opaque
+        for tag in if_none_match.split(",")
+    )
+
+
+def json_body(payload: Any) -> bytes:
+    """Serialize exactly as FastAPI's default JSONResponse would."""
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def json_response(body: bytes, etag: Optional[str] = None, cache_control: str = DEFAULT_CACHE_CONTROL) -> Response:
+    return Response(
+        body,
+        media_type="application/json",
+        headers={"ETag": etag or body_etag(body), "Cache-Control": cache_control},
+    )
+
+
+class FrozenJSON:
+    """A static JSON payload, serialized on first use and reused."""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._body: Optional[bytes] = None
+        self._etag = ""
+
+    def response(self) -> Response:
+        if self._body is None:
+            self._body = json_body(self._factory())
+            self._etag = body_etag(self._body)
+        return json_response(self._body, self._etag)
+
+
+# ─── Middleware ───────────────────────────────────────────────────────────────
+
+class ConditionalGetMiddleware:
+    """Pure ASGI, so streaming and other routes pass through untouched."""
+
+    def __init__(self, app, paths: Iterable[str] = CONDITIONAL_PATHS):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start = None
+        chunks = []
+
+        async def send_conditional(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                if start["status"] != 200:
+                    await send(message)
+                return
+            if start is None or start["status"] != 200:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+
+            body = b"".join(chunks)
+            headers = MutableHeaders(scope=start)
+            etag = headers.get("etag") or body_etag(body)
+            headers["etag"] = etag
+            headers.setdefault("cache-control", DEFAULT_CACHE_CONTROL)
+
+            if if_none_match and etag_matches(if_none_match, etag):
+                kept = [(k, v) for k, v in headers.raw
+                        if k not in (b"content-length", b"content-type", b"content-encoding")]
+                await send({"type": "http.response.start", "status": 304, "headers": kept})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_conditional)
@@ -16,11 +16,28 @@ class Settings(BaseSettings):
     DATABASE_URL: str = ""
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
+    USER_CACHE_TTL: int = 30  # seconds a looked-up user is served from the worker cache
+    DB_ASYNC: bool = True            # asyncpg / aiosqlite engine for request handlers
+    DB_POOL_SIZE: int = 10           # per worker process
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 10        # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800      # recycle connections before server-side idle timeouts
+
+    # Write-behind persistence (services/persistence.py)
+    PERSIST_BATCH_SIZE: int = 200        # rows per bulk insert; a full batch flushes early
+    PERSIST_FLUSH_INTERVAL: float = 2.0  # seconds between flushes
+    PERSIST_MAX_PENDING: int = 10000     # buffered rows per worker before the overflow policy applies
+    PERSIST_OVERFLOW: str = "drop_oldest"  # or "drop_newest"
 
     # JWT
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
 
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    HASH_POOL_WORKERS: int = 2       # 0 = hash inline on the event loop
+    HASH_POOL_MAX_PENDING: int = 64  # queued hashes before logins get 503
+
     # Web3
     WEB3_PROVIDER_URL: str = ""
     WALLET_PRIVATE_KEY: str = ""
@@ -30,6 +47,56 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""  # Or Gemini / Groq key
     GEMINI_API_KEY: str = ""
 
+    # Upstream base URLs (point at benchmarks/fake_upstreams.py for load tests)
+    YAHOO_API_BASE: str = "https://query1.finance.yahoo.com"
+    YAHOO_FALLBACK_BASE: str = "https://query2.finance.yahoo.com"
+    NEWSDATA_API_BASE: str = "https://newsdata.io/api/1"
+    NEWS_MIRROR_URL: str = "https://saurav.tech/NewsAPI/top-headlines/category/business/in.json"
+
+    # Upstream resilience (seconds): serve-stale windows, hedge delays, per-attempt
+    # timeouts and circuit breakers for the Yahoo and news sources
+    QUOTE_FRESH_TTL: float = 15
+    QUOTE_STALE_TTL: float = 10 * 60
+    YAHOO_HEDGE_DELAY: float = 0.5   # start the fallback Yahoo host after this long
+    YAHOO_TIMEOUT: float = 3.0
+    NEWS_FRESH_TTL: float = 2 * 60
+    NEWS_STALE_TTL: float = 60 * 60
+    NEWS_FALLBACK_TTL: float = 30    # fresh and stale window for generic mirror results
+    NEWS_TIMEOUT: float = 5.0
+    BREAKER_FAILURE_THRESHOLD: int = 5   # consecutive failures before an upstream is skipped
+    BREAKER_RESET_TIMEOUT: float = 30.0
+
+    # LLM gateway
+    GEMINI_API_BASE: str = "https://generativelanguage.googleapis.com/v1beta"
+    LLM_MODEL_CHAIN: str = ""        # comma-separated override of the fallback chain
+    LLM_RPM: int = 15                # requests/minute per model (free tier)
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_MAX_RETRIES: int = 3
+    LLM_QUEUE_MAX: int = 256
+
+    # Chat conversation memory (token estimates)
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1500
+    CHAT_SUMMARY_TOKEN_BUDGET: int = 300
+    CHAT_MAX_CONVERSATIONS: int = 10_000
+    CHAT_IDLE_TTL: int = 60 * 60
+
+    # Advisor retrieval index
+    RETRIEVAL_INDEX_DIR: str = "data/retrieval"
+    RETRIEVAL_TOP_K: int = 4
+
+    # LLM response cache (seconds; 0 disables caching for that endpoint)
+    LLM_CACHE_TTL_INSIGHT: int = 15 * 60
+    LLM_CACHE_TTL_CHAT: int = 0
+    LLM_CACHE_MAX_ENTRIES: int = 2048
+
+    # Portfolio analytics
+    BACKTEST_WORKERS: int = 2        # process pool for large backtest grids; 0 = in-process
+    BACKTEST_MAX_PENDING: int = 2    # large grids on the pool at once before /backtest gets 503
+
+    # Metrics (/metrics, Prometheus text format)
+    METRICS_ENABLED: bool = True
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5   # seconds between event-loop lag probes; 0 = off
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,111 @@
+"""
+core/hashing.py - bcrypt Hashing on a Bounded Process Pool
+
+bcrypt costs ~100–300 ms of CPU per call. Running it inside `async def`
+routes stalls every other request on the worker, so the async helpers here
+ship the work to a dedicated process pool. Admission control rejects new
+work (HashingPoolSaturated) once too many hashes are queued, instead of
+letting a login burst build an unbounded backlog.
+
+This module deliberately imports nothing heavy: it is what pool processes
+import. Besides bcrypt it only pulls in core.metrics (standard library only,
+for the `timed` histograms); keep it that way.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from core.metrics import timed
+
+
+class HashingPoolSaturated(Exception):
+    """Too many password hashes are already queued; retry shortly."""
+
+
+# ─── CPU-bound primitives (run inside pool processes) ─────────────────────────
+
+def hash_password(password: str, rounds: int = 12) -> str:
+    salt = bcrypt.gensalt(rounds=rounds)
+    hashed_bytes = bcrypt.hashpw(password.encode('utf-8'), salt)
+    return hashed_bytes.decode('utf-8')
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+# ─── Pool ─────────────────────────────────────────────────────────────────────
+
+class HashingPool:
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers          # 0 = hash inline (no pool)
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: safe to start from a process that already runs threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def start(self) -> None:
+        """Start worker processes up front so the first login doesn't pay for it."""
+        if self.workers <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, _warmup) for _ in range(self.workers)))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        task = "bcrypt_hash" if fn is hash_password else "bcrypt_verify"
+        if self.workers <= 0:
+            with timed(task):
+                return fn(*args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingPoolSaturated("Password hashing is saturated, retry shortly")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            with timed(task):       # includes time queued for a pool process
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
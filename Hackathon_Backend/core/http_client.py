@@ -0,0 +1,207 @@
+"""
+core/http_client.py - Shared, Pooled HTTP Clients for Upstream Calls
+"""
+
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+
+import httpx
+
+from core import metrics
+
+
+# ─── Upstream Profiles ────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Upstream:
+    timeout: float            # total per-request timeout (seconds)
+    connect_timeout: float
+    max_connections: int
+    max_keepalive: int
+    keepalive_expiry: float = 30.0
+
+
+UPSTREAMS: Dict[str, Upstream] = {
+    "yahoo":    Upstream(timeout=5.0,  connect_timeout=2.0, max_connections=20, max_keepalive=10),
+    "newsdata": Upstream(timeout=10.0, connect_timeout=3.0, max_connections=10, max_keepalive=5),
+    "news_mirror": Upstream(timeout=10.0, connect_timeout=3.0, max_connections=5, max_keepalive=2),
+    "gemini":   Upstream(timeout=60.0, connect_timeout=5.0, max_connections=20, max_keepalive=10),
+    "web3":     Upstream(timeout=10.0, connect_timeout=3.0, max_connections=10, max_keepalive=5),
+}
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    ),
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # type: ignore  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# ─── Client Registry ──────────────────────────────────────────────────────────
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+_transport_overrides: Dict[str, httpx.AsyncBaseTransport] = {}
+
+
+def _make_hooks(name: str) -> dict:
+    counters = _stats.setdefault(name, {"requests": 0, "responses": 0, "errors": 0})
+
+    async def on_request(request: httpx.Request) -> None:
+        counters["requests"] += 1
+
+    async def on_response(response: httpx.Response) -> None:
+        counters["responses"] += 1
+        if response.status_code >= 400:
+            counters["errors"] += 1
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+class TimedTransport(httpx.AsyncBaseTransport):
+    """
+    Times every request to response headers into
+    mindvest_upstream_request_duration_seconds{upstream, site, outcome}.
+    Call sites name themselves with `extensions={"site": ...}`.
+    """
+
+    def __init__(self, upstream: str, transport: httpx.AsyncHTTPTransport):
+        self.upstream = upstream
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        site = request.extensions.get("site", "other")
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            metrics.upstreams.observe(time.perf_counter() - started, self.upstream, site, "error")
+            raise
+        outcome = "ok" if response.status_code < 400 else f"{response.status_code // 100}xx"
+        metrics.upstreams.observe(time.perf_counter() - started, self.upstream, site, outcome)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def override_transport(name: str, transport: Optional[httpx.AsyncBaseTransport]) -> None:
+    """
+    Send an upstream's requests through `transport` instead of the network
+    (e.g. the in-process fakes in benchmarks/); None restores the default.
+    Applies to clients created afterwards.
+    """
+    if transport is None:
+        _transport_overrides.pop(name, None)
+    else:
+        _transport_overrides[name] = transport
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    profile = UPSTREAMS[name]
+    transport = _transport_overrides.get(name) or httpx.AsyncHTTPTransport(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=profile.max_connections,
+            max_keepalive_connections=profile.max_keepalive,
+            keepalive_expiry=profile.keepalive_expiry,
+        ),
+    )
+    return httpx.AsyncClient(
+        transport=TimedTransport(name, transport),
+        timeout=httpx.Timeout(profile.timeout, connect=profile.connect_timeout),
+        headers=DEFAULT_HEADERS,
+        event_hooks=_make_hooks(name),
+    )
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """
+    Return the pooled client for an upstream.
+    Clients are created in the app lifespan; outside of it (scripts, CLIs)
+    they are created lazily on first use.
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        _clients[name] = client
+    return client
+
+
+async def startup() -> None:
+    """Create one pooled client per configured upstream."""
+    for name in UPSTREAMS:
+        get_client(name)
+
+
+async def shutdown() -> None:
+    """Close every pooled client and release its connections."""
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
+    if get_web3_session.cache_info().currsize:
+        get_web3_session().close()
+
+
+# ─── Sync Session (Web3 provider) ─────────────────────────────────────────────
+
+@lru_cache()
+def get_web3_session():
+    """
+    A pooled `requests.Session` for web3's HTTPProvider, which is sync-only.
+    Keep-alive connections are reused across every provider call.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    profile = UPSTREAMS["web3"]
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=profile.max_keepalive,
+        pool_maxsize=profile.max_connections,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# ─── Stats ────────────────────────────────────────────────────────────────────
+
+def _pool_connections(client: httpx.AsyncClient) -> Optional[dict]:
+    """Best-effort view of the connection pool (httpcore internals)."""
+    transport = getattr(client, "_transport", None)
+    transport = getattr(transport, "transport", transport)      # unwrap TimedTransport
+    pool = getattr(transport, "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return None
+    idle = sum(1 for c in connections if c.is_idle())
+    return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+
+def pool_stats() -> dict:
+    """Per-upstream request counters and connection pool usage."""
+    stats = {}
+    for name, profile in UPSTREAMS.items():
+        client = _clients.get(name)
+        stats[name] = {
+            **_stats.get(name, {"requests": 0, "responses": 0, "errors": 0}),
+            "limits": {
+                "max_connections": profile.max_connections,
+                "max_keepalive": profile.max_keepalive,
+                "timeout": profile.timeout,
+            },
+            "http2": _http2_available(),
+            "pool": _pool_connections(client) if client and not client.is_closed else None,
+        }
+    return stats
@@ -0,0 +1,256 @@
+"""
+core/metrics.py - Prometheus Metrics (routes, upstreams, caches, executors, event loop)
+
+A small in-process registry rendered in the Prometheus text format at
+/metrics. Recording is a perf_counter and a bisect per observation; things
+that already keep their own counters (TTL caches, hashing pool, write-behind
+queue, LLM gateway) are read at scrape time instead of on the hot path.
+
+    mindvest_http_request_duration_seconds{method,route,status}
+    mindvest_upstream_request_duration_seconds{upstream,site,outcome}   to response headers
+    mindvest_task_duration_seconds{task,outcome}                        Prophet/LSTM, bcrypt, yfinance, DB
+    mindvest_cache_*{cache}, mindvest_executor_queue_depth{executor}
+    mindvest_event_loop_lag_seconds
+
+Metrics are per worker process. Stdlib only: pool processes import this
+module through core/hashing.py.
+"""
+
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# ─── Instruments ──────────────────────────────────────────────────────────────
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()     # observations also arrive from worker threads
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Callback:
+    """Gauge or counter whose samples are read from `fn() -> {labels: value}` at scrape time."""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: Sequence[str],
+                 fn: Callable[[], Dict[tuple, float]]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            samples = self.fn()
+        except Exception as e:
+            print(f"[metrics] {self.name} unavailable: {e}")
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in samples.items()]
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str], fn) -> None:
+        self._metrics.append(Callback(name, help, "gauge", labelnames, fn))
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str], fn) -> None:
+        self._metrics.append(Callback(name, help, "counter", labelnames, fn))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+requests = registry.histogram(
+    "mindvest_http_request_duration_seconds", "Request latency by route.", ("method", "route", "status"),
+)
+upstreams = registry.histogram(
+    "mindvest_upstream_request_duration_seconds", "Upstream HTTP latency to response headers.",
+    ("upstream", "site", "outcome"),
+)
+tasks = registry.histogram(
+    "mindvest_task_duration_seconds", "Blocking or offloaded work (models, hashing, I/O).", ("task", "outcome"),
+)
+loop_lag = registry.histogram(
+    "mindvest_event_loop_lag_seconds", "How late the event loop woke a sleeping task.", (), LAG_BUCKETS,
+)
+
+
+class timed:
+    """`with timed("prophet"):` records into mindvest_task_duration_seconds (outcome ok/error)."""
+
+    __slots__ = ("task", "started")
+
+    def __init__(self, task: str):
+        self.task = task
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        tasks.observe(time.perf_counter() - self.started, self.task, "error" if exc_type else "ok")
+        return False
+
+
+# ─── Route Latency ────────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+    """Pure ASGI; labels by route template so path parameters don't explode cardinality."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            requests.observe(time.perf_counter() - started, scope["method"], route, status)
+
+
+# ─── Scrape-time Collectors ───────────────────────────────────────────────────
+
+def cache_samples(field: str) -> Dict[tuple, float]:
+    from core.cache import TTLCache
+
+    totals: Dict[tuple, float] = {}
+    for cache in list(TTLCache.instances):
+        totals[(cache.name,)] = totals.get((cache.name,), 0) + cache.stats()[field]
+    return totals
+
+
+def thread_pool_queue_depth(loop: Optional[asyncio.AbstractEventLoop] = None) -> int:
+    """Work items waiting for the default executor (asyncio.to_thread); best effort."""
+    loop = loop or asyncio.get_running_loop()
+    queue = getattr(getattr(loop, "_default_executor", None), "_work_queue", None)
+    return queue.qsize() if queue is not None else 0
+
+
+for _field, _help in (("hits", "Cache hits."), ("misses", "Cache misses (computed)."),
+                      ("coalesced", "Misses that joined an in-flight computation.")):
+    registry.counter(f"mindvest_cache_{_field}_total", _help, ("cache",),
+                     lambda field=_field: cache_samples(field))
+registry.gauge("mindvest_cache_entries", "Live entries per cache.", ("cache",), lambda: cache_samples("entries"))
+
+
+# ─── Event-loop Lag ───────────────────────────────────────────────────────────
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, time.perf_counter() - expected)
+            loop_lag.observe(self.last)
+
+    def start(self, interval: Optional[float] = None) -> None:
+        if interval is not None:
+            self.interval = interval
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+lag_monitor = LoopLagMonitor()
+registry.gauge("mindvest_event_loop_lag_last_seconds", "Most recent event-loop lag sample.", (),
+               lambda: {(): lag_monitor.last})
+
+
+def register_executors(sources: Iterable[Tuple[str, Callable[[], int]]]) -> None:
+    """Expose queue depths as mindvest_executor_queue_depth{executor}."""
+    sources = list(sources)
+    registry.gauge(
+        "mindvest_executor_queue_depth", "Work queued or running per executor.", ("executor",),
+        lambda: {(name,): fn() for name, fn in sources},
+    )
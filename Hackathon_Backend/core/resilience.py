@@ -0,0 +1,262 @@
+"""
+core/resilience.py - Stale-While-Revalidate, Hedged Requests & Circuit Breakers
+
+Shared by the market and news engines so a slow or broken upstream costs a
+bounded amount of latency instead of a full client timeout per request:
+
+- `StaleWhileRevalidate`: a value past its fresh TTL is still served (up to
+  the stale TTL) while one background task refreshes it; a failed refresh
+  keeps the last good value.
+- `hedged()`: starts the primary source and, if it hasn't answered within
+  the hedge delay (or fails, or its breaker is open), the fallback too. The
+  first success wins; the other attempt is cancelled. Without a delay the
+  fallback is only tried on failure, for sources that aren't true replicas.
+- `CircuitBreaker`: after N consecutive failures an upstream is skipped
+  outright for a cool-down, then a single probe decides whether it's back.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from core import metrics
+from core.cache import TTLCache
+from core.config import settings
+
+
+class CircuitOpen(Exception):
+    """The upstream's breaker is open; the call was not attempted."""
+
+
+class NoData(Exception):
+    """The upstream answered but had nothing useful; try the fallback, don't count a failure."""
+
+
+class UpstreamUnavailable(Exception):
+    """Every source failed or was skipped."""
+
+
+# ─── Circuit Breaker ──────────────────────────────────────────────────────────
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0              # consecutive
+        self.opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """May a call go out now? In half-open state, only one probe at a time."""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+        return True
+
+    def success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.trips += 1
+                print(f"[resilience] circuit for {self.name} opened after {self.failures} failures")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """A call was cancelled before it finished (e.g. lost a hedge): no verdict."""
+        self._probing = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures,
+                "trips": self.trips, "rejected": self.rejected}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def breaker(name: str) -> CircuitBreaker:
+    found = _breakers.get(name)
+    if found is None:
+        found = _breakers[name] = CircuitBreaker(
+            name, settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_TIMEOUT,
+        )
+    return found
+
+
+async def guarded(name: str, factory: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+    """One attempt through `name`'s breaker, bounded by `timeout`."""
+    circuit = breaker(name)
+    if not circuit.allow():
+        raise CircuitOpen(name)
+    try:
+        result = await asyncio.wait_for(factory(), timeout)
+    except NoData:
+        circuit.success()
+        raise
+    except asyncio.CancelledError:
+        circuit.release()
+        raise
+    except Exception:
+        circuit.failure()
+        raise
+    circuit.success()
+    return result
+
+
+# ─── Hedged Requests ──────────────────────────────────────────────────────────
+
+Attempt = Tuple[str, Callable[[], Awaitable[Any]]]     # (breaker name, coroutine factory)
+
+hedge_counts: Dict[str, int] = {}
+
+
+async def hedged(attempts: Sequence[Attempt], delay: Optional[float], timeout: float) -> Any:
+    """
+    First successful result of `attempts`, tried in order: the next one
+    starts when the running ones have all failed or after `delay` seconds
+    (delay None: only on failure). Raises UpstreamUnavailable if none succeeds.
+    """
+    queue = list(attempts)
+    pending = set()
+    errors: List[str] = []
+
+    def launch_next() -> Optional[str]:
+        if not queue:
+            return None
+        name, factory = queue.pop(0)
+        # An open breaker makes guarded() raise at once, which moves on to the next source
+        pending.add(asyncio.ensure_future(guarded(name, factory, timeout)))
+        return name
+
+    launch_next()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, timeout=delay if queue and delay is not None else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                name = launch_next()
+                hedge_counts[name] = hedge_counts.get(name, 0) + 1
+                continue
+            for task in done:
+                pending.discard(task)
+                if task.exception() is None:
+                    return task.result()
+                errors.append(repr(task.exception()))
+            if not pending:
+                launch_next()
+        raise UpstreamUnavailable("; ".join(errors) or "no sources")
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# ─── Stale-While-Revalidate ───────────────────────────────────────────────────
+
+TTLs = Callable[[Any], Tuple[float, float]]     # value -> (fresh_ttl, stale_ttl)
+
+
+class StaleWhileRevalidate:
+    def __init__(self, name: str, fresh_ttl: float, stale_ttl: float, max_entries: int = 1024,
+                 ttls: Optional[TTLs] = None):
+        self.name = name
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.ttls = ttls            # per-value override, e.g. shorter for fallback-source results
+        # (fresh_until, value); kept for the stale window, counted in the cache metrics
+        self._cache = TTLCache(name, ttl=max(stale_ttl, fresh_ttl), max_entries=max_entries)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stale_served = 0
+        self.refresh_failures = 0
+
+    def _refresh(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        async def run():
+            try:
+                value = await factory()
+                fresh, stale = self.ttls(value) if self.ttls else (self.fresh_ttl, self.stale_ttl)
+                self._cache.set(key, (time.monotonic() + fresh, value), ttl=max(fresh, stale))
+                return value
+            except Exception:
+                self.refresh_failures += 1
+                raise
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        # Background refreshes may fail unobserved; that's what the stale value is for
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return task
+
+    async def get(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._cache.get(key)
+        if entry is not None:
+            fresh_until, value = entry
+            self._cache.hits += 1
+            if time.monotonic() > fresh_until:
+                self.stale_served += 1
+                self._refresh(key, factory)
+            return value
+
+        if key in self._inflight:
+            self._cache.coalesced += 1
+        else:
+            self._cache.misses += 1
+        # Shield so one cancelled caller doesn't cancel the shared fetch
+        return await asyncio.shield(self._refresh(key, factory))
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "fresh_ttl": self.fresh_ttl,
+                "stale_served": self.stale_served, "refresh_failures": self.refresh_failures}
+
+
+_swr_caches: List[StaleWhileRevalidate] = []
+
+
+def swr_cache(name: str, fresh_ttl: float, stale_ttl: float, max_entries: int = 1024,
+              ttls: Optional[TTLs] = None) -> StaleWhileRevalidate:
+    cache = StaleWhileRevalidate(name, fresh_ttl, stale_ttl, max_entries, ttls)
+    _swr_caches.append(cache)
+    return cache
+
+
+def stats() -> dict:
+    return {
+        "breakers": {name: b.stats() for name, b in _breakers.items()},
+        "hedges": dict(hedge_counts),
+        "caches": {c.name: c.stats() for c in _swr_caches},
+    }
+
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+metrics.registry.gauge("mindvest_circuit_state", "Breaker state (0 closed, 1 half-open, 2 open).", ("upstream",),
+                       lambda: {(n,): STATE_VALUES[b.state] for n, b in _breakers.items()})
+metrics.registry.counter("mindvest_circuit_rejected_total", "Calls skipped by an open breaker.", ("upstream",),
+                         lambda: {(n,): b.rejected for n, b in _breakers.items()})
+metrics.registry.counter("mindvest_hedged_requests_total", "Fallback attempts started by the hedge delay.",
+                         ("upstream",), lambda: {(n,): c for n, c in hedge_counts.items()})
+metrics.registry.counter("mindvest_stale_served_total", "Stale values served while revalidating.", ("cache",),
+                         lambda: {(c.name,): c.stale_served for c in _swr_caches})
@@ -3,22 +3,42 @@ core/security.py - JWT & Web3 Logic
 """
 
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from web3 import Web3
 
 from core.config import settings
+from core.http_client import UPSTREAMS, get_web3_session
+
+from core import hashing, wallet
+from core.hashing import HashingPoolSaturated, verify_password
+
+
+# --- Passwords ---
+hashing_pool = hashing.HashingPool(
+    workers=settings.HASH_POOL_WORKERS,
+    max_pending=settings.HASH_POOL_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
 
-import bcrypt
 
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed_bytes = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed_bytes.decode('utf-8')
+    """Blocking bcrypt hash — use `hash_password_async` from request handlers."""
+    return hashing.hash_password(password, settings.BCRYPT_ROUNDS)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash on the bounded process pool. Raises HashingPoolSaturated when full."""
+    return await hashing_pool.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify on the bounded process pool. Raises HashingPoolSaturated when full."""
+    return await hashing_pool.verify(plain_password, hashed_password)
 
 
 # --- JWT ---
@@ -41,20 +61,50 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
+# --- Request identity ---
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Optional[dict]:
+    """Claims of a valid bearer token, or None for anonymous (or invalid-token) requests."""
+    if credentials is None:
+        return None
+    claims = decode_access_token(credentials.credentials)
+    return claims if claims and claims.get("sub") else None
+
+
+def caller_id(claims: Optional[dict]) -> Optional[int]:
+    """The caller's users.id from verified claims; None for anonymous callers."""
+    user_id = claims.get("user_id") if claims else None
+    return user_id if isinstance(user_id, int) and user_id > 0 else None
+
+
+async def require_user(claims: Optional[dict] = Depends(optional_user)) -> dict:
+    """Claims of a valid bearer token; 401 otherwise."""
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims
+
+
 # --- Web3 ---
+@lru_cache()
 def get_web3() -> Web3:
-    """Returns a Web3 instance connected to the configured provider."""
-    w3 = Web3(Web3.HTTPProvider(settings.WEB3_PROVIDER_URL))
-    return w3
+    """Returns a shared Web3 instance backed by the pooled provider session."""
+    profile = UPSTREAMS["web3"]
+    provider = Web3.HTTPProvider(
+        settings.WEB3_PROVIDER_URL,
+        request_kwargs={"timeout": profile.timeout},
+        session=get_web3_session(),
+    )
+    return Web3(provider)
 
 
 def verify_wallet_signature(message: str, signature: str, address: str) -> bool:
-    """Verify that a signed message was signed by the given wallet address."""
-    w3 = get_web3()
-    try:
-        recovered = w3.eth.account.recover_message(
-            text=message, signature=signature
-        )
-        return recovered.lower() == address.lower()
-    except Exception:
-        return False
+    """Verify that a signed message was signed by the given wallet address (offline)."""
+    return wallet.verify_signature(message, signature, address)
@@ -0,0 +1,249 @@
+"""
+core/static_assets.py - Precompressed, Fingerprinted Frontend Assets
+
+The frontend is a handful of files, so they are read once at startup and
+kept in memory together with gzip and (if the `brotli` package is
+installed) brotli variants. Every asset is served two ways:
+
+- at its plain URL (/app.js) with `Cache-Control: no-cache`: the browser
+  revalidates each time and gets a 304 while the content hash is unchanged
+- at a fingerprinted URL (/assets/app.<hash>.js) cached for a year as
+  immutable; index.html is rewritten to reference these, so a page load
+  after the first only fetches the HTML (usually a 304)
+
+The encoding is negotiated from Accept-Encoding (br > gzip > identity).
+With DEBUG on, changed files are picked up without a restart.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip covers every browser
+    brotli = None
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.config import settings
+
+
+STATIC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX = "index.html"
+FILES = ("index.html", "style.css", "api.js", "app.js", "trading-bg.js")
+FINGERPRINT_PREFIX = "/assets/"
+
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+ENCODINGS = ("br", "gzip")            # preference order
+
+CACHE_REVALIDATE = "no-cache"
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@dataclass
+class Asset:
+    name: str
+    content_type: str
+    digest: str                            # hex content hash (of the served identity body)
+    variants: Dict[str, bytes]             # encoding ("identity", "gzip", "br") -> body
+    mtime: float = 0.0
+    fingerprinted: str = field(init=False)
+
+    def __post_init__(self):
+        stem, ext = os.path.splitext(self.name)
+        self.fingerprinted = f"{stem}.{self.digest[:12]}{ext}"
+
+    @property
+    def url(self) -> str:
+        return FINGERPRINT_PREFIX + self.fingerprinted
+
+    def etag(self, encoding: str) -> str:
+        # Strong ETags must differ per representation
+        return f'"{self.digest[:20]}"' if encoding == "identity" else f'"{self.digest[:20]}-{encoding}"'
+
+
+# ─── Content Negotiation ──────────────────────────────────────────────────────
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """Best available encoding for an Accept-Encoding header ('identity' if none)."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[token.strip()] = q
+
+    wildcard = weights.get("*")
+    best, best_q = "identity", 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        q = weights.get(encoding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def etag_matches(if_none_match: str, asset: Asset) -> bool:
+    """True if any validator names this asset's content, in any encoding."""
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"').split("-", 1)[0]
+        if tag == asset.digest[:20]:
+            return True
+    return False
+
+
+# ─── Asset Store ──────────────────────────────────────────────────────────────
+
+def _compress(body: bytes) -> Dict[str, bytes]:
+    variants = {"identity": body}
+    if len(body) < MIN_COMPRESS_BYTES:
+        return variants
+    compressed = {"gzip": gzip.compress(body, GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        compressed["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    variants.update({enc: data for enc, data in compressed.items() if len(data) < len(body)})
+    return variants
+
+
+def _content_type(name: str) -> str:
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type.endswith("javascript"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+class StaticAssets:
+    def __init__(self, directory: str = STATIC_DIR, files=FILES, index: str = INDEX):
+        self.directory = directory
+        self.files = tuple(files)
+        self.index = index
+        self.assets: Dict[str, Asset] = {}
+        self._by_fingerprint: Dict[str, Asset] = {}
+
+    def _build(self, name: str, body: bytes, mtime: float) -> Asset:
+        return Asset(
+            name=name,
+            content_type=_content_type(name),
+            digest=hashlib.sha256(body).hexdigest(),
+            variants=_compress(body),
+            mtime=mtime,
+        )
+
+    @staticmethod
+    def _rewrite_index(html: bytes, urls: Dict[str, str]) -> bytes:
+        """Point the page's local <script>/<link> references at fingerprinted URLs."""
+        def replace(match):
+            url = urls.get(match.group(2).lstrip("/"))
+            return f'{match.group(1)}="{url}"' if url else match.group(0)
+
+        return re.sub(r'\b(src|href)="([^"?#:]+)"', replace, html.decode("utf-8")).encode("utf-8")
+
+    def load(self) -> None:
+        """Read, hash and compress every file (CPU-bound; run off the event loop)."""
+        assets, mtimes = {}, {}
+        for name in self.files:
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    body = f.read()
+                mtimes[name] = os.path.getmtime(path)
+            except OSError as e:
+                print(f"[static] {name} unavailable: {e}")
+                continue
+            assets[name] = body
+
+        built = {
+            name: self._build(name, body, mtimes[name])
+            for name, body in assets.items() if name != self.index
+        }
+        if self.index in assets:
+            urls = {name: asset.url for name, asset in built.items()}
+            built[self.index] = self._build(
+                self.index, self._rewrite_index(assets[self.index], urls), mtimes[self.index],
+            )
+        self._by_fingerprint = {a.fingerprinted: a for a in built.values()}
+        self.assets = built
+
+        identity = sum(len(a.variants["identity"]) for a in self.assets.values())
+        smallest = sum(min(len(v) for v in a.variants.values()) for a in self.assets.values())
+        encodings = "br+gzip" if brotli is not None else "gzip"
+        print(f"[static] {len(self.assets)} assets, {identity // 1024} KB -> {smallest // 1024} KB ({encodings})")
+
+    def _stale(self) -> bool:
+        for name in self.files:
+            try:
+                mtime = os.path.getmtime(os.path.join(self.directory, name))
+            except OSError:
+                mtime = None
+            asset = self.assets.get(name)
+            if (asset.mtime if asset else None) != mtime:
+                return True
+        return False
+
+    def _ensure_loaded(self) -> None:
+        if not self.assets or (settings.DEBUG and self._stale()):
+            self.load()
+
+    def lookup(self, path: str) -> Tuple[Optional[Asset], bool]:
+        """(asset, fingerprinted) for a request path, or (None, False)."""
+        self._ensure_loaded()
+        if path.startswith(FINGERPRINT_PREFIX):
+            return self._by_fingerprint.get(path[len(FINGERPRINT_PREFIX):]), True
+        name = path.lstrip("/") or self.index
+        return self.assets.get(name), False
+
+    def response(self, request: Request) -> Response:
+        """The asset at the request path, in the best encoding; 304 if the client's copy is current."""
+        asset, fingerprinted = self.lookup(request.url.path)
+        if asset is None:
+            return Response(status_code=404)
+
+        headers = request.headers
+        encoding = choose_encoding(headers.get("accept-encoding", ""), asset.variants)
+        response_headers = {
+            "ETag": asset.etag(encoding),
+            "Cache-Control": CACHE_IMMUTABLE if fingerprinted else CACHE_REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, asset):
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(asset.variants[encoding], headers=response_headers, media_type=asset.content_type)
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "url": asset.url,
+                "etag": asset.etag("identity"),
+                "bytes": {enc: len(body) for enc, body in asset.variants.items()},
+            }
+            for name, asset in self.assets.items()
+        }
+
+
+static_assets = StaticAssets()
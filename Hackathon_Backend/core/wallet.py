@@ -0,0 +1,143 @@
+"""
+core/wallet.py - Offline Wallet Signature Auth (EIP-191) & Login Nonces
+
+Signer recovery is pure secp256k1 math: no Web3 provider, no RPC. With the
+`coincurve` backend installed a recovery takes ~0.1 ms.
+
+Login flow:
+1. GET /api/auth/web3-nonce -> server issues a single-use nonce and the exact
+   message the wallet must sign (personal_sign).
+2. POST /api/auth/web3-login with the signed message -> the nonce is consumed
+   and the signer recovered and compared with the claimed address.
+
+Nonces are HMAC-tagged with SECRET_KEY and carry their own expiry, so any
+worker can validate one it did not issue. Consumption is recorded in the
+shared `used_nonces` table (models/nonces.py), so a captured signature can't
+be replayed against another worker.
+"""
+
+import hashlib
+import hmac
+import re
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from eth_hash.auto import keccak
+from eth_keys import keys
+
+from core.config import settings
+from models.nonces import build_ledger
+
+
+NONCE_TTL_SECONDS = 5 * 60
+
+_NONCE_RE = re.compile(r"^Nonce: (\S+)$", re.MULTILINE)
+
+
+# ─── Signature Recovery ───────────────────────────────────────────────────────
+
+def _personal_message_hash(message: str) -> bytes:
+    data = message.encode("utf-8")
+    return keccak(b"\x19Ethereum Signed Message:\n" + str(len(data)).encode() + data)
+
+
+def recover_signer(message: str, signature: str) -> Optional[str]:
+    """Lower-case 0x address that signed `message` (personal_sign), or None."""
+    try:
+        sig = bytes.fromhex(signature[2:] if signature.startswith("0x") else signature)
+        if len(sig) != 65:
+            return None
+        v = sig[64] - 27 if sig[64] >= 27 else sig[64]
+        public_key = keys.Signature(sig[:64] + bytes([v])).recover_public_key_from_msg_hash(
+            _personal_message_hash(message)
+        )
+        return "0x" + public_key.to_canonical_address().hex()
+    except Exception:
+        return None
+
+
+def verify_signature(message: str, signature: str, address: str) -> bool:
+    recovered = recover_signer(message, signature)
+    return recovered is not None and recovered == address.lower()
+
+
+def verify_signatures(items: Iterable[Tuple[str, str, str]]) -> List[bool]:
+    """Batch verification of (message, signature, address) triples."""
+    return [verify_signature(message, signature, address) for message, signature, address in items]
+
+
+# ─── Nonce Store ──────────────────────────────────────────────────────────────
+
+@dataclass
+class IssuedNonce:
+    nonce: str
+    message: str
+    expires_at: int
+
+
+def login_message(wallet: str, nonce: str, expires_at: int) -> str:
+    return (
+        "Sign in to MindVest\n"
+        f"Wallet: {wallet}\n"
+        f"Nonce: {nonce}\n"
+        f"Expires: {expires_at}"
+    )
+
+
+class NonceStore:
+    def __init__(self, secret: str, ledger, ttl: int = NONCE_TTL_SECONDS):
+        self._secret = secret.encode("utf-8")
+        self._ledger = ledger       # records consumption; shared across workers when DB-backed
+        self.ttl = ttl
+
+    def _tag(self, wallet: str, expires_at: int, rand: str) -> str:
+        payload = f"{wallet}|{expires_at}|{rand}".encode("utf-8")
+        return hmac.new(self._secret, payload, hashlib.sha256).hexdigest()[:32]
+
+    def issue(self, wallet: str) -> IssuedNonce:
+        wallet = wallet.lower()
+        expires_at = int(time.time()) + self.ttl
+        rand = secrets.token_hex(12)
+        nonce = f"{expires_at}.{rand}.{self._tag(wallet, expires_at, rand)}"
+        return IssuedNonce(nonce, login_message(wallet, nonce, expires_at), expires_at)
+
+    async def consume(self, wallet: str, nonce: str) -> bool:
+        """Validate tag and expiry and mark the nonce used. False if invalid or replayed."""
+        wallet = wallet.lower()
+        try:
+            expires_str, rand, tag = nonce.split(".")
+            expires_at = int(expires_str)
+        except ValueError:
+            return False
+        if expires_at < int(time.time()):
+            return False
+        if not hmac.compare_digest(tag, self._tag(wallet, expires_at, rand)):
+            return False
+        return await self._ledger.claim(nonce, expires_at)
+
+
+nonces = NonceStore(settings.SECRET_KEY, build_ledger())
+
+
+async def verify_login(wallet: str, message: str, signature: str) -> bool:
+    """
+    Check a web3 login: the message must be the one issued for this wallet,
+    its nonce unexpired and unused, and the signature from the wallet itself.
+    """
+    wallet = wallet.lower()
+    match = _NONCE_RE.search(message)
+    if not match:
+        return False
+    nonce = match.group(1)
+    try:
+        expires_at = int(nonce.split(".")[0])
+    except ValueError:
+        return False
+    if message != login_message(wallet, nonce, expires_at):
+        return False
+    # Check the signature before burning the nonce, so a bad request can't consume it
+    if not verify_signature(message, signature, wallet):
+        return False
+    return await nonces.consume(wallet, nonce)
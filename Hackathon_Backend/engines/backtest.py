@@ -0,0 +1,285 @@
+"""
+engines/backtest.py - Vectorised Historical Backtest of Allocation Strategies
+
+Checks the allocation templates (and the optimiser's portfolios) against
+history: each strategy is held over a fixed horizon from many start dates
+and rebalanced back to its weights every N trading days. All strategies,
+start dates and rebalance frequencies are simulated as array operations:
+
+    value(t) = prod(earlier segment growth) * (P[t] / P[last rebalance]) @ w
+
+Reports CAGR, volatility, max drawdown and Sharpe per strategy and
+frequency (median and tails over start dates). Large grids are split by
+start date across one shared, lazily started process pool; admission
+control rejects a grid (BacktestPoolSaturated) once too many are already
+running on it, instead of queueing CPU work without bound.
+
+Optimiser strategies are estimated on the same history they are tested on
+(look-ahead), so treat their numbers as an upper bound.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import settings
+
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.065           # annual, INR
+REBALANCE_PERIODS = {"monthly": 21, "quarterly": 63, "yearly": 252, "never": 0}
+PARALLEL_MIN_CELLS = 20_000_000  # runs * horizon * assets above which the pool is used
+CHUNK_CELLS = 4_000_000          # per array pass, bounds memory (~32 MB of float64)
+
+# Template asset names -> proxy instrument (same ETFs as the optimiser universe).
+# LIQUIDBEES pays its yield as units, so its price understates cash returns.
+TEMPLATE_PROXIES = {
+    "Government Bonds / FDs": "GILT5YBEES.NS",
+    "Government Bonds":       "GILT5YBEES.NS",
+    "Cash / Liquid Funds":    "LIQUIDBEES.NS",
+    "Large-Cap Mutual Funds": "NIFTYBEES.NS",
+    "Large-Cap Stocks":       "NIFTYBEES.NS",
+    "Blue-Chip Stocks":       "NIFTYBEES.NS",
+    "Growth Stocks":          "NIFTYBEES.NS",
+    "Mid-Cap Mutual Funds":   "MID150BEES.NS",
+    "Small/Mid-Cap Funds":    "MID150BEES.NS",
+    "Gold / REITs":           "GOLDBEES.NS",
+    "Gold / Commodities":     "GOLDBEES.NS",
+    "Commodities & Gold":     "GOLDBEES.NS",
+    "International ETFs":     "MON100.NS",
+    "Crypto (BTC/ETH)":       "BTC-USD",
+    "Crypto (BTC/ETH/Alt)":   "BTC-USD",
+}
+
+
+# ─── Simulation Kernel (pure NumPy; also runs in pool processes) ──────────────
+
+def simulate(prices: np.ndarray, weights: np.ndarray, starts: np.ndarray, period: int, horizon: int) -> np.ndarray:
+    """
+    Portfolio value paths (starting at 1.0) for every strategy and start date.
+
+    prices  (T, n)  aligned closes
+    weights (k, n)  one row per strategy
+    starts  (s,)    start indices, each <= T - horizon
+    period  rebalance every `period` days (0 = buy and hold)
+    Returns (s, horizon, k).
+    """
+    period = period or horizon
+    t = np.arange(horizon)
+    now = starts[:, None] + t                              # (s, H)
+    last = starts[:, None] + (t // period) * period        # last rebalance index
+    drift = (prices[now] / prices[last]) @ weights.T       # (s, H, k)
+
+    # Growth of each completed segment, chained
+    segments = (horizon - 1) // period + 1
+    bounds = np.minimum(starts[:, None] + np.arange(segments + 1) * period, starts[:, None] + horizon - 1)
+    seg_growth = (prices[bounds[:, 1:]] / prices[bounds[:, :-1]]) @ weights.T    # (s, J, k)
+    chained = np.concatenate([np.ones_like(seg_growth[:, :1]), np.cumprod(seg_growth, axis=1)], axis=1)
+    return chained[:, t // period] * drift
+
+
+def path_metrics(values: np.ndarray, risk_free: float = RISK_FREE_RATE) -> Dict[str, np.ndarray]:
+    """CAGR, volatility, max drawdown and Sharpe along axis 1 of (s, H, k) paths -> (s, k) each."""
+    daily = values[:, 1:] / values[:, :-1] - 1
+    years = (values.shape[1] - 1) / TRADING_DAYS
+    cagr = values[:, -1] ** (1 / years) - 1
+    vol = daily.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+    drawdown = (values / np.maximum.accumulate(values, axis=1) - 1).min(axis=1)
+    excess = daily.mean(axis=1) * TRADING_DAYS - risk_free
+    sharpe = np.divide(excess, vol, out=np.zeros_like(vol), where=vol > 0)
+    return {"cagr": cagr, "volatility": vol, "max_drawdown": drawdown, "sharpe": sharpe}
+
+
+def _run_chunk(prices, weights, starts, periods, horizon) -> Dict[int, Dict[str, np.ndarray]]:
+    return {p: path_metrics(simulate(prices, weights, starts, p, horizon)) for p in periods}
+
+
+def _chunks(starts: np.ndarray, horizon: int, assets: int) -> List[np.ndarray]:
+    chunk = max(1, CHUNK_CELLS // (horizon * assets))
+    return [starts[i:i + chunk] for i in range(0, len(starts), chunk)]
+
+
+def _merge(parts, periods: Sequence[int]) -> Dict[int, Dict[str, np.ndarray]]:
+    return {
+        p: {m: np.concatenate([part[p][m] for part in parts]) for m in parts[0][p]}
+        for p in periods
+    }
+
+
+def run_grid(
+    prices: np.ndarray, weights: np.ndarray, starts: np.ndarray, periods: Sequence[int], horizon: int,
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    Metrics for every (period, start, strategy): {period: {metric: (s, k)}},
+    computed in-process in memory-bounded chunks of start dates.
+    """
+    chunks = _chunks(starts, horizon, prices.shape[1])
+    return _merge([_run_chunk(prices, weights, c, periods, horizon) for c in chunks], periods)
+
+
+# ─── Pool ─────────────────────────────────────────────────────────────────────
+
+class BacktestPoolSaturated(Exception):
+    """Too many large backtests are already running; retry shortly."""
+
+
+class BacktestPool:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = min(workers, os.cpu_count() or 1)    # <= 1 = always in-process
+        self.max_pending = max_pending                      # grids on the pool at once
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Started on the first large grid, then shared: spawning workers costs more than most grids
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run_grid(
+        self, prices: np.ndarray, weights: np.ndarray, starts: np.ndarray, periods: Sequence[int], horizon: int,
+    ) -> Dict[int, Dict[str, np.ndarray]]:
+        """
+        Same result as `run_grid`; large grids are split by start date across
+        the pool. Raises BacktestPoolSaturated when the pool is full.
+        """
+        chunks = _chunks(starts, horizon, prices.shape[1])
+        cells = len(starts) * horizon * prices.shape[1] * len(periods)
+        if self.workers <= 1 or len(chunks) < 2 or cells < PARALLEL_MIN_CELLS:
+            return await asyncio.to_thread(run_grid, prices, weights, starts, periods, horizon)
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise BacktestPoolSaturated("Backtest workers are busy, retry shortly")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(executor, _run_chunk, prices, weights, c, periods, horizon)
+                for c in chunks
+            ))
+        finally:
+            self.pending -= 1
+            self.completed += 1
+        return _merge(parts, periods)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+pool = BacktestPool(workers=settings.BACKTEST_WORKERS, max_pending=settings.BACKTEST_MAX_PENDING)
+
+
+def summarise(metrics: Dict[int, Dict[str, np.ndarray]], strategies: Sequence[str], frequencies: Dict[int, str]) -> List[dict]:
+    rows = []
+    for period, by_metric in metrics.items():
+        for j, name in enumerate(strategies):
+            cagr = by_metric["cagr"][:, j]
+            rows.append({
+                "strategy": name,
+                "rebalance": frequencies[period],
+                "runs": int(len(cagr)),
+                "cagr": round(float(np.median(cagr)) * 100, 2),
+                "cagr_p5": round(float(np.percentile(cagr, 5)) * 100, 2),
+                "cagr_p95": round(float(np.percentile(cagr, 95)) * 100, 2),
+                "volatility": round(float(np.median(by_metric["volatility"][:, j])) * 100, 2),
+                "max_drawdown": round(float(np.median(by_metric["max_drawdown"][:, j])) * 100, 2),
+                "worst_drawdown": round(float(by_metric["max_drawdown"][:, j].min()) * 100, 2),
+                "sharpe": round(float(np.median(by_metric["sharpe"][:, j])), 2),
+            })
+    return rows
+
+
+# ─── Strategies ───────────────────────────────────────────────────────────────
+
+def template_weights(profile: str, symbols: Sequence[str]) -> np.ndarray:
+    from engines.investment import ALLOCATION_TEMPLATES
+
+    column = {s: i for i, s in enumerate(symbols)}
+    weights = np.zeros(len(symbols))
+    for item in ALLOCATION_TEMPLATES[profile]:
+        weights[column[TEMPLATE_PROXIES[item["asset"]]]] += item["percentage"] / 100.0
+    return weights
+
+
+def strategy_weights(names: Sequence[str], symbols: Sequence[str], frontier=None) -> Tuple[List[str], np.ndarray]:
+    """
+    Weight rows for strategy names: template profiles ("conservative", ...),
+    "min_variance", "risk_parity" or "frontier:<risk score 0-100>".
+    Optimiser strategies are skipped when no frontier is available.
+    """
+    from engines.investment import ALLOCATION_TEMPLATES
+
+    kept, rows = [], []
+    for name in names:
+        if name in ALLOCATION_TEMPLATES:
+            rows.append(template_weights(name, symbols))
+        elif frontier is None:
+            continue
+        elif name == "min_variance":
+            rows.append(frontier.min_variance)
+        elif name == "risk_parity":
+            rows.append(frontier.risk_parity)
+        elif name.startswith("frontier:"):
+            rows.append(frontier.lookup([float(name.split(":", 1)[1]) / 100.0])[0])
+        else:
+            raise ValueError(f"Unknown strategy: {name}")
+        kept.append(name)
+    return kept, np.array(rows).reshape(len(rows), len(symbols))
+
+
+async def run_backtest(
+    strategies: Sequence[str],
+    horizon_years: float = 1.0,
+    rebalance: Sequence[str] = ("monthly", "quarterly", "yearly", "never"),
+    start_step: int = 5,
+    history: str = "10y",
+) -> Optional[dict]:
+    """
+    Backtest named strategies on cached history of the optimiser universe; None without data.
+    Raises BacktestPoolSaturated when a large grid finds the pool full.
+    """
+    from engines.market_data import get_price_matrix
+    from engines.optimizer import OPTIMIZER_UNIVERSE, get_frontier
+
+    symbols = [a.symbol for a in OPTIMIZER_UNIVERSE]
+    horizon = int(round(horizon_years * TRADING_DAYS)) + 1
+    matrix = await get_price_matrix(symbols, range_=history, min_days=horizon + 1)
+    if matrix is None:
+        return None
+    days, prices = matrix
+
+    needs_frontier = any(s not in ("conservative", "moderate", "aggressive") for s in strategies)
+    frontier = await get_frontier() if needs_frontier else None
+    names, weights = strategy_weights(strategies, symbols, frontier)
+
+    periods = {REBALANCE_PERIODS[r]: r for r in rebalance}
+    starts = np.arange(0, len(prices) - horizon + 1, start_step)
+    metrics = await pool.run_grid(prices, weights, starts, list(periods), horizon)
+    return {
+        "horizon_days": horizon - 1,
+        "history_days": int(len(days)),
+        "start_dates": int(len(starts)),
+        "results": summarise(metrics, names, periods),
+    }
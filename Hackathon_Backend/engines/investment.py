@@ -69,3 +69,15 @@ def generate_portfolio(request: AllocationRequest) -> PortfolioResponse:
         allocations=allocations,
         rationale=RATIONALE_MAP.get(profile, ""),
     )
+
+
+async def build_portfolio(request: AllocationRequest) -> PortfolioResponse:
+    """Optimised allocation on today's frontier; the static template if that's unavailable."""
+    if request.method != "template":
+        from engines.optimizer import optimise_portfolio
+
+        rationale = RATIONALE_MAP.get(request.risk_profile.lower(), "")
+        portfolio = await optimise_portfolio(request, rationale)
+        if portfolio is not None:
+            return portfolio
+    return generate_portfolio(request)
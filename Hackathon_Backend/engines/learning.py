@@ -2,7 +2,8 @@
 engines/learning.py - Quiz Logic & Risk Profiling
 """
 
-from typing import List
+from collections import OrderedDict
+from typing import List, Optional
 from models.schemas import QuizSubmission, RiskProfile
 from datetime import datetime
 
@@ -70,6 +71,52 @@ QUIZ_BANK = [
 MAX_SCORE = sum(max(q["weights"]) for q in QUIZ_BANK)
 
 
+# ─── Learning Topics ──────────────────────────────────────────────────────────
+
+LEARNING_TOPICS = [
+    {"id": "basics",      "title": "Stock Market Basics",     "icon": "📈", "xp": 50,  "status": "available"},
+    {"id": "fundamental", "title": "Fundamental Analysis",     "icon": "🔍", "xp": 75,  "status": "available"},
+    {"id": "technical",   "title": "Technical Analysis",       "icon": "📊", "xp": 100, "status": "available"},
+    {"id": "risk",        "title": "Risk Management",          "icon": "⚠️", "xp": 75,  "status": "available"},
+    {"id": "options",     "title": "Options & Derivatives",    "icon": "🎯", "xp": 150, "status": "locked"},
+    {"id": "crypto",      "title": "Crypto & Web3",            "icon": "₿",  "xp": 200, "status": "locked"},
+]
+
+# Short grounding notes per topic, used by the advisor's retrieval index
+TOPIC_NOTES = {
+    "basics": (
+        "Stocks are ownership shares in a company traded on exchanges such as NSE and BSE. "
+        "Indices like Nifty 50 and Sensex track the largest companies. Long-term investing, "
+        "SIPs and diversification reduce the impact of short-term volatility."
+    ),
+    "fundamental": (
+        "Fundamental analysis values a company from its financial statements: revenue growth, "
+        "profit margins, P/E ratio, P/B ratio, return on equity, debt-to-equity and free cash flow. "
+        "Compare valuations against sector peers and historical averages."
+    ),
+    "technical": (
+        "Technical analysis studies price and volume charts. Common tools are moving averages, "
+        "RSI for overbought/oversold levels, MACD crossovers, support and resistance, and "
+        "candlestick patterns. It suits short-term trading more than long-term investing."
+    ),
+    "risk": (
+        "Risk management means position sizing, diversification across asset classes, stop-loss "
+        "orders and an emergency fund. Never invest money you need in the short term; rebalance "
+        "periodically to keep the allocation matching your risk profile."
+    ),
+    "options": (
+        "Options are derivatives giving the right to buy (call) or sell (put) at a strike price "
+        "before expiry. Futures and options are leveraged; losses can exceed the premium for sellers. "
+        "Beginners should use them only for hedging."
+    ),
+    "crypto": (
+        "Cryptocurrencies such as Bitcoin and Ethereum are highly volatile digital assets. Keep "
+        "crypto to a small share of the portfolio, use reputable exchanges or self-custody wallets, "
+        "and be aware of tax rules on gains."
+    ),
+}
+
+
 def get_all_questions() -> List[dict]:
     """Return the full quiz question bank."""
     return [
@@ -109,3 +156,23 @@ def calculate_risk_profile(submission: QuizSubmission) -> RiskProfile:
         profile=profile,
         generated_at=datetime.utcnow(),
     )
+
+
+# ─── Latest Profiles ──────────────────────────────────────────────────────────
+
+MAX_REMEMBERED_PROFILES = 10_000
+_LATEST_PROFILES: "OrderedDict[int, RiskProfile]" = OrderedDict()
+
+
+def remember_risk_profile(profile: RiskProfile) -> None:
+    """Keep the most recent risk profile per user for the advisor context (not for anonymous ids <= 0)."""
+    if profile.user_id <= 0:
+        return
+    _LATEST_PROFILES[profile.user_id] = profile
+    _LATEST_PROFILES.move_to_end(profile.user_id)
+    if len(_LATEST_PROFILES) > MAX_REMEMBERED_PROFILES:
+        _LATEST_PROFILES.popitem(last=False)
+
+
+def get_latest_risk_profile(user_id: int) -> Optional[RiskProfile]:
+    return _LATEST_PROFILES.get(user_id)
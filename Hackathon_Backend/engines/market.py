@@ -0,0 +1,60 @@
+"""
+engines/market.py - Live Quotes (Yahoo Finance chart API)
+
+Quotes are served from a stale-while-revalidate cache: fresh for a few
+seconds, then served as-is while one background request refreshes them.
+Misses go through the hedged, circuit-broken chart fetch in market_data.
+"""
+
+from typing import Optional
+
+from core import resilience
+from core.config import settings
+from engines.market_data import fetch_chart
+
+
+_quotes = resilience.swr_cache("live_quotes", settings.QUOTE_FRESH_TTL, settings.QUOTE_STALE_TTL, max_entries=1024)
+
+
+def normalise_quote_symbol(sym: str) -> str:
+    """Default bare symbols to the National Stock Exchange (e.g. TCS -> TCS.NS)."""
+    sym = sym.strip().upper()
+    if "." not in sym and sym not in ["BTC-USD", "ETH-USD"]:
+        sym = f"{sym}.NS"
+    return sym
+
+
+def _parse_quote(sym: str, data: dict) -> Optional[tuple]:
+    if not data.get('chart', {}).get('result'):
+        return None
+
+    meta = data['chart']['result'][0]['meta']
+    close = meta.get('regularMarketPrice')
+    prev_close = meta.get('chartPreviousClose')
+
+    if close is None:
+        return None
+
+    change = close - prev_close
+    pct = (change / prev_close) * 100 if prev_close else 0
+    display_sym = sym.split('.')[0]
+
+    return display_sym, {
+        "price": round(float(close), 2),
+        "change": round(float(change), 2),
+        "pct": round(float(pct), 2),
+        "dir": "positive" if change >= 0 else "negative"
+    }
+
+
+async def _load_quote(sym: str) -> Optional[tuple]:
+    data = await fetch_chart(sym, {"interval": "1m", "range": "1d"}, "quote")
+    return _parse_quote(sym, data) if data is not None else None
+
+
+async def fetch_yahoo_quote(sym: str):
+    """Fetch a single symbol's latest quote from Yahoo's chart API."""
+    try:
+        return await _quotes.get(sym, lambda: _load_quote(sym))
+    except Exception:
+        return None
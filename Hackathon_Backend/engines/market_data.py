@@ -0,0 +1,155 @@
+"""
+engines/market_data.py - Price History & OHLC Bars (Yahoo Finance chart API)
+
+Daily closes for the optimiser, risk and prediction engines, and OHLC bars
+for the market chart. Histories are fetched over the pooled Yahoo client and
+kept in-process for a few hours; a failed symbol is remembered briefly so an
+outage doesn't make every request wait on the upstream timeout. Every chart
+request goes to query1, hedged to the fallback host when it's slow, each
+behind its own circuit breaker (core/resilience.py).
+"""
+
+import asyncio
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core import resilience
+from core.cache import TTLCache
+from core.config import settings
+from core.http_client import get_client
+
+
+HISTORY_TTL = 6 * 3600
+FAILURE_TTL = 120
+SECONDS_PER_DAY = 86_400
+
+_history_cache = TTLCache("price_history", ttl=HISTORY_TTL, max_entries=512)
+_failures = TTLCache("price_history_failures", ttl=FAILURE_TTL, max_entries=512)
+
+# (day numbers since 1970-01-01, closes), both 1-D and aligned
+History = Tuple[np.ndarray, np.ndarray]
+
+
+class HistoryUnavailable(Exception):
+    """No usable aligned history; `missing` lists the symbols that have none (empty: too little overlap)."""
+
+    def __init__(self, missing: Sequence[str]):
+        self.missing = list(missing)
+        super().__init__(f"No price history for {', '.join(self.missing)}" if self.missing
+                         else "Not enough overlapping price history")
+
+
+def chart_url(symbol: str, base: Optional[str] = None) -> str:
+    return f"{base or settings.YAHOO_API_BASE}/v8/finance/chart/{symbol}"
+
+
+async def _request_chart(base: str, symbol: str, params: dict, site: str) -> Optional[dict]:
+    response = await get_client("yahoo").get(chart_url(symbol, base), params=params, extensions={"site": site})
+    if response.status_code == 404:
+        return None        # unknown symbol: a healthy answer, not an upstream failure
+    response.raise_for_status()
+    return response.json()
+
+
+async def fetch_chart(symbol: str, params: dict, site: str) -> Optional[dict]:
+    """
+    Yahoo chart JSON, or None for an unknown symbol. Raises
+    resilience.UpstreamUnavailable when neither host answers in time.
+    """
+    return await resilience.hedged(
+        [("yahoo", lambda: _request_chart(settings.YAHOO_API_BASE, symbol, params, site)),
+         ("yahoo_fallback", lambda: _request_chart(settings.YAHOO_FALLBACK_BASE, symbol, params, f"{site}_fallback"))],
+        delay=settings.YAHOO_HEDGE_DELAY,
+        timeout=settings.YAHOO_TIMEOUT,
+    )
+
+
+async def _download_history(symbol: str, range_: str) -> Optional[History]:
+    try:
+        data = await fetch_chart(symbol, {"interval": "1d", "range": range_}, "history")
+        if data is None:
+            return None
+        result = data["chart"]["result"][0]
+
+        indicators = result["indicators"]
+        adjclose = indicators.get("adjclose") or [{}]
+        closes = adjclose[0].get("adjclose") or indicators["quote"][0]["close"]
+
+        days = np.asarray(result["timestamp"], dtype=np.int64) // SECONDS_PER_DAY
+        closes = np.asarray(closes, dtype=np.float64)     # missing values -> NaN
+        keep = np.isfinite(closes) & (closes > 0)
+        days, closes = days[keep], closes[keep]
+        # Keep the last print per calendar day
+        last = np.r_[days[1:] != days[:-1], True]
+        return days[last], closes[last]
+    except Exception as e:
+        print(f"[market_data] {symbol} history unavailable: {e}")
+        return None
+
+
+async def get_price_history(symbol: str, range_: str = "2y") -> Optional[History]:
+    """Daily closes for one symbol, cached for HISTORY_TTL."""
+    key = (symbol, range_)
+    if _failures.get(key):
+        return None
+    history = await _history_cache.get_or_set(
+        key, lambda: _download_history(symbol, range_), cache_if=lambda h: h is not None,
+    )
+    if history is None:
+        _failures.set(key, True)
+    return history
+
+
+async def get_ohlc(symbol: str, range_: str, interval: str) -> Optional[Dict[str, np.ndarray]]:
+    """
+    OHLC bars (uncached): {"time": exchange-local datetime64[s], "open", "high",
+    "low", "close"}, bars with missing prices dropped. None if unavailable.
+    """
+    try:
+        data = await fetch_chart(symbol, {"interval": interval, "range": range_}, "ohlc")
+        if data is None:
+            return None
+        result = data["chart"]["result"][0]
+        quote = result["indicators"]["quote"][0]
+    except Exception as e:
+        print(f"[market_data] {symbol} {interval} bars unavailable: {e}")
+        return None
+
+    offset = int(result.get("meta", {}).get("gmtoffset") or 0)
+    bars = {"time": (np.asarray(result.get("timestamp") or [], dtype=np.int64) + offset).astype("datetime64[s]")}
+    for field in ("open", "high", "low", "close"):
+        bars[field] = np.asarray(quote.get(field) or [], dtype=np.float64)   # missing -> NaN
+    keep = np.isfinite(np.column_stack([bars[f] for f in ("open", "high", "low", "close")])).all(axis=1)
+    return {field: values[keep] for field, values in bars.items()}
+
+
+def align_histories(histories: Sequence[History]) -> History:
+    """Inner-join histories on calendar day -> (days, prices[T, n])."""
+    common = histories[0][0]
+    for days, _ in histories[1:]:
+        common = np.intersect1d(common, days, assume_unique=True)
+    prices = np.column_stack([
+        closes[np.searchsorted(days, common)] for days, closes in histories
+    ])
+    return common, prices
+
+
+async def load_price_matrix(symbols: Sequence[str], range_: str = "2y", min_days: int = 60) -> History:
+    """Aligned daily closes for several symbols. Raises HistoryUnavailable naming the gaps."""
+    histories = await asyncio.gather(*(get_price_history(s, range_) for s in symbols))
+    missing = [s for s, h in zip(symbols, histories) if h is None]
+    if missing:
+        raise HistoryUnavailable(missing)
+    days, prices = align_histories(histories)
+    if len(days) < min_days:
+        raise HistoryUnavailable([])
+    return days, prices
+
+
+async def get_price_matrix(symbols: Sequence[str], range_: str = "2y", min_days: int = 60) -> Optional[History]:
+    """Aligned daily closes for several symbols, or None if any is unavailable."""
+    try:
+        return await load_price_matrix(symbols, range_, min_days)
+    except HistoryUnavailable:
+        return None
@@ -2,137 +2,226 @@
 engines/news.py - News Sentiment (NewsAPI + LLM)
 """
 
-import httpx
-from typing import List
+import asyncio
+import json
+import re
+from typing import AsyncIterator, List, Tuple
 from models.schemas import NewsRequest, NewsArticle, NewsResponse
+from core import resilience
 from core.config import settings
+from core.http_client import get_client
+from services import llm
+from engines.retrieval import index_articles
+from engines.sentiment_series import record_articles
 from datetime import datetime, timezone
 
 
 # ─── NewsAPI ──────────────────────────────────────────────────────────────────
 
+def is_fallback(articles: List[dict]) -> bool:
+    """True for mirror results, which are generic headlines rather than a match for the query."""
+    return bool(articles) and articles[0].get("fallback", False)
+
+
+def _article_ttls(articles: List[dict]) -> Tuple[float, float]:
+    if is_fallback(articles):
+        return settings.NEWS_FALLBACK_TTL, settings.NEWS_FALLBACK_TTL
+    return settings.NEWS_FRESH_TTL, settings.NEWS_STALE_TTL
+
+
+# Raw articles per (query, limit), served stale while a refresh runs in the background
+_articles = resilience.swr_cache("news_articles", settings.NEWS_FRESH_TTL, settings.NEWS_STALE_TTL,
+                                 max_entries=256, ttls=_article_ttls)
+
+
+async def _fetch_newsdata(query: str, limit: int) -> List[dict]:
+    """Real-time news articles from NewsData.io using the API key."""
+    # User provided API key starts with 'pub_', meaning it's NewsData.io, not NewsAPI.org
+    url = f"{settings.NEWSDATA_API_BASE}/news"
+    params = {
+        "apikey": settings.NEWS_API_KEY,
+        "q": query,
+        "language": "en",
+        "size": limit,
+    }
+
+    response = await get_client("newsdata").get(url, params=params, extensions={"site": "latest"})
+    response.raise_for_status()
+    data = response.json()
+
+    # Transform NewsData.io format back to the unified format
+    results = data.get("results", [])
+    articles = []
+    for n in results:
+        articles.append({
+            "title": n.get("title", ""),
+            "description": n.get("description", ""),
+            "url": n.get("link", ""),
+            "publishedAt": n.get("pubDate", ""),
+            "source": {"name": n.get("source_id", "NewsData")}
+        })
+    if not articles:
+        raise resilience.NoData(f"NewsData returned no articles for {query!r}")
+    return articles
+
+
+async def _fetch_mirror(limit: int) -> List[dict]:
+    """
+    Free, real-time news articles from an open-source mirror using general
+    categories (ignores the query), marked as a fallback.
+    """
+    response = await get_client("news_mirror").get(settings.NEWS_MIRROR_URL, extensions={"site": "headlines"})
+    response.raise_for_status()
+    data = response.json()
+    articles = [{**a, "fallback": True} for a in data.get("articles", [])[:limit]]
+    if not articles:
+        raise resilience.NoData("news mirror returned no articles")
+    return articles
+
+
 async def fetch_news_articles(query: str, limit: int = 10) -> List[dict]:
-    """Fetch real-time news articles from NewsData.io using the API key."""
+    """
+    NewsData.io when a key is configured; the mirror only when NewsData fails
+    or its circuit is open (it isn't a replica, so slowness alone doesn't
+    switch). Mirror results are cached briefly and marked (see is_fallback).
+    Returns [] when nothing is available.
+    """
+    sources = []
     if settings.NEWS_API_KEY:
-        # User provided API key starts with 'pub_', meaning it's NewsData.io, not NewsAPI.org
-        url = "https://newsdata.io/api/1/news"
-        params = {
-            "apikey": settings.NEWS_API_KEY,
-            "q": query,
-            "language": "en",
-            "size": limit,
-        }
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Transform NewsData.io format back to the unified format
-                results = data.get("results", [])
-                articles = []
-                for n in results:
-                    articles.append({
-                        "title": n.get("title", ""),
-                        "description": n.get("description", ""),
-                        "url": n.get("link", ""),
-                        "publishedAt": n.get("pubDate", ""),
-                        "source": {"name": n.get("source_id", "NewsData")}
-                    })
-                if articles:
-                    return articles
-            except Exception as e:
-                print("NewsData API error:", e)
-                pass
-
-    # Fallback to free, real-time news articles from an open-source mirror using general categories
-    url = "https://saurav.tech/NewsAPI/top-headlines/category/business/in.json"
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            articles = data.get("articles", [])
-            return articles[:limit]
-        except Exception as e:
-            print("Fallback error:", e)
-            pass
-            
-    return []
+        sources.append(("newsdata", lambda: _fetch_newsdata(query, limit)))
+    sources.append(("news_mirror", lambda: _fetch_mirror(limit)))
+
+    try:
+        return await _articles.get(
+            (query, limit),
+            lambda: resilience.hedged(sources, delay=None, timeout=settings.NEWS_TIMEOUT),
+        )
+    except Exception as e:
+        print("News sources unavailable:", e)
+        return []
 
 
 # ─── Sentiment Analysis (LLM via Gemini / OpenAI) ────────────────────────────
 
+SENTIMENT_LLM_TIMEOUT = 8.0  # seconds, including time queued behind interactive calls
+
+
 async def analyse_sentiment(text: str) -> dict:
     """
     Use an LLM to analyse the sentiment of a news snippet.
     Returns {"sentiment": "positive|neutral|negative", "score": float, "summary": str}
     """
+    prompt = (
+        "Analyse the sentiment of the following financial news headline/snippet. "
+        "Reply ONLY with a JSON object with keys: "
+        '"sentiment" (positive/neutral/negative), '
+        '"score" (float between -1 and 1), '
+        '"summary" (one sentence summary).\n\n'
+        f"Text: {text}"
+    )
     try:
-        import google.generativeai as genai  # type: ignore
-
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-flash-latest")
-
-        prompt = (
-            "Analyse the sentiment of the following financial news headline/snippet. "
-            "Reply ONLY with a JSON object with keys: "
-            '"sentiment" (positive/neutral/negative), '
-            '"score" (float between -1 and 1), '
-            '"summary" (one sentence summary).\n\n'
-            f"Text: {text}"
-        )
-        result = model.generate_content(prompt)
-        import json, re
-
-        match = re.search(r"\{.*\}", result.text, re.DOTALL)
+        # Background priority with a short queue budget: under quota pressure
+        # we'd rather fall back to the heuristic than hold up the response.
+        reply = await llm.gateway.generate(prompt, priority=llm.BACKGROUND, timeout=SENTIMENT_LLM_TIMEOUT)
+        match = re.search(r"\{.*\}", reply, re.DOTALL)
         if match:
             return json.loads(match.group())
     except Exception:
         pass
 
     # Fallback: simple keyword-based heuristic
+    return score_sentiment_local(text)
+
+
+POSITIVE_WORDS = ["surge", "gain", "profit", "bull", "rise", "growth"]
+NEGATIVE_WORDS = ["crash", "loss", "bear", "drop", "fall", "risk"]
+
+
+def score_sentiment_local(text: str) -> dict:
+    """
+    Keyword-based sentiment scorer. Pure CPU, no network — used as the LLM
+    fallback and for offline bulk scoring of news archives.
+    """
     lower = text.lower()
-    if any(w in lower for w in ["surge", "gain", "profit", "bull", "rise", "growth"]):
+    if any(w in lower for w in POSITIVE_WORDS):
         return {"sentiment": "positive", "score": 0.6, "summary": text[:120]}
-    elif any(w in lower for w in ["crash", "loss", "bear", "drop", "fall", "risk"]):
+    elif any(w in lower for w in NEGATIVE_WORDS):
         return {"sentiment": "negative", "score": -0.6, "summary": text[:120]}
     return {"sentiment": "neutral", "score": 0.0, "summary": text[:120]}
 
 
 # ─── Main Entry ───────────────────────────────────────────────────────────────
 
+def _to_article(raw: dict, sentiment_data: dict) -> NewsArticle:
+    return NewsArticle(
+        title=raw.get("title", ""),
+        source=raw.get("source", {}).get("name", "Unknown"),
+        url=raw.get("url", ""),
+        published_at=raw.get("publishedAt", ""),
+        sentiment=sentiment_data.get("sentiment", "neutral"),
+        sentiment_score=sentiment_data.get("score", 0.0),
+        summary=sentiment_data.get("summary"),
+    )
+
+
+def _overall_sentiment(sentiment_scores: List[float]) -> str:
+    avg_score = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
+    if avg_score > 0.1:
+        return "positive"
+    elif avg_score < -0.1:
+        return "negative"
+    return "neutral"
+
+
+async def _score_article(raw: dict) -> NewsArticle:
+    text = f"{raw.get('title', '')} {raw.get('description', '')}"
+    sentiment_data = await analyse_sentiment(text.strip())
+    return _to_article(raw, sentiment_data)
+
+
 async def get_news_with_sentiment(request: NewsRequest) -> NewsResponse:
     """Fetch news and enrich each article with LLM-generated sentiment."""
     raw_articles = await fetch_news_articles(request.query, request.limit)
     articles: List[NewsArticle] = []
-    sentiment_scores: List[float] = []
 
     for raw in raw_articles:
-        text = f"{raw.get('title', '')} {raw.get('description', '')}"
-        sentiment_data = await analyse_sentiment(text.strip())
-
-        articles.append(
-            NewsArticle(
-                title=raw.get("title", ""),
-                source=raw.get("source", {}).get("name", "Unknown"),
-                url=raw.get("url", ""),
-                published_at=raw.get("publishedAt", ""),
-                sentiment=sentiment_data.get("sentiment", "neutral"),
-                sentiment_score=sentiment_data.get("score", 0.0),
-                summary=sentiment_data.get("summary"),
-            )
-        )
-        sentiment_scores.append(sentiment_data.get("score", 0.0))
+        articles.append(await _score_article(raw))
 
-    avg_score = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
-    if avg_score > 0.1:
-        overall = "positive"
-    elif avg_score < -0.1:
-        overall = "negative"
-    else:
-        overall = "neutral"
+    overall = _overall_sentiment([a.sentiment_score for a in articles])
+
+    record_articles(articles)
+    index_articles(articles)
+
+    return NewsResponse(query=request.query, articles=articles, overall_sentiment=overall,
+                        fallback=is_fallback(raw_articles))
+
+
+async def stream_news_with_sentiment(request: NewsRequest) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Streaming variant of `get_news_with_sentiment`.
+    Scores all articles concurrently and yields ("article", NewsArticle dict)
+    as each one completes, then a final ("summary", {...}) record.
+    Pending scoring tasks are cancelled if the consumer stops early.
+    """
+    raw_articles = await fetch_news_articles(request.query, request.limit)
+    tasks = [asyncio.create_task(_score_article(raw)) for raw in raw_articles]
+    articles: List[NewsArticle] = []
 
-    return NewsResponse(query=request.query, articles=articles, overall_sentiment=overall)
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            article = await next_done
+            articles.append(article)
+            yield "article", article.model_dump()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    record_articles(articles)
+    index_articles(articles)
+
+    yield "summary", {
+        "query": request.query,
+        "count": len(articles),
+        "overall_sentiment": _overall_sentiment([a.sentiment_score for a in articles]),
+        "fallback": is_fallback(raw_articles),
+    }
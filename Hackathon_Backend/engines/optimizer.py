@@ -0,0 +1,287 @@
+"""
+engines/optimizer.py - Mean-Variance & Risk-Parity Portfolio Optimiser (NumPy)
+
+Replaces the static allocation templates with weights computed from cached
+price history of one proxy instrument per asset class:
+
+- covariance: Ledoit-Wolf shrinkage towards a scaled identity
+- expected returns: sample means shrunk towards their cross-sectional mean
+- long-only mean-variance weights for a whole grid of risk-aversion levels,
+  solved together in one batched projected-gradient pass (the frontier)
+- minimum-variance and risk-parity weights
+
+The frontier is cached per universe and calendar day, so a request only maps
+its quiz `risk_score` (0–100) onto a frontier point: a lookup, not a solve.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.cache import TTLCache
+from engines.market_data import get_price_matrix
+from models.schemas import AllocationRequest, AssetAllocation, PortfolioResponse
+
+
+TRADING_DAYS = 252
+FRONTIER_POINTS = 101
+RISK_AVERSIONS = np.logspace(-1, 3, FRONTIER_POINTS)
+SOLVER_ITERATIONS = 400
+MEAN_SHRINKAGE = 0.5          # weight on the cross-sectional mean return
+MIN_WEIGHT = 0.005            # weights below this are dropped from the response
+
+METHODS = ("mean_variance", "min_variance", "risk_parity")
+
+# Where each profile sits on the frontier when no quiz score is given
+PROFILE_RISK_FRACTION = {"conservative": 0.2, "moderate": 0.5, "aggressive": 0.85}
+
+
+@dataclass(frozen=True)
+class AssetClass:
+    name: str
+    symbol: str          # Yahoo proxy instrument
+    max_weight: float
+
+
+OPTIMIZER_UNIVERSE: Tuple[AssetClass, ...] = (
+    AssetClass("Government Bonds",        "GILT5YBEES.NS", 0.60),
+    AssetClass("Cash / Liquid Funds",     "LIQUIDBEES.NS", 0.30),
+    AssetClass("Large-Cap Stocks",        "NIFTYBEES.NS",  0.60),
+    AssetClass("Mid/Small-Cap Funds",     "MID150BEES.NS", 0.40),
+    AssetClass("Gold / Commodities",      "GOLDBEES.NS",   0.30),
+    AssetClass("International ETFs",      "MON100.NS",     0.30),
+    AssetClass("Crypto (BTC)",            "BTC-USD",       0.20),
+)
+
+
+# ─── Estimation ───────────────────────────────────────────────────────────────
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    return np.diff(np.log(prices), axis=0)
+
+
+def shrunk_covariance(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Ledoit-Wolf (2004) shrinkage of the sample covariance towards mu*I."""
+    t, n = returns.shape
+    x = returns - returns.mean(axis=0)
+    sample = x.T @ x / t
+    mu = np.trace(sample) / n
+    d2 = ((sample - mu * np.eye(n)) ** 2).sum() / n
+    # sum_t ||x_t x_t' - S||_F^2 = sum_t ||x_t||^4 - t ||S||_F^2
+    b2 = ((x ** 2).sum(axis=1) ** 2).sum() - t * (sample ** 2).sum()
+    b2 = min(b2 / (t * t * n), d2)
+    shrinkage = float(b2 / d2) if d2 > 0 else 1.0
+    return shrinkage * mu * np.eye(n) + (1 - shrinkage) * sample, shrinkage
+
+
+def shrunk_means(returns: np.ndarray, shrinkage: float = MEAN_SHRINKAGE) -> np.ndarray:
+    means = returns.mean(axis=0)
+    return (1 - shrinkage) * means + shrinkage * means.mean()
+
+
+# ─── Solvers ──────────────────────────────────────────────────────────────────
+
+def project_capped_simplex(v: np.ndarray, caps: np.ndarray, iterations: int = 60) -> np.ndarray:
+    """Row-wise Euclidean projection onto {0 <= w <= caps, sum(w) = 1} (bisection on the shift)."""
+    v = np.atleast_2d(v)
+    lo = (v - caps).min(axis=1, keepdims=True)     # every weight at its cap: sum >= 1
+    hi = v.max(axis=1, keepdims=True)              # every weight at 0
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        total = np.clip(v - mid, 0, caps).sum(axis=1, keepdims=True)
+        over = total > 1
+        lo = np.where(over, mid, lo)
+        hi = np.where(over, hi, mid)
+    return np.clip(v - (lo + hi) / 2, 0, caps)
+
+
+def mean_variance_weights(
+    mu: np.ndarray, cov: np.ndarray, caps: np.ndarray, aversions: np.ndarray,
+    iterations: int = SOLVER_ITERATIONS,
+) -> np.ndarray:
+    """
+    Solve max  mu'w - (a/2) w'Σw  s.t. long-only, capped, fully invested,
+    for every risk aversion `a` at once (accelerated projected gradient).
+    Returns weights of shape (len(aversions), n).
+    """
+    aversions = np.asarray(aversions, dtype=np.float64)[:, None]
+    lipschitz = aversions * np.linalg.eigvalsh(cov)[-1]
+    step = 1.0 / np.maximum(lipschitz, 1e-12)
+
+    w = project_capped_simplex(np.tile(caps / caps.sum(), (len(aversions), 1)), caps)
+    y, t = w, 1.0
+    for _ in range(iterations):
+        grad = aversions * (y @ cov) - mu
+        w_next = project_capped_simplex(y - step * grad, caps)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + ((t - 1) / t_next) * (w_next - w)
+        w, t = w_next, t_next
+    return w
+
+
+def min_variance_weights(cov: np.ndarray, caps: np.ndarray) -> np.ndarray:
+    return mean_variance_weights(np.zeros(len(cov)), cov, caps, np.array([1.0]))[0]
+
+
+def risk_parity_weights(
+    cov: np.ndarray, caps: Optional[np.ndarray] = None, iterations: int = 500, tol: float = 1e-9,
+) -> np.ndarray:
+    """
+    Equal risk contributions among assets below their cap (capped assets sit
+    at the cap). Multiplicative fixed-point: w_i *= sqrt(mean RC / RC_i).
+    """
+    n = len(cov)
+    caps = np.ones(n) if caps is None else caps
+    w = 1.0 / np.sqrt(np.maximum(np.diag(cov), 1e-18))
+    w = project_capped_simplex(w / w.sum(), caps)[0]
+    for _ in range(iterations):
+        contributions = w * (cov @ w)
+        free = w < caps - 1e-12
+        if not free.any():
+            break
+        updated = w.copy()
+        updated[free] *= np.sqrt(contributions[free].mean() / np.maximum(contributions[free], 1e-18))
+        updated[free] *= (1.0 - updated[~free].sum()) / updated[free].sum()
+        updated = np.minimum(updated, caps)
+        updated[free] += (1.0 - updated.sum()) * updated[free] / updated[free].sum()
+        converged = np.abs(updated - w).max() < tol
+        w = updated
+        if converged:
+            break
+    return w
+
+
+# ─── Frontier ─────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Frontier:
+    assets: Tuple[AssetClass, ...]
+    day: str
+    observations: int
+    shrinkage: float
+    weights: np.ndarray            # (points, n), ordered by increasing volatility
+    expected_returns: np.ndarray   # annualised, per point
+    volatilities: np.ndarray       # annualised, per point
+    min_variance: np.ndarray
+    risk_parity: np.ndarray
+    mu: np.ndarray                 # annualised expected returns per asset
+    cov: np.ndarray                # annualised covariance
+
+    def lookup(self, fractions) -> np.ndarray:
+        """
+        Frontier weights for risk fractions in [0, 1] (0 = minimum volatility,
+        1 = maximum return), matched on volatility. Shape (len(fractions), n).
+        """
+        fractions = np.clip(np.asarray(fractions, dtype=np.float64), 0.0, 1.0)
+        targets = self.volatilities[0] + fractions * (self.volatilities[-1] - self.volatilities[0])
+        index = np.searchsorted(self.volatilities, targets).clip(0, len(self.volatilities) - 1)
+        return self.weights[index]
+
+    def portfolio_stats(self, weights: np.ndarray) -> Tuple[float, float]:
+        """(annualised expected return, annualised volatility) of one weight vector."""
+        return float(weights @ self.mu), float(np.sqrt(max(weights @ self.cov @ weights, 0.0)))
+
+
+def build_frontier(prices: np.ndarray, assets: Sequence[AssetClass], day: str) -> Frontier:
+    """Estimate from aligned daily closes (T, n) and solve the whole frontier."""
+    returns = log_returns(prices)
+    cov_daily, shrinkage = shrunk_covariance(returns)
+    mu = shrunk_means(returns) * TRADING_DAYS
+    cov = cov_daily * TRADING_DAYS
+    caps = np.array([a.max_weight for a in assets])
+
+    weights = mean_variance_weights(mu, cov, caps, RISK_AVERSIONS)
+    expected = weights @ mu
+    vols = np.sqrt(np.einsum("ij,jk,ik->i", weights, cov, weights).clip(min=0))
+    order = np.argsort(vols, kind="stable")
+
+    return Frontier(
+        assets=tuple(assets),
+        day=day,
+        observations=len(returns),
+        shrinkage=shrinkage,
+        weights=weights[order],
+        expected_returns=expected[order],
+        volatilities=vols[order],
+        min_variance=min_variance_weights(cov, caps),
+        risk_parity=risk_parity_weights(cov, caps),
+        mu=mu,
+        cov=cov,
+    )
+
+
+_frontier_cache = TTLCache("frontier", ttl=24 * 3600, max_entries=32)
+
+
+async def _compute_frontier(assets: Tuple[AssetClass, ...], day: str) -> Optional[Frontier]:
+    matrix = await get_price_matrix([a.symbol for a in assets])
+    if matrix is None:
+        return None
+    _, prices = matrix
+    return await asyncio.to_thread(build_frontier, prices, assets, day)
+
+
+async def get_frontier(assets: Tuple[AssetClass, ...] = OPTIMIZER_UNIVERSE) -> Optional[Frontier]:
+    """Today's frontier for a universe (one solve per universe per day per worker)."""
+    day = date.today().isoformat()
+    return await _frontier_cache.get_or_set(
+        (tuple(a.symbol for a in assets), day),
+        lambda: _compute_frontier(assets, day),
+        cache_if=lambda f: f is not None,
+    )
+
+
+# ─── Allocation ───────────────────────────────────────────────────────────────
+
+def risk_fraction(risk_score: Optional[float], risk_profile: str) -> float:
+    """Quiz score (0–100) -> position on the frontier; profile default otherwise."""
+    if risk_score is not None:
+        return min(max(risk_score / 100.0, 0.0), 1.0)
+    return PROFILE_RISK_FRACTION.get(risk_profile.lower(), PROFILE_RISK_FRACTION["moderate"])
+
+
+def select_weights(frontier: Frontier, method: str, fraction: float) -> np.ndarray:
+    if method == "min_variance":
+        return frontier.min_variance
+    if method == "risk_parity":
+        return frontier.risk_parity
+    return frontier.lookup([fraction])[0]
+
+
+def to_allocations(assets: Sequence[AssetClass], weights: np.ndarray, amount: float):
+    """Rounded AssetAllocation list (percentages sum to 100), dust dropped."""
+    weights = np.where(weights >= MIN_WEIGHT, weights, 0.0)
+    weights = weights / weights.sum()
+    percentages = np.round(weights * 100, 1)
+    percentages[np.argmax(percentages)] += round(100.0 - percentages.sum(), 1)
+    return [
+        AssetAllocation(asset=a.name, percentage=float(p), amount=round(amount * p / 100, 2))
+        for a, p in zip(assets, percentages) if p > 0
+    ]
+
+
+async def optimise_portfolio(request: AllocationRequest, rationale: str = "") -> Optional[PortfolioResponse]:
+    """Frontier-based allocation, or None when price history is unavailable."""
+    frontier = await get_frontier()
+    if frontier is None:
+        return None
+
+    method = request.method if request.method in METHODS else "mean_variance"
+    weights = select_weights(frontier, method, risk_fraction(request.risk_score, request.risk_profile))
+    expected_return, volatility = frontier.portfolio_stats(weights)
+
+    summary = (
+        f"Optimised ({method.replace('_', '-')}) on {frontier.observations} days of price history: "
+        f"expected return {expected_return:.1%} a year, volatility {volatility:.1%}."
+    )
+    return PortfolioResponse(
+        total_amount=request.investment_amount,
+        allocations=to_allocations(frontier.assets, weights, request.investment_amount),
+        rationale=f"{rationale} {summary}".strip(),
+        method=method,
+        expected_return=round(expected_return * 100, 2),
+        volatility=round(volatility * 100, 2),
+    )
@@ -1,12 +1,21 @@
 """
-engines/prediction.py - ML Price Prediction (yfinance + Prophet / LSTM)
+engines/prediction.py - ML Price Prediction (Prophet / LSTM)
+
+Request handlers use `run_prediction_async`: history comes from the shared,
+cached Yahoo chart client (engines/market_data.py) and the model runs in a
+worker thread. `run_prediction` without a history still downloads through
+yfinance for scripts.
 """
 
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
 import pandas as pd
 import yfinance as yf
-from datetime import datetime, timedelta
-from typing import List
 
+from core.metrics import timed
 from models.schemas import PredictionRequest, PredictionPoint, PredictionResponse
 
 
@@ -14,23 +23,29 @@ from models.schemas import PredictionRequest, PredictionPoint, PredictionRespons
 
 def fetch_historical_data(ticker: str, period: str = "2y") -> pd.DataFrame:
     """Download historical OHLCV data from Yahoo Finance."""
-    df = yf.download(ticker, period=period, auto_adjust=True, progress=False)
+    with timed("yfinance_history"):
+        df = yf.download(ticker, period=period, auto_adjust=True, progress=False)
     df = df[["Close"]].reset_index()
     df.columns = ["ds", "y"]  # Prophet-compatible column names
     df["ds"] = pd.to_datetime(df["ds"])
     return df
 
 
+def history_frame(days: np.ndarray, closes: np.ndarray) -> pd.DataFrame:
+    """(day numbers, closes) from engines/market_data -> Prophet's ds/y frame."""
+    return pd.DataFrame({"ds": pd.to_datetime(days, unit="D"), "y": closes})
+
+
 # ─── Prophet Model ────────────────────────────────────────────────────────────
 
-def predict_with_prophet(ticker: str, days: int) -> PredictionResponse:
+def predict_with_prophet(ticker: str, days: int, history: Optional[pd.DataFrame] = None) -> PredictionResponse:
     """Use Facebook Prophet to forecast future prices."""
     try:
         from prophet import Prophet  # type: ignore
     except ImportError:
         raise ImportError("prophet is not installed. Run: pip install prophet")
 
-    df = fetch_historical_data(ticker)
+    df = history if history is not None else fetch_historical_data(ticker)
     model = Prophet(daily_seasonality=True, yearly_seasonality=True)
     model.fit(df)
 
@@ -53,12 +68,12 @@ def predict_with_prophet(ticker: str, days: int) -> PredictionResponse:
 
 # ─── LSTM Model (Placeholder) ────────────────────────────────────────────────
 
-def predict_with_lstm(ticker: str, days: int) -> PredictionResponse:
+def predict_with_lstm(ticker: str, days: int, history: Optional[pd.DataFrame] = None) -> PredictionResponse:
     """
     LSTM-based prediction placeholder.
     Replace this stub with your trained Keras/PyTorch model.
     """
-    df = fetch_historical_data(ticker, period="1y")
+    df = history if history is not None else fetch_historical_data(ticker, period="1y")
     last_price = float(df["y"].iloc[-1])
 
     # Naive stub: return last price ± small noise for demonstration
@@ -84,8 +99,21 @@ def predict_with_lstm(ticker: str, days: int) -> PredictionResponse:
 
 # ─── Main Entry ───────────────────────────────────────────────────────────────
 
-def run_prediction(request: PredictionRequest, model: str = "prophet") -> PredictionResponse:
+def run_prediction(request: PredictionRequest, model: str = "prophet",
+                   history: Optional[pd.DataFrame] = None) -> PredictionResponse:
     """Route prediction request to the appropriate model."""
     if model.lower() == "lstm":
-        return predict_with_lstm(request.ticker, request.days)
-    return predict_with_prophet(request.ticker, request.days)
+        with timed("predict_lstm"):
+            return predict_with_lstm(request.ticker, request.days, history)
+    with timed("predict_prophet"):
+        return predict_with_prophet(request.ticker, request.days, history)
+
+
+async def run_prediction_async(request: PredictionRequest, model: str = "prophet") -> PredictionResponse:
+    """Cached history + model fit off the event loop."""
+    from engines.market_data import get_price_history
+
+    history = await get_price_history(request.ticker, "2y")
+    if history is None:
+        raise ValueError(f"No price history for {request.ticker}")
+    return await asyncio.to_thread(run_prediction, request, model, history_frame(*history))
@@ -0,0 +1,161 @@
+"""
+engines/rebalance.py - Bulk Allocation & Rebalancing (one matrix operation per batch)
+
+Takes a column-oriented batch of users (amount, risk profile and/or quiz
+score, current holdings) and computes target allocations and rebalancing
+trades for all of them at once:
+
+    weights  (users x assets)  frontier lookup by risk fraction
+    targets  = weights * (holdings.sum(1) + amounts)
+    trades   = targets - holdings       (+ buy / - sell)
+
+`amounts` is new money to invest on top of the current holdings. Holdings
+columns are matched to asset classes by name; an asset held but no longer
+in the plan gets a target of 0 (sell). Without price history the profile
+templates are used, exactly as for single allocations.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from engines.investment import ALLOCATION_TEMPLATES
+from engines.optimizer import METHODS, PROFILE_RISK_FRACTION, Frontier, get_frontier
+
+
+PROFILES = ("conservative", "moderate", "aggressive")
+NDJSON_CHUNK_ROWS = 1000
+
+
+@dataclass
+class RebalanceBatch:
+    user_ids: np.ndarray              # (m,)
+    amounts: np.ndarray               # (m,) new money
+    risk_profiles: Sequence[str]      # (m,) used where risk_scores is NaN
+    risk_scores: np.ndarray           # (m,) 0–100, NaN = use the profile
+    holdings: np.ndarray              # (m, k) current value per holdings column
+    holding_assets: Sequence[str]     # (k,)
+
+
+@dataclass
+class RebalancePlan:
+    method: str
+    assets: List[str]                 # column order of weights/targets/trades
+    user_ids: np.ndarray
+    totals: np.ndarray                # (m,)
+    weights: np.ndarray               # (m, n)
+    targets: np.ndarray               # (m, n)
+    trades: np.ndarray                # (m, n)
+
+
+def _profile_index(risk_profiles: Sequence[str]) -> np.ndarray:
+    lookup = {p: i for i, p in enumerate(PROFILES)}
+    return np.array([lookup.get(p.lower(), 1) for p in risk_profiles], dtype=np.int64)
+
+
+def risk_fractions(risk_scores: np.ndarray, risk_profiles: Sequence[str]) -> np.ndarray:
+    defaults = np.array([PROFILE_RISK_FRACTION[p] for p in PROFILES])[_profile_index(risk_profiles)]
+    return np.where(np.isnan(risk_scores), defaults, np.clip(risk_scores / 100.0, 0.0, 1.0))
+
+
+def _frontier_weights(frontier: Frontier, method: str, fractions: np.ndarray):
+    assets = [a.name for a in frontier.assets]
+    if method == "min_variance":
+        return assets, np.broadcast_to(frontier.min_variance, (len(fractions), len(assets)))
+    if method == "risk_parity":
+        return assets, np.broadcast_to(frontier.risk_parity, (len(fractions), len(assets)))
+    return assets, frontier.lookup(fractions)
+
+
+def _template_weights(batch: RebalanceBatch):
+    assets = list(dict.fromkeys(item["asset"] for p in PROFILES for item in ALLOCATION_TEMPLATES[p]))
+    column = {a: j for j, a in enumerate(assets)}
+    table = np.zeros((len(PROFILES), len(assets)))
+    for i, profile in enumerate(PROFILES):
+        for item in ALLOCATION_TEMPLATES[profile]:
+            table[i, column[item["asset"]]] = item["percentage"] / 100.0
+
+    # A quiz score picks its profile band, as in calculate_risk_profile
+    scores = batch.risk_scores
+    by_score = np.digitize(np.nan_to_num(scores), [33.0, 66.0])
+    index = np.where(np.isnan(scores), _profile_index(batch.risk_profiles), by_score)
+    return assets, table[index]
+
+
+def plan_rebalance(batch: RebalanceBatch, frontier: Optional[Frontier], method: str = "mean_variance") -> RebalancePlan:
+    """Targets and trades for the whole batch (pure NumPy, no I/O)."""
+    if frontier is not None and method in METHODS:
+        plan_assets, weights = _frontier_weights(
+            frontier, method, risk_fractions(batch.risk_scores, batch.risk_profiles)
+        )
+    else:
+        method = "template"
+        plan_assets, weights = _template_weights(batch)
+
+    # Columns: planned assets, then anything only held today (target 0)
+    assets = plan_assets + [a for a in batch.holding_assets if a not in plan_assets]
+    m, n = len(batch.user_ids), len(assets)
+    full_weights = np.zeros((m, n))
+    full_weights[:, :len(plan_assets)] = weights
+
+    holdings = np.zeros((m, n))
+    if len(batch.holding_assets):
+        columns = [assets.index(a) for a in batch.holding_assets]
+        np.add.at(holdings, (slice(None), columns), batch.holdings)
+
+    totals = holdings.sum(axis=1) + batch.amounts
+    targets = full_weights * totals[:, None]
+    return RebalancePlan(
+        method=method,
+        assets=assets,
+        user_ids=batch.user_ids,
+        totals=totals,
+        weights=full_weights,
+        targets=targets,
+        trades=targets - holdings,
+    )
+
+
+async def rebalance(batch: RebalanceBatch, method: Optional[str] = None) -> RebalancePlan:
+    """Plan against today's cached frontier (templates if it's unavailable)."""
+    method = method or "mean_variance"
+    frontier = await get_frontier() if method != "template" else None
+    return plan_rebalance(batch, frontier, method)
+
+
+def iter_ndjson(plan: RebalancePlan, min_trade: float = 0.0) -> Iterator[str]:
+    """
+    Stream a plan as NDJSON: one `plan` record with the asset columns, one
+    `allocation` record per user, then a `summary`. Trades smaller than
+    `min_trade` are reported as 0.
+    """
+    yield json.dumps({"type": "plan", "data": {"method": plan.method, "assets": plan.assets}}) + "\n"
+
+    trades = np.where(np.abs(plan.trades) < min_trade, 0.0, plan.trades) if min_trade > 0 else plan.trades
+    percentages = np.round(plan.weights * 100, 2)
+    targets = np.round(plan.targets, 2)
+    trades = np.round(trades, 2)
+    totals = np.round(plan.totals, 2)
+    user_ids = plan.user_ids.tolist()
+
+    for start in range(0, len(user_ids), NDJSON_CHUNK_ROWS):
+        stop = start + NDJSON_CHUNK_ROWS
+        rows = zip(
+            user_ids[start:stop], totals[start:stop].tolist(), percentages[start:stop].tolist(),
+            targets[start:stop].tolist(), trades[start:stop].tolist(),
+        )
+        yield "".join(
+            json.dumps({"type": "allocation", "data": {
+                "user_id": user_id, "total": total, "percentages": pct, "targets": tgt, "trades": trd,
+            }}) + "\n"
+            for user_id, total, pct, tgt, trd in rows
+        )
+
+    yield json.dumps({"type": "summary", "data": {
+        "users": len(user_ids),
+        "total_value": round(float(plan.totals.sum()), 2),
+        "buy": round(float(trades.clip(min=0).sum()), 2),
+        "sell": round(float(-trades.clip(max=0).sum()), 2),
+    }}) + "\n"
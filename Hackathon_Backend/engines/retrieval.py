@@ -0,0 +1,414 @@
+"""
+engines/retrieval.py - Local Vector Retrieval for Advisor Grounding
+
+Fully offline semantic search over the learning-topic catalogue, ingested news
+and per-ticker sentiment summaries:
+
+- text -> hashed unigram/bigram tf-idf features (crc32, no vocabulary)
+- features -> dense embedding via truncated SVD (randomized, fitted offline)
+  or a seeded random projection when the corpus is too small to fit
+- top-k cosine search as one matrix-vector product over a memory-mapped
+  NumPy matrix, plus an in-RAM delta for documents added since the last build
+  (re-ingesting unchanged text is a no-op; replaced delta rows are compacted)
+
+Build an index from the catalogue and a scored news archive (see
+scripts/score_news_archive.py) with:
+
+    python -m engines.retrieval build --news-db news_scores.db --out data/retrieval
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # retrieval is optional; callers get empty results
+    np = None
+
+from core.config import settings
+
+
+N_FEATURES = 2 ** 14
+N_COMPONENTS = 128          # SVD dimensions
+RP_COMPONENTS = 512         # random-projection dimensions (small corpora only)
+MIN_SVD_DOCS = 512          # below this, use a random projection instead of SVD
+MAX_FIT_DOCS = 4000         # sample size for fitting the SVD
+EMBED_BATCH = 4096
+COMPACT_MIN_DEAD = 256      # compact the delta once this many of its rows are replaced...
+COMPACT_DEAD_RATIO = 0.5    # ...and they are at least this share of it
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it its my of on or should "
+    "so than that the their this to was what when which will with you your".split()
+)
+KIND_CODES = {"topic": 0, "news": 1, "ticker": 2}
+
+
+# ─── Featurisation ────────────────────────────────────────────────────────────
+
+def _features(text: str) -> Counter:
+    tokens = [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    counts: Counter = Counter()
+    for g in grams:
+        h = zlib.crc32(g.encode("utf-8"))
+        # Low bits pick the bucket, a high bit picks the sign (reduces collision bias)
+        counts[h % N_FEATURES] += 1.0 if (h >> 31) & 1 else -1.0
+    return counts
+
+
+def _sparse_batch(texts: List[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Flattened (row, col, value) triplets with sublinear tf, rows ascending."""
+    rows, cols, vals = [], [], []
+    for i, text in enumerate(texts):
+        for col, count in _features(text).items():
+            if count:
+                rows.append(i)
+                cols.append(col)
+                vals.append(math.copysign(1.0 + math.log(abs(count)), count))
+    return (
+        np.asarray(rows, dtype=np.int64),
+        np.asarray(cols, dtype=np.int64),
+        np.asarray(vals, dtype=np.float32),
+    )
+
+
+def _normalise_rows(m: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+# ─── Model (idf + projection) ─────────────────────────────────────────────────
+
+class Embedder:
+    def __init__(self, idf: "np.ndarray", components: "np.ndarray", method: str):
+        self.idf = idf.astype(np.float32)
+        self.components = components.astype(np.float32)   # (N_FEATURES, dim)
+        self.method = method
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, texts: List[str], dim: int = N_COMPONENTS, seed: int = 7) -> "Embedder":
+        rng = np.random.default_rng(seed)
+        sample = texts
+        if len(texts) > MAX_FIT_DOCS:
+            sample = [texts[i] for i in rng.choice(len(texts), MAX_FIT_DOCS, replace=False)]
+
+        rows, cols, vals = _sparse_batch(sample)
+        df = np.bincount(cols, minlength=N_FEATURES).astype(np.float32)
+        idf = np.log((1.0 + len(sample)) / (1.0 + df)) + 1.0
+
+        if len(sample) < max(MIN_SVD_DOCS, dim):
+            # Too few documents to learn a basis that new documents will fit:
+            # a Johnson–Lindenstrauss projection preserves cosine similarity
+            components = rng.standard_normal((N_FEATURES, RP_COMPONENTS)).astype(np.float32)
+            return cls(idf, components / math.sqrt(RP_COMPONENTS), "random_projection")
+
+        x = np.zeros((len(sample), N_FEATURES), dtype=np.float32)
+        x[rows, cols] = vals * idf[cols]
+        x = _normalise_rows(x)
+
+        # Randomised truncated SVD (Halko et al.) with two power iterations
+        omega = rng.standard_normal((N_FEATURES, dim + 10)).astype(np.float32)
+        y = x @ omega
+        for _ in range(2):
+            y = x @ (x.T @ y)
+            y, _ = np.linalg.qr(y)
+        q, _ = np.linalg.qr(y)
+        _, _, vt = np.linalg.svd(q.T @ x, full_matrices=False)
+        return cls(idf, vt[:dim].T, "svd")
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """Unit-length embeddings, computed in bounded-memory batches."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), EMBED_BATCH):
+            batch = texts[start:start + EMBED_BATCH]
+            rows, cols, vals = _sparse_batch(batch)
+            if not len(rows):
+                continue
+            weighted = (vals * self.idf[cols])[:, None] * self.components[cols]
+            boundaries = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            out[start + rows[boundaries]] = np.add.reduceat(weighted, boundaries, axis=0)
+        return _normalise_rows(out)
+
+
+# ─── Index ────────────────────────────────────────────────────────────────────
+
+def _text_hash(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class VectorIndex:
+    """
+    Read-only base matrix (memory-mapped from disk) + growable in-RAM delta.
+    Documents are dicts with at least {"id", "kind", "text"}; re-adding an
+    id with new text replaces the previous version, with the same text it is
+    skipped.
+    """
+
+    def __init__(self, embedder: Embedder, base: Optional["np.ndarray"] = None, base_docs: Optional[List[dict]] = None):
+        self.embedder = embedder
+        self.base = base if base is not None else np.zeros((0, embedder.dim), dtype=np.float32)
+        self.docs: List[dict] = list(base_docs or [])
+        self.alive = np.ones(len(self.docs), dtype=bool)
+        self.kinds = self._kind_codes(self.docs)
+        self._delta = np.zeros((256, embedder.dim), dtype=np.float32)
+        self._delta_rows = 0
+        self._positions: Dict[str, int] = {d["id"]: i for i, d in enumerate(self.docs)}
+        self._hashes: Dict[str, int] = {d["id"]: _text_hash(d["text"]) for d in self.docs}
+
+    def __len__(self) -> int:
+        return int(self.alive.sum())
+
+    @staticmethod
+    def _kind_codes(docs: List[dict]) -> "np.ndarray":
+        return np.fromiter((KIND_CODES.get(d["kind"], -1) for d in docs), np.int8, len(docs))
+
+    def add(self, docs: List[dict]) -> None:
+        # Last version per id wins; ids whose text is unchanged need no new row
+        latest = {d["id"]: d for d in docs}
+        docs = [d for d in latest.values() if self._hashes.get(d["id"]) != _text_hash(d["text"])]
+        if not docs:
+            return
+        vectors = self.embedder.embed([d["text"] for d in docs])
+        needed = self._delta_rows + len(docs)
+        if needed > len(self._delta):
+            grown = np.zeros((max(needed, 2 * len(self._delta)), self.embedder.dim), dtype=np.float32)
+            grown[: self._delta_rows] = self._delta[: self._delta_rows]
+            self._delta = grown
+        self._delta[self._delta_rows: needed] = vectors
+        self._delta_rows = needed
+
+        for i, doc in enumerate(docs):
+            old = self._positions.get(doc["id"])
+            if old is not None:
+                self.alive[old] = False
+            self._positions[doc["id"]] = len(self.docs) + i
+            self._hashes[doc["id"]] = _text_hash(doc["text"])
+        self.docs.extend(docs)
+        self.alive = np.concatenate([self.alive, np.ones(len(docs), dtype=bool)])
+        self.kinds = np.concatenate([self.kinds, self._kind_codes(docs)])
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        """Drop replaced delta rows once they dominate it (base rows stay until save())."""
+        n_base = len(self.base)
+        delta_alive = self.alive[n_base:]
+        dead = len(delta_alive) - int(delta_alive.sum())
+        if dead < COMPACT_MIN_DEAD or dead < COMPACT_DEAD_RATIO * self._delta_rows:
+            return
+        keep = np.flatnonzero(delta_alive)
+        self._delta = np.ascontiguousarray(self._delta[keep])
+        self._delta_rows = len(keep)
+        self.docs = self.docs[:n_base] + [self.docs[n_base + i] for i in keep]
+        self.alive = np.concatenate([self.alive[:n_base], np.ones(len(keep), dtype=bool)])
+        self.kinds = np.concatenate([self.kinds[:n_base], self.kinds[n_base:][keep]])
+        for i in range(n_base, len(self.docs)):
+            self._positions[self.docs[i]["id"]] = i
+
+    def search(self, query: str, k: int = 5, kinds: Optional[Iterable[str]] = None) -> List[Tuple[float, dict]]:
+        if not self.docs:
+            return []
+        q = self.embedder.embed([query])[0]
+        scores = np.concatenate([self.base @ q, self._delta[: self._delta_rows] @ q])
+        mask = self.alive
+        if kinds is not None:
+            mask = mask & np.isin(self.kinds, [KIND_CODES.get(k, -1) for k in kinds])
+        scores = np.where(mask, scores, -np.inf)
+        k = min(k, int(mask.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.docs[i]) for i in top]
+
+    # -- persistence --
+
+    def save(self, directory: str) -> None:
+        """Compact (drop replaced rows) and write a memory-mappable index."""
+        os.makedirs(directory, exist_ok=True)
+        matrix = np.concatenate([self.base, self._delta[: self._delta_rows]])[self.alive]
+        docs = [d for d, ok in zip(self.docs, self.alive) if ok]
+        np.save(os.path.join(directory, "vectors.npy"), matrix)
+        np.save(os.path.join(directory, "components.npy"), self.embedder.components)
+        np.save(os.path.join(directory, "idf.npy"), self.embedder.idf)
+        with open(os.path.join(directory, "docs.jsonl"), "w", encoding="utf-8") as f:
+            for d in docs:
+                f.write(json.dumps(d) + "\n")
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"method": self.embedder.method, "dim": self.embedder.dim, "count": len(docs)}, f)
+
+    @classmethod
+    def load(cls, directory: str) -> "VectorIndex":
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        embedder = Embedder(
+            np.load(os.path.join(directory, "idf.npy")),
+            np.load(os.path.join(directory, "components.npy")),
+            meta["method"],
+        )
+        base = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(directory, "docs.jsonl"), encoding="utf-8") as f:
+            docs = [json.loads(line) for line in f]
+        return cls(embedder, base, docs)
+
+
+# ─── Corpus ───────────────────────────────────────────────────────────────────
+
+def catalogue_docs() -> List[dict]:
+    from engines.learning import LEARNING_TOPICS, TOPIC_NOTES
+
+    return [
+        {"id": f"topic:{t['id']}", "kind": "topic", "text": f"{t['title']}. {TOPIC_NOTES.get(t['id'], '')}"}
+        for t in LEARNING_TOPICS
+    ]
+
+
+def news_doc(title: str, summary: Optional[str], url: str, sentiment: str, published_at: str = "") -> dict:
+    text = title if not summary or summary == title else f"{title}. {summary}"
+    return {
+        "id": f"news:{url or title}",
+        "kind": "news",
+        "text": f"{text} (sentiment: {sentiment}{', ' + published_at if published_at else ''})",
+    }
+
+
+def ticker_doc(symbol: str, name: str, sentiment: str, score: float, articles: int) -> dict:
+    return {
+        "id": f"ticker:{symbol}",
+        "kind": "ticker",
+        "text": (
+            f"{name} ({symbol}) recent news sentiment is {sentiment} "
+            f"(decayed score {score:+.2f} across {articles} articles)."
+        ),
+    }
+
+
+def _archive_docs(db_path: str, limit: Optional[int] = None) -> Iterable[dict]:
+    conn = sqlite3.connect(db_path)
+    sql = "SELECT title, summary, url, sentiment, published_at FROM article_scores"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    for title, summary, url, sentiment, published_at in conn.execute(sql):
+        yield news_doc(title or "", summary, url or "", sentiment or "neutral", published_at or "")
+    conn.close()
+
+
+# ─── Shared Index ─────────────────────────────────────────────────────────────
+
+_index: Optional[VectorIndex] = None
+
+
+def get_index() -> Optional[VectorIndex]:
+    """
+    The process-wide index: loaded (memory-mapped) from RETRIEVAL_INDEX_DIR if
+    present, otherwise built in memory from the topic catalogue. Building
+    takes a moment (the random projection alone is 2^14 x 512), so the app
+    warms it in its lifespan with `asyncio.to_thread(get_index)`.
+    """
+    global _index
+    if _index is None and np is not None:
+        directory = settings.RETRIEVAL_INDEX_DIR
+        if directory and os.path.exists(os.path.join(directory, "meta.json")):
+            _index = VectorIndex.load(directory)
+        else:
+            docs = catalogue_docs()
+            _index = VectorIndex(Embedder.fit([d["text"] for d in docs]))
+            _index.add(docs)
+    return _index
+
+
+def index_documents(docs: List[dict]) -> None:
+    index = get_index()
+    if index is not None:
+        index.add(docs)
+
+
+def index_articles(articles: list) -> None:
+    """Ingest scored NewsArticles plus refreshed summaries for the tickers they mention."""
+    if np is None or not articles:
+        return
+    from engines.sentiment_series import get_ticker_sentiment, tag_tickers
+    from engines.tickers import SUPPORTED_TICKERS
+
+    docs = [news_doc(a.title, a.summary, a.url, a.sentiment, a.published_at) for a in articles]
+    mentioned = {sym for a in articles for sym in tag_tickers(f"{a.title} {a.summary or ''}")}
+    for t in SUPPORTED_TICKERS:
+        if t["symbol"] in mentioned:
+            sig = get_ticker_sentiment(t["symbol"])
+            docs.append(ticker_doc(t["symbol"], t["name"], sig.sentiment, sig.decayed_score, sig.article_count))
+    index_documents(docs)
+
+
+def retrieve(query: str, k: Optional[int] = None, kinds: Optional[Iterable[str]] = None) -> List[dict]:
+    """Top-k snippets for a query as [{"score", "kind", "text"}]."""
+    index = get_index()
+    if index is None:
+        return []
+    hits = index.search(query, k or settings.RETRIEVAL_TOP_K, kinds)
+    return [{"score": round(score, 4), "kind": d["kind"], "text": d["text"]} for score, d in hits if score > 0]
+
+
+# ─── CLI ──────────────────────────────────────────────────────────────────────
+
+def build(out: str, news_db: Optional[str] = None, limit: Optional[int] = None) -> VectorIndex:
+    docs = catalogue_docs()
+    if news_db:
+        docs.extend(_archive_docs(news_db, limit))
+    started = time.perf_counter()
+    index = VectorIndex(Embedder.fit([d["text"] for d in docs]))
+    index.add(docs)
+    index.save(out)
+    print(f"Indexed {len(index):,} documents ({index.embedder.method}, dim={index.embedder.dim}) "
+          f"in {time.perf_counter() - started:.1f}s -> {out}")
+    return index
+
+
+def bench(directory: str, queries: int = 200) -> None:
+    index = VectorIndex.load(directory)
+    probe = ["reliance results outlook", "how to manage portfolio risk", "infosys quarterly profit"]
+    started = time.perf_counter()
+    for i in range(queries):
+        index.search(probe[i % len(probe)], k=5)
+    per_query = (time.perf_counter() - started) / queries * 1000
+    print(f"{len(index):,} documents: {per_query:.2f} ms/query (embed + top-5)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if np is None:
+        print("numpy is required for the retrieval index", file=sys.stderr)
+        return 1
+    parser = argparse.ArgumentParser(description="Build or benchmark the advisor retrieval index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("--out", default=settings.RETRIEVAL_INDEX_DIR)
+    b.add_argument("--news-db", help="SQLite output of scripts.score_news_archive")
+    b.add_argument("--limit", type=int)
+    q = sub.add_parser("bench")
+    q.add_argument("--dir", default=settings.RETRIEVAL_INDEX_DIR)
+    q.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build(args.out, args.news_db, args.limit)
+    else:
+        bench(args.dir, args.queries)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
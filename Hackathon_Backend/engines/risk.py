@@ -0,0 +1,279 @@
+"""
+engines/risk.py - Value-at-Risk & Stress Analytics for Portfolios
+
+Downside numbers for any set of portfolios over the same instruments:
+
+- historical VaR / CVaR from overlapping h-day returns
+- parametric (normal) VaR / CVaR from mean and covariance
+- Monte Carlo VaR / CVaR from correlated normal draws
+- scenario shocks: market moves propagated through each asset's beta, with
+  explicit moves for asset classes that don't follow equities, plus replays
+  of historical stress windows when the history covers them
+
+Everything that depends only on the instruments (aligned returns, moments,
+betas, correlated Monte Carlo draws) is built once per universe and day and
+cached; a request is then a few matrix products over all its portfolios.
+Losses are reported as positive percentages of portfolio value.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.cache import TTLCache
+from engines.market_data import HISTORY_TTL, HistoryUnavailable, load_price_matrix
+
+
+MARKET_PROXY = "NIFTYBEES.NS"
+MC_SIMULATIONS = 10_000
+MC_SEED = 20240101            # fixed: the same request gives the same answer all day
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    description: str
+    market: float                         # equity market move, applied through beta
+    overrides: Tuple[Tuple[str, float], ...] = ()   # (symbol, move) for non-equity proxies
+
+
+SCENARIOS: Tuple[Scenario, ...] = (
+    Scenario("equity_crash", "Indian equities fall 20%", -0.20, (
+        ("GOLDBEES.NS", 0.05), ("GILT5YBEES.NS", 0.02), ("LIQUIDBEES.NS", 0.0), ("BTC-USD", -0.35),
+    )),
+    Scenario("rate_hike", "RBI hikes 100bp: bonds reprice, equities de-rate", -0.05, (
+        ("GILT5YBEES.NS", -0.04), ("GOLDBEES.NS", -0.02), ("LIQUIDBEES.NS", 0.0), ("BTC-USD", -0.10),
+    )),
+    Scenario("inr_depreciation", "Rupee weakens 10% against the dollar", -0.03, (
+        ("MON100.NS", 0.10), ("BTC-USD", 0.10), ("GOLDBEES.NS", 0.08), ("GILT5YBEES.NS", -0.01),
+        ("LIQUIDBEES.NS", 0.0),
+    )),
+    Scenario("crypto_winter", "Crypto falls 60%, little spill-over", -0.02, (
+        ("BTC-USD", -0.60), ("ETH-USD", -0.70), ("LIQUIDBEES.NS", 0.0),
+    )),
+)
+
+# Historical replays: realised moves between two dates, if the history covers them
+HISTORICAL_WINDOWS = {
+    "covid_crash_2020": ("2020-02-19", "2020-03-23"),
+    "rate_shock_2022": ("2022-01-03", "2022-06-17"),
+}
+
+
+# ─── Risk Model (per universe and day) ────────────────────────────────────────
+
+@dataclass(frozen=True)
+class RiskModel:
+    symbols: Tuple[str, ...]
+    days: np.ndarray            # (T,) calendar day numbers
+    prices: np.ndarray          # (T, n)
+    returns: np.ndarray         # (T-1, n) simple daily returns
+    mu: np.ndarray              # (n,) daily mean
+    cov: np.ndarray             # (n, n) daily covariance
+    betas: np.ndarray           # (n,) to MARKET_PROXY (1.0 if it isn't available)
+    shocks: np.ndarray          # (MC_SIMULATIONS, n) zero-mean correlated daily draws
+
+    def horizon_returns(self, horizon: int) -> np.ndarray:
+        """Overlapping h-day simple returns (T-h, n)."""
+        if horizon == 1:
+            return self.returns
+        return self.prices[horizon:] / self.prices[:-horizon] - 1
+
+
+def _market_betas(returns: np.ndarray, market: Optional[np.ndarray]) -> np.ndarray:
+    if market is None:
+        return np.ones(returns.shape[1])
+    centred = market - market.mean()
+    variance = centred @ centred
+    if variance <= 0:
+        return np.ones(returns.shape[1])
+    return ((returns - returns.mean(axis=0)).T @ centred) / variance
+
+
+def build_risk_model(symbols: Sequence[str], days: np.ndarray, prices: np.ndarray,
+                     market: Optional[np.ndarray] = None) -> RiskModel:
+    returns = prices[1:] / prices[:-1] - 1
+    mu = returns.mean(axis=0)
+    cov = np.cov(returns, rowvar=False).reshape(len(symbols), len(symbols))
+
+    # Symmetric square root via eigh: unlike Cholesky it copes with singular
+    # covariances (flat prices, duplicated instruments)
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    root = eigenvectors * np.sqrt(eigenvalues.clip(min=0))
+    z = np.random.default_rng(MC_SEED).standard_normal((MC_SIMULATIONS, len(symbols)))
+
+    return RiskModel(
+        symbols=tuple(symbols),
+        days=days,
+        prices=prices,
+        returns=returns,
+        mu=mu,
+        cov=cov,
+        betas=_market_betas(returns, market),
+        shocks=z @ root.T,
+    )
+
+
+_models = TTLCache("risk_models", ttl=HISTORY_TTL, max_entries=64)
+
+
+async def _load_model(symbols: Tuple[str, ...], history: str) -> RiskModel:
+    with_market = symbols if MARKET_PROXY in symbols else symbols + (MARKET_PROXY,)
+    try:
+        days, prices = await load_price_matrix(with_market, range_=history)
+    except HistoryUnavailable:
+        if with_market == symbols:
+            raise
+        # Betas fall back to 1.0 without the market proxy
+        days, prices = await load_price_matrix(symbols, range_=history)
+        with_market = symbols
+    market_column = with_market.index(MARKET_PROXY) if MARKET_PROXY in with_market else None
+    market = None
+    if market_column is not None:
+        market = prices[1:, market_column] / prices[:-1, market_column] - 1
+    return await asyncio.to_thread(build_risk_model, symbols, days, prices[:, :len(symbols)], market)
+
+
+async def get_risk_model(symbols: Sequence[str], history: str = "5y") -> RiskModel:
+    """Risk model for the universe, cached for the day. Raises HistoryUnavailable."""
+    symbols = tuple(symbols)
+    return await _models.get_or_set(
+        (symbols, history, date.today().isoformat()),
+        lambda: _load_model(symbols, history),
+    )
+
+
+# ─── Measures (vectorised over portfolios) ────────────────────────────────────
+
+def tail_measures(pnl: np.ndarray, confidence: float) -> Tuple[np.ndarray, np.ndarray]:
+    """VaR and CVaR (positive = loss) of P&L samples (samples, portfolios)."""
+    cutoff = np.quantile(pnl, 1 - confidence, axis=0)
+    tail = pnl <= cutoff
+    cvar = (pnl * tail).sum(axis=0) / np.maximum(tail.sum(axis=0), 1)
+    return -cutoff, -cvar
+
+
+def historical_var(model: RiskModel, weights: np.ndarray, confidence: float, horizon: int):
+    return tail_measures(model.horizon_returns(horizon) @ weights.T, confidence)
+
+
+def parametric_var(model: RiskModel, weights: np.ndarray, confidence: float, horizon: int):
+    mean = weights @ model.mu * horizon
+    sd = np.sqrt(np.einsum("pi,ij,pj->p", weights, model.cov, weights).clip(min=0) * horizon)
+    z = NormalDist().inv_cdf(confidence)
+    density = np.exp(-z * z / 2) / np.sqrt(2 * np.pi)
+    return sd * z - mean, sd * density / (1 - confidence) - mean
+
+
+def monte_carlo_var(model: RiskModel, weights: np.ndarray, confidence: float, horizon: int):
+    pnl = (model.shocks @ weights.T) * np.sqrt(horizon) + weights @ model.mu * horizon
+    return tail_measures(pnl, confidence)
+
+
+def scenario_moves(model: RiskModel, scenarios: Sequence[Scenario]) -> np.ndarray:
+    """Per-asset moves (s, n): beta x market move, overridden where specified."""
+    moves = np.outer([s.market for s in scenarios], model.betas)
+    column = {sym: j for j, sym in enumerate(model.symbols)}
+    for i, scenario in enumerate(scenarios):
+        for symbol, move in scenario.overrides:
+            if symbol in column:
+                moves[i, column[symbol]] = move
+    return moves
+
+
+def historical_moves(model: RiskModel) -> Dict[str, np.ndarray]:
+    moves = {}
+    for name, (start, end) in HISTORICAL_WINDOWS.items():
+        first, last = (date.fromisoformat(d).toordinal() - date(1970, 1, 1).toordinal() for d in (start, end))
+        if model.days[0] > first or model.days[-1] < last:
+            continue
+        i, j = np.searchsorted(model.days, first), np.searchsorted(model.days, last, side="right") - 1
+        moves[name] = model.prices[j] / model.prices[i] - 1
+    return moves
+
+
+def evaluate(model: RiskModel, weights: np.ndarray, confidence: float = 0.95, horizon: int = 1,
+             scenarios: Optional[Sequence[str]] = None) -> dict:
+    """
+    All measures for weight rows (p, n). Returns arrays keyed by measure,
+    each of shape (p,), plus {"scenarios": {name: (p,)}}.
+    """
+    results = {}
+    for prefix, measure in (("historical", historical_var), ("parametric", parametric_var),
+                            ("monte_carlo", monte_carlo_var)):
+        var, cvar = measure(model, weights, confidence, horizon)
+        results[f"{prefix}_var"], results[f"{prefix}_cvar"] = var, cvar
+
+    chosen = [s for s in SCENARIOS if scenarios is None or s.name in scenarios]
+    stress = {}
+    if chosen:
+        pnl = scenario_moves(model, chosen) @ weights.T
+        stress.update({s.name: pnl[i] for i, s in enumerate(chosen)})
+    for name, move in historical_moves(model).items():
+        if scenarios is None or name in scenarios:
+            stress[name] = move @ weights.T
+    results["scenarios"] = stress
+    return results
+
+
+# ─── Requests ─────────────────────────────────────────────────────────────────
+
+def resolve_symbols(assets: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Map asset names to instruments: allocation asset classes go to their proxy
+    ETF, anything else is treated as a ticker. Returns the unique symbols and
+    an (assets x symbols) matrix that folds duplicate proxies together.
+    """
+    from engines.backtest import TEMPLATE_PROXIES
+    from engines.market import normalise_quote_symbol
+    from engines.optimizer import OPTIMIZER_UNIVERSE
+
+    proxies = {**TEMPLATE_PROXIES, **{a.name: a.symbol for a in OPTIMIZER_UNIVERSE}}
+    resolved = [proxies.get(a) or normalise_quote_symbol(a) for a in assets]
+    symbols = list(dict.fromkeys(resolved))
+    fold = np.zeros((len(assets), len(symbols)))
+    fold[np.arange(len(assets)), [symbols.index(s) for s in resolved]] = 1.0
+    return symbols, fold
+
+
+async def analyse_portfolios(
+    assets: Sequence[str],
+    holdings: Sequence[Sequence[float]],
+    confidence: float = 0.95,
+    horizon: int = 1,
+    history: str = "5y",
+    scenarios: Optional[Sequence[str]] = None,
+) -> dict:
+    """Risk report for each holdings row (values per asset). Raises HistoryUnavailable."""
+    symbols, fold = resolve_symbols(assets)
+    model = await get_risk_model(symbols, history)
+
+    values = np.asarray(holdings, dtype=np.float64) @ fold          # (p, n) per instrument
+    totals = values.sum(axis=1)
+    weights = values / np.where(totals == 0, 1.0, totals)[:, None]
+    measures = evaluate(model, weights, confidence, horizon, scenarios)
+
+    def pct(x):
+        return np.round(x * 100, 3).tolist()
+
+    stress = {name: pct(pnl) for name, pnl in measures.pop("scenarios").items()}
+    report = {key: pct(value) for key, value in measures.items()}
+    portfolios = [
+        {
+            "value": round(float(totals[i]), 2),
+            **{key: column[i] for key, column in report.items()},
+            "scenarios": {name: column[i] for name, column in stress.items()},
+        }
+        for i in range(len(totals))
+    ]
+    return {
+        "symbols": symbols,
+        "observations": int(len(model.returns)),
+        "confidence": confidence,
+        "horizon_days": horizon,
+        "portfolios": portfolios,
+    }
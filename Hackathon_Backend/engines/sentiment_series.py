@@ -0,0 +1,183 @@
+"""
+engines/sentiment_series.py - Per-Ticker Rolling Sentiment Time Series
+"""
+
+import math
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from engines.tickers import SUPPORTED_TICKERS, TICKER_ALIASES
+from models.schemas import NewsArticle, SentimentBucket, TickerSentimentResponse
+
+
+# ─── Config ───────────────────────────────────────────────────────────────────
+
+RESOLUTIONS = {"hourly": 3600, "daily": 86400}
+RETENTION = {"hourly": 7 * 24, "daily": 90}   # buckets kept per resolution
+HALF_LIFE_SECONDS = 6 * 3600                  # decay of the rolling score
+MAX_SEEN_ARTICLES = 10_000                    # dedup window
+
+
+def _build_patterns() -> Dict[str, re.Pattern]:
+    patterns = {}
+    for t in SUPPORTED_TICKERS:
+        phrases = {t["symbol"].lower(), t["name"].lower(), *TICKER_ALIASES.get(t["symbol"], [])}
+        alternation = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+        patterns[t["symbol"]] = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+    return patterns
+
+
+_PATTERNS = _build_patterns()
+
+
+def tag_tickers(text: str) -> List[str]:
+    """Return catalogue symbols mentioned in a headline/snippet."""
+    return [symbol for symbol, pattern in _PATTERNS.items() if pattern.search(text)]
+
+
+def _parse_timestamp(value: str) -> float:
+    """Parse NewsData/NewsAPI timestamps; fall back to now."""
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    except (AttributeError, ValueError):
+        return datetime.now(timezone.utc).timestamp()
+
+
+# ─── Series ───────────────────────────────────────────────────────────────────
+
+class SentimentSeries:
+    """
+    Incrementally aggregated sentiment for one ticker.
+    Buckets hold [count, sum]; the decayed score is an exponentially weighted
+    mean with a fixed half-life, updated in O(1) per article.
+    """
+
+    def __init__(self, half_life: float = HALF_LIFE_SECONDS):
+        self.half_life = half_life
+        self.buckets: Dict[str, Dict[int, List[float]]] = {r: {} for r in RESOLUTIONS}
+        self.total = 0
+        self._decayed_sum = 0.0
+        self._decayed_weight = 0.0
+        self._last_ts: Optional[float] = None
+        self.updated_at: Optional[datetime] = None
+
+    def _decay(self, dt: float) -> float:
+        return math.pow(0.5, dt / self.half_life)
+
+    def add(self, score: float, ts: float) -> None:
+        for resolution, width in RESOLUTIONS.items():
+            buckets = self.buckets[resolution]
+            start = int(ts // width * width)
+            bucket = buckets.setdefault(start, [0, 0.0])
+            bucket[0] += 1
+            bucket[1] += score
+            if len(buckets) > RETENTION[resolution]:
+                del buckets[min(buckets)]
+
+        if self._last_ts is None or ts >= self._last_ts:
+            factor = self._decay(ts - self._last_ts) if self._last_ts is not None else 0.0
+            self._decayed_sum = self._decayed_sum * factor + score
+            self._decayed_weight = self._decayed_weight * factor + 1.0
+            self._last_ts = ts
+        else:
+            # Late (older) article: weight it by its age relative to the latest one
+            weight = self._decay(self._last_ts - ts)
+            self._decayed_sum += score * weight
+            self._decayed_weight += weight
+
+        self.total += 1
+        self.updated_at = datetime.utcnow()
+
+    @property
+    def decayed_score(self) -> float:
+        return self._decayed_sum / self._decayed_weight if self._decayed_weight else 0.0
+
+    def strength(self, now: float) -> float:
+        """Decayed article count as of `now` — how fresh the signal is."""
+        if self._last_ts is None:
+            return 0.0
+        return self._decayed_weight * self._decay(max(0.0, now - self._last_ts))
+
+    def bucket_view(self, resolution: str, limit: int) -> List[SentimentBucket]:
+        width = RESOLUTIONS[resolution]
+        out: List[SentimentBucket] = []
+        ewma_sum = ewma_weight = 0.0
+        prev_start = None
+        for start in sorted(self.buckets[resolution]):
+            count, total = self.buckets[resolution][start]
+            factor = self._decay(start - prev_start) if prev_start is not None else 0.0
+            ewma_sum = ewma_sum * factor + total
+            ewma_weight = ewma_weight * factor + count
+            prev_start = start
+            out.append(
+                SentimentBucket(
+                    start=datetime.fromtimestamp(start, tz=timezone.utc),
+                    end=datetime.fromtimestamp(start + width, tz=timezone.utc),
+                    count=int(count),
+                    mean=round(total / count, 4),
+                    decayed_score=round(ewma_sum / ewma_weight, 4),
+                )
+            )
+        return out[-limit:]
+
+
+# ─── Store ────────────────────────────────────────────────────────────────────
+
+_SERIES: Dict[str, SentimentSeries] = {}
+_SEEN: "OrderedDict[str, None]" = OrderedDict()
+
+
+def record_articles(articles: List[NewsArticle]) -> int:
+    """
+    Tag scored articles to tickers and fold them into the per-ticker series.
+    Articles already seen (same url/title) are skipped. Returns the number of
+    (article, ticker) observations added.
+    """
+    added = 0
+    for article in articles:
+        key = article.url or article.title
+        if not key or key in _SEEN:
+            continue
+        _SEEN[key] = None
+        if len(_SEEN) > MAX_SEEN_ARTICLES:
+            _SEEN.popitem(last=False)
+
+        ts = _parse_timestamp(article.published_at)
+        for symbol in tag_tickers(f"{article.title} {article.summary or ''}"):
+            _SERIES.setdefault(symbol, SentimentSeries()).add(article.sentiment_score, ts)
+            added += 1
+    return added
+
+
+def _label(score: float) -> str:
+    if score > 0.1:
+        return "positive"
+    if score < -0.1:
+        return "negative"
+    return "neutral"
+
+
+def get_ticker_sentiment(symbol: str, resolution: str = "hourly", limit: int = 48) -> TickerSentimentResponse:
+    """Read the precomputed sentiment series for a catalogue symbol."""
+    series = _SERIES.get(symbol)
+    now = datetime.now(timezone.utc).timestamp()
+    if series is None:
+        return TickerSentimentResponse(
+            ticker=symbol, resolution=resolution, article_count=0,
+            decayed_score=0.0, signal_strength=0.0, sentiment="neutral", buckets=[],
+        )
+    return TickerSentimentResponse(
+        ticker=symbol,
+        resolution=resolution,
+        article_count=series.total,
+        decayed_score=round(series.decayed_score, 4),
+        signal_strength=round(series.strength(now), 4),
+        sentiment=_label(series.decayed_score),
+        buckets=series.bucket_view(resolution, limit),
+        updated_at=series.updated_at,
+    )
@@ -0,0 +1,34 @@
+"""
+engines/tickers.py - Supported Ticker Catalogue
+"""
+
+from typing import Dict, List, Optional
+
+
+SUPPORTED_TICKERS = [
+    {"symbol": "RELIANCE",   "yf_ticker": "RELIANCE.NS", "name": "Reliance Industries"},
+    {"symbol": "TCS",        "yf_ticker": "TCS.NS",       "name": "Tata Consultancy"},
+    {"symbol": "INFY",       "yf_ticker": "INFY.NS",      "name": "Infosys"},
+    {"symbol": "HDFC",       "yf_ticker": "HDFCBANK.NS",  "name": "HDFC Bank"},
+    {"symbol": "WIPRO",      "yf_ticker": "WIPRO.NS",     "name": "Wipro"},
+    {"symbol": "TATAMOTORS", "yf_ticker": "TATAMOTORS.NS","name": "Tata Motors"},
+]
+
+# Extra phrases that identify a ticker in headlines (lower-case)
+TICKER_ALIASES: Dict[str, List[str]] = {
+    "RELIANCE":   ["reliance", "ril", "jio"],
+    "TCS":        ["tcs", "tata consultancy"],
+    "INFY":       ["infosys", "infy"],
+    "HDFC":       ["hdfc"],
+    "WIPRO":      ["wipro"],
+    "TATAMOTORS": ["tata motors", "tatamotors", "jaguar land rover"],
+}
+
+
+def normalise_symbol(ticker: str) -> Optional[str]:
+    """Map 'RELIANCE', 'reliance.ns' or 'HDFCBANK.NS' to a catalogue symbol."""
+    upper = ticker.strip().upper()
+    for t in SUPPORTED_TICKERS:
+        if upper in (t["symbol"], t["yf_ticker"], t["yf_ticker"].split(".")[0]):
+            return t["symbol"]
+    return None
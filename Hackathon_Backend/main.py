@@ -2,14 +2,26 @@
 MindVest Backend - Entry Point & FastAPI Configuration
 """
 
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-import os
 
 from routers import auth, learning, investment, prediction, news, advisor, market
-from models.database import engine, Base
+from core import http_client
+from core.security import hashing_pool
+from core.static_assets import static_assets
+from core.conditional import ConditionalGetMiddleware
+from core import metrics
+from core import resilience
+from core.config import settings
+from services import llm
+from services.persistence import recorder
+from engines import retrieval
+from engines.backtest import pool as backtest_pool
+from models.database import engine, Base, dispose_engines
 
 # ── Create Database Tables ──────────────────────────────────────────────────
 # Import models to register them with Base metadata
@@ -22,11 +34,32 @@ if engine is not None:
     except Exception as e:
         print(f"⚠️ Database table creation skipped: {e}")
 
+# ── Lifespan ────────────────────────────────────────────────────────────────
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_client.startup()
+    await hashing_pool.start()
+    await recorder.start()
+    await asyncio.to_thread(static_assets.load)
+    await asyncio.to_thread(retrieval.get_index)
+    if settings.METRICS_ENABLED:
+        metrics.lag_monitor.start(settings.METRICS_LOOP_LAG_INTERVAL)
+    yield
+    await metrics.lag_monitor.stop()
+    await recorder.stop()
+    hashing_pool.shutdown()
+    backtest_pool.shutdown()
+    await llm.gateway.shutdown()
+    await http_client.shutdown()
+    await dispose_engines()
+
+
 # ── FastAPI App ─────────────────────────────────────────────────────────────
 app = FastAPI(
     title="MindVest API",
     description="AI-powered financial advisor backend",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ── CORS Middleware ─────────────────────────────────────────────────────────
@@ -39,6 +72,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ── Conditional GET ─────────────────────────────────────────────────────────
+# ETags + 304s for the rarely-changing JSON endpoints (see core/conditional.py)
+app.add_middleware(ConditionalGetMiddleware)
+
+# ── Metrics ─────────────────────────────────────────────────────────────────
+# Outermost, so latency includes every other middleware (and 304s are counted)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.register_executors([
+        ("hashing", lambda: hashing_pool.pending),
+        ("backtest", lambda: backtest_pool.pending),
+        ("persistence", lambda: recorder.pending),
+        ("llm", lambda: llm.gateway.metrics()["queue_depth"]),
+        ("threads", metrics.thread_pool_queue_depth),
+    ])
+
 # ── Routers ─────────────────────────────────────────────────────────────────
 app.include_router(auth.router)
 app.include_router(learning.router)
@@ -53,26 +102,56 @@ app.include_router(market.router)
 async def health_check():
     return {"status": "ok", "version": "1.0.0"}
 
+
+@app.get("/health/http")
+async def http_pool_stats():
+    """Connection pool usage and request counters per upstream."""
+    return http_client.pool_stats()
+
+
+@app.get("/health/llm")
+async def llm_gateway_stats():
+    """Per-model latency, quota and queue metrics for the LLM gateway."""
+    return llm.gateway.metrics()
+
+
+@app.get("/health/hashing")
+async def hashing_pool_stats():
+    """Password hashing pool occupancy and admission-control counters."""
+    return hashing_pool.stats()
+
+
+@app.get("/health/persistence")
+async def persistence_stats():
+    """Write-behind queue depth and flush counters."""
+    return recorder.stats()
+
+
+@app.get("/health/static")
+async def static_asset_stats():
+    """Served frontend assets: fingerprinted URL, ETag and size per encoding."""
+    return static_assets.stats()
+
+
+@app.get("/health/upstreams")
+async def upstream_resilience_stats():
+    """Circuit breaker state, hedge counts and serve-stale caches per upstream."""
+    return resilience.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (per worker process)."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404)
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 # ── Static Files (Frontend) ────────────────────────────────────────────────
-# Serve frontend HTML
-@app.get("/")
-async def serve_index():
-    return FileResponse("index.html")
-
-# Serve CSS
-@app.get("/style.css")
-async def serve_css():
-    return FileResponse("style.css")
-
-# Serve JS files
-@app.get("/api.js")
-async def serve_api_js():
-    return FileResponse("api.js")
-
-@app.get("/app.js")
-async def serve_app_js():
-    return FileResponse("app.js")
-
-@app.get("/trading-bg.js")
-async def serve_trading_bg_js():
-    return FileResponse("trading-bg.js")
+# Precompressed in memory; index.html references fingerprinted, immutable URLs
+async def serve_static(request: Request):
+    return static_assets.response(request)
+
+app.add_api_route("/", serve_static, methods=["GET", "HEAD"], include_in_schema=False)
+for _name in static_assets.files:
+    app.add_api_route(f"/{_name}", serve_static, methods=["GET", "HEAD"], include_in_schema=False)
+app.add_api_route("/assets/{filename}", serve_static, methods=["GET", "HEAD"], include_in_schema=False)
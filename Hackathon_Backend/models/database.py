@@ -8,18 +8,77 @@ from sqlalchemy.ext.declarative import declarative_base
 # --- SQLAlchemy (optional; only initialised if DATABASE_URL is set) ---
 engine = None
 SessionLocal = None
+async_engine = None
+AsyncSessionLocal = None
 Base = declarative_base()  # Always create Base, even if DB not configured
 
+
+def _pool_kwargs(url) -> dict:
+    """Pool sizing for server databases; SQLite keeps SQLAlchemy's own pool choice."""
+    if url.get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def async_url(database_url: str):
+    """
+    Map a sync DATABASE_URL onto its async driver:
+    postgresql:// -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://.
+    Returns (url, connect_args), or (None, {}) for unsupported backends.
+    """
+    from sqlalchemy.engine import make_url
+
+    url = make_url(database_url.replace("postgres://", "postgresql://", 1))
+    connect_args = {}
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        query = dict(url.query)
+        # asyncpg takes `ssl`, not libpq's `sslmode`
+        sslmode = query.pop("sslmode", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+        if url.port == 6543:
+            # Supabase pooler runs pgbouncer in transaction mode: no prepared statement cache
+            connect_args["statement_cache_size"] = 0
+        return url.set(drivername="postgresql+asyncpg", query=query), connect_args
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite"), connect_args
+    return None, connect_args
+
+
 if settings.DATABASE_URL:
     try:
         from sqlalchemy import create_engine
+        from sqlalchemy.engine import make_url
         from sqlalchemy.orm import sessionmaker
 
-        engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+        engine = create_engine(
+            settings.DATABASE_URL, pool_pre_ping=True, **_pool_kwargs(make_url(settings.DATABASE_URL))
+        )
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     except Exception as e:
         print(f"[DB] SQLAlchemy init skipped: {e}")
 
+    if settings.DB_ASYNC:
+        try:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            url, connect_args = async_url(settings.DATABASE_URL)
+            if url is not None:
+                async_engine = create_async_engine(
+                    url, pool_pre_ping=True, connect_args=connect_args, **_pool_kwargs(url)
+                )
+                AsyncSessionLocal = async_sessionmaker(
+                    async_engine, autoflush=False, expire_on_commit=False
+                )
+        except Exception as e:
+            print(f"[DB] Async engine init skipped: {e}")
+
 
 def get_db():
     """Dependency: yields a DB session (no-op if DB not configured)."""
@@ -33,6 +92,23 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency: yields an AsyncSession (None if the async engine isn't configured)."""
+    if AsyncSessionLocal is None:
+        yield None
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections on shutdown."""
+    if async_engine is not None:
+        await async_engine.dispose()
+    if engine is not None:
+        engine.dispose()
+
+
 # --- Supabase Client (optional) ---
 supabase = None
 
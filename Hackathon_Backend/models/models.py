@@ -5,16 +5,17 @@ models/models.py - SQLAlchemy Database Models
 from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON
 from sqlalchemy.sql import func
 from models.database import Base
+from models.packed import PackedAllocations, PackedForecast
 
 
 class User(Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String(255), unique=True, index=True, nullable=False)
+    email = Column(String(255), unique=True, index=True, nullable=True)  # NULL for wallet-only users
     full_name = Column(String(255), nullable=True)
     hashed_password = Column(String(255), nullable=True)
-    wallet_address = Column(String(255), nullable=True)
+    wallet_address = Column(String(255), unique=True, index=True, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -23,11 +24,19 @@ class User(Base):
     risk_profile = Column(String(50), nullable=True)  # conservative, moderate, aggressive
 
 
+class UsedNonce(Base):
+    """Consumed wallet-login nonces; the primary key makes a replay's insert fail."""
+    __tablename__ = "used_nonces"
+
+    nonce = Column(String(128), primary_key=True)
+    expires_at = Column(Integer, nullable=False, index=True)  # unix seconds; purged once past
+
+
 class QuizResult(Base):
     __tablename__ = "quiz_results"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # NULL for anonymous callers
     answers = Column(JSON, nullable=False)  # Store answers as JSON
     risk_score = Column(Float, nullable=False)
     risk_profile = Column(String(50), nullable=False)
@@ -38,10 +47,10 @@ class Portfolio(Base):
     __tablename__ = "portfolios"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # NULL for anonymous callers
     investment_amount = Column(Float, nullable=False)
     risk_profile = Column(String(50), nullable=False)
-    allocations = Column(JSON, nullable=False)  # Store allocations as JSON
+    allocations = Column(PackedAllocations, nullable=False)  # packed percentage/amount arrays
     rationale = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -53,7 +62,7 @@ class Prediction(Base):
     ticker = Column(String(20), nullable=False)
     days = Column(Integer, nullable=False)
     model_used = Column(String(50), nullable=False)
-    predictions = Column(JSON, nullable=False)  # Store prediction data as JSON
+    predictions = Column(PackedForecast, nullable=False)  # packed float64 series + start date/step
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -61,7 +70,7 @@ class AdvisorQuery(Base):
     __tablename__ = "advisor_queries"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # NULL for anonymous callers
     query = Column(Text, nullable=False)
     advice = Column(Text, nullable=False)
     sources = Column(JSON, nullable=True)
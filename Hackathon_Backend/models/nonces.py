@@ -0,0 +1,102 @@
+"""
+models/nonces.py - Shared Ledger of Consumed Wallet-Login Nonces
+
+A nonce is claimed by inserting it into `used_nonces`; the primary key
+makes the insert of a replayed nonce fail, so single use holds across every
+worker and node sharing the database. Expired rows are purged now and then
+by whichever worker is claiming.
+
+Without DATABASE_URL the ledger falls back to an in-process dict, which is
+only correct for a single worker.
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+from models import database
+
+
+PURGE_INTERVAL = 60          # seconds between deletes of expired rows (per worker)
+MAX_IN_MEMORY_NONCES = 100_000
+
+
+# ─── SQL Ledger ───────────────────────────────────────────────────────────────
+
+class SqlNonceLedger:
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._last_purge = 0.0
+
+    def _purge_due(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return False
+        self._last_purge = now
+        return True
+
+    def _insert(self, nonce: str, expires_at: int, purge: bool) -> bool:
+        from sqlalchemy import delete
+        from sqlalchemy.exc import IntegrityError
+        from models.models import UsedNonce
+
+        with self._session_factory() as db:
+            if purge:
+                db.execute(delete(UsedNonce).where(UsedNonce.expires_at < int(time.time())))
+            db.add(UsedNonce(nonce=nonce, expires_at=expires_at))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return False
+            return True
+
+    async def claim(self, nonce: str, expires_at: int) -> bool:
+        """Mark `nonce` used. False if it already was (by any worker)."""
+        return await asyncio.to_thread(self._insert, nonce, expires_at, self._purge_due())
+
+
+class AsyncSqlNonceLedger(SqlNonceLedger):
+    """Same ledger over the async engine."""
+
+    async def claim(self, nonce: str, expires_at: int) -> bool:
+        from sqlalchemy import delete
+        from sqlalchemy.exc import IntegrityError
+        from models.models import UsedNonce
+
+        async with self._session_factory() as db:
+            if self._purge_due():
+                await db.execute(delete(UsedNonce).where(UsedNonce.expires_at < int(time.time())))
+            db.add(UsedNonce(nonce=nonce, expires_at=expires_at))
+            try:
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                return False
+            return True
+
+
+# ─── In-Process Fallback ──────────────────────────────────────────────────────
+
+class InMemoryNonceLedger:
+    """Single-worker fallback used when no database is configured."""
+
+    def __init__(self):
+        self._consumed: Dict[str, int] = {}
+
+    async def claim(self, nonce: str, expires_at: int) -> bool:
+        if nonce in self._consumed:
+            return False
+        self._consumed[nonce] = expires_at
+        if len(self._consumed) > MAX_IN_MEMORY_NONCES:
+            now = int(time.time())
+            self._consumed = {n: exp for n, exp in self._consumed.items() if exp >= now}
+        return True
+
+
+def build_ledger():
+    if database.AsyncSessionLocal is not None:
+        return AsyncSqlNonceLedger(database.AsyncSessionLocal)
+    if database.SessionLocal is not None:
+        return SqlNonceLedger(database.SessionLocal)
+    return InMemoryNonceLedger()
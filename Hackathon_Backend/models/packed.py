@@ -0,0 +1,201 @@
+"""
+models/packed.py - Packed Binary Column Types for Forecasts & Allocations
+
+`Prediction.predictions` and `Portfolio.allocations` used to be JSON: a
+365-day forecast was 365 objects repeating four keys and a date string.
+These column types store the same data as a small header plus contiguous
+little-endian float64 arrays, and decode straight back to the pydantic
+schemas (`PredictionPoint`, `AssetAllocation`).
+
+Forecast layout (v1):
+    header  <BBHIi  version, flags, step_days, count, start date ordinal
+    [int32 * count] date ordinals, only if the dates aren't evenly spaced
+    [f64 * count]   predicted_price
+    [f64 * count]   lower_bound, upper_bound (only if FLAG_BOUNDS; NaN = None)
+
+Allocation layout (v1):
+    header  <BI     version, count
+    [f64 * count]   percentage, amount
+    utf-8 asset names joined by \\x1f
+
+Legacy JSON values (rows written before the column type changed) are still
+decoded.
+"""
+
+import json
+import struct
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Iterable, List, Optional
+
+import numpy as np
+from pydantic import TypeAdapter
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from models.schemas import AssetAllocation, PredictionPoint
+
+
+VERSION = 1
+FLAG_BOUNDS = 0x01
+FLAG_IRREGULAR = 0x02
+
+_FORECAST_HEADER = struct.Struct("<BBHIi")
+_ALLOCATION_HEADER = struct.Struct("<BI")
+_NAME_SEP = "\x1f"
+_ORDINAL_EPOCH = np.datetime64("0001-01-01", "D")     # date ordinal 1
+
+_forecast_adapter = TypeAdapter(List[PredictionPoint])
+
+
+def _field(item, name):
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+def _optional(values: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in values.tolist()]   # NaN -> None
+
+
+# ─── Forecasts ────────────────────────────────────────────────────────────────
+
+def pack_forecast(points: Iterable) -> bytes:
+    points = list(points)
+    ordinals = np.array([date.fromisoformat(str(_field(p, "date"))[:10]).toordinal() for p in points], dtype="<i4")
+    prices = np.array([_field(p, "predicted_price") for p in points], dtype="<f8")
+    lower = np.array([_field(p, "lower_bound") for p in points], dtype="<f8")   # None -> NaN
+    upper = np.array([_field(p, "upper_bound") for p in points], dtype="<f8")
+
+    flags = 0
+    step = 1
+    if len(ordinals) > 1:
+        steps = np.diff(ordinals)
+        step = int(steps[0])
+        if step <= 0 or step > 0xFFFF or not (steps == step).all():
+            flags |= FLAG_IRREGULAR
+            step = 0
+    if not (np.isnan(lower).all() and np.isnan(upper).all()):
+        flags |= FLAG_BOUNDS
+
+    start = int(ordinals[0]) if len(ordinals) else 0
+    parts = [_FORECAST_HEADER.pack(VERSION, flags, step, len(points), start)]
+    if flags & FLAG_IRREGULAR:
+        parts.append(ordinals.tobytes())
+    parts.append(prices.tobytes())
+    if flags & FLAG_BOUNDS:
+        parts += [lower.tobytes(), upper.tobytes()]
+    return b"".join(parts)
+
+
+def unpack_forecast_arrays(blob: bytes):
+    """Decode to (date ordinals, price, lower, upper) numpy arrays without building objects."""
+    version, flags, step, count, start = _FORECAST_HEADER.unpack_from(blob)
+    if version != VERSION:
+        raise ValueError(f"Unsupported packed forecast version {version}")
+    offset = _FORECAST_HEADER.size
+    if flags & FLAG_IRREGULAR:
+        ordinals = np.frombuffer(blob, dtype="<i4", count=count, offset=offset)
+        offset += 4 * count
+    else:
+        ordinals = start + step * np.arange(count, dtype=np.int64)
+    prices = np.frombuffer(blob, dtype="<f8", count=count, offset=offset)
+    offset += 8 * count
+    if flags & FLAG_BOUNDS:
+        lower = np.frombuffer(blob, dtype="<f8", count=count, offset=offset)
+        upper = np.frombuffer(blob, dtype="<f8", count=count, offset=offset + 8 * count)
+    else:
+        lower = upper = np.full(count, np.nan)
+    return ordinals, prices, lower, upper
+
+
+def unpack_forecast(blob: bytes) -> List[PredictionPoint]:
+    ordinals, prices, lower, upper = unpack_forecast_arrays(blob)
+    dates = (_ORDINAL_EPOCH + (ordinals - 1)).astype(str).tolist()
+    return _forecast_adapter.validate_python([
+        {"date": d, "predicted_price": p, "lower_bound": lo, "upper_bound": hi}
+        for d, p, lo, hi in zip(dates, prices.tolist(), _optional(lower), _optional(upper))
+    ])
+
+
+# ─── Allocations ──────────────────────────────────────────────────────────────
+
+def pack_allocations(items: Iterable) -> bytes:
+    items = list(items)
+    percentages = np.array([_field(i, "percentage") for i in items], dtype="<f8")
+    amounts = np.array([_field(i, "amount") for i in items], dtype="<f8")
+    names = _NAME_SEP.join(_field(i, "asset") for i in items).encode("utf-8")
+    return b"".join([
+        _ALLOCATION_HEADER.pack(VERSION, len(items)),
+        percentages.tobytes(),
+        amounts.tobytes(),
+        names,
+    ])
+
+
+def unpack_allocations(blob: bytes) -> List[AssetAllocation]:
+    version, count = _ALLOCATION_HEADER.unpack_from(blob)
+    if version != VERSION:
+        raise ValueError(f"Unsupported packed allocation version {version}")
+    offset = _ALLOCATION_HEADER.size
+    percentages = np.frombuffer(blob, dtype="<f8", count=count, offset=offset).tolist()
+    amounts = np.frombuffer(blob, dtype="<f8", count=count, offset=offset + 8 * count).tolist()
+    names = bytes(blob[offset + 16 * count:]).decode("utf-8").split(_NAME_SEP) if count else []
+    return [
+        AssetAllocation(asset=n, percentage=p, amount=a)
+        for n, p, a in zip(names, percentages, amounts)
+    ]
+
+
+# ─── Column Types ─────────────────────────────────────────────────────────────
+
+class _PackedColumn(TypeDecorator, ABC):
+    """Packed binary column that still reads legacy JSON rows; subclasses supply the codec."""
+    impl = LargeBinary
+    cache_ok = True
+
+    schema = None     # pydantic model for legacy JSON rows
+
+    @abstractmethod
+    def pack(self, value) -> bytes:
+        """Encode the column value as a packed blob."""
+
+    @abstractmethod
+    def unpack(self, blob: bytes):
+        """Decode a packed blob back into the column value."""
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else self.pack(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            blob = bytes(value)
+            if not blob.lstrip().startswith(b"["):
+                return self.unpack(blob)
+            value = blob.decode("utf-8")
+        if isinstance(value, str):
+            value = json.loads(value)
+        return [self.schema(**item) for item in value]
+
+
+class PackedForecast(_PackedColumn):
+    """List[PredictionPoint] <-> packed float64 arrays with start date + step."""
+    cache_ok = True
+    schema = PredictionPoint
+
+    def pack(self, value) -> bytes:
+        return pack_forecast(value)
+
+    def unpack(self, blob: bytes):
+        return unpack_forecast(blob)
+
+
+class PackedAllocations(_PackedColumn):
+    """List[AssetAllocation] <-> packed percentage/amount arrays plus names."""
+    cache_ok = True
+    schema = AssetAllocation
+
+    def pack(self, value) -> bytes:
+        return pack_allocations(value)
+
+    def unpack(self, blob: bytes):
+        return unpack_allocations(blob)
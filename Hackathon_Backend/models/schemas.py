@@ -3,7 +3,7 @@ models/schemas.py - Pydantic Models for Request / Response
 """
 
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime
 
 
@@ -29,6 +29,13 @@ class WalletLogin(BaseModel):
     message: str
 
 
+class WalletNonceResponse(BaseModel):
+    wallet_address: str
+    nonce: str
+    message: str
+    expires_at: int
+
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -77,6 +84,8 @@ class AllocationRequest(BaseModel):
     user_id: int
     investment_amount: float
     risk_profile: str
+    risk_score: Optional[float] = Field(default=None, ge=0, le=100)  # quiz score; picks the frontier point
+    method: Optional[str] = None  # "mean_variance" (default) | "min_variance" | "risk_parity" | "template"
 
 
 class AssetAllocation(BaseModel):
@@ -89,6 +98,79 @@ class PortfolioResponse(BaseModel):
     total_amount: float
     allocations: List[AssetAllocation]
     rationale: str
+    method: str = "template"
+    expected_return: Optional[float] = None  # % a year, optimised allocations only
+    volatility: Optional[float] = None       # % a year
+
+
+class BulkAllocationRequest(BaseModel):
+    """Column-oriented batch: entry i of every list belongs to user_ids[i]."""
+    user_ids: List[int]
+    amounts: List[float]                                 # new money per user
+    risk_profiles: Optional[List[str]] = None            # default "moderate"
+    risk_scores: Optional[List[Optional[float]]] = None  # quiz score 0–100; overrides the profile
+    holding_assets: List[str] = []                       # columns of `holdings`
+    holdings: Optional[List[List[float]]] = None         # current value, one row per user
+    method: Optional[str] = None
+    min_trade: float = Field(default=0.0, ge=0)          # smaller trades are reported as 0
+
+
+class BacktestRequest(BaseModel):
+    # Template profiles, "min_variance", "risk_parity" or "frontier:<risk score 0-100>"
+    strategies: List[str] = ["conservative", "moderate", "aggressive"]
+    horizon_years: float = Field(default=1.0, gt=0, le=10)
+    rebalance: List[str] = ["monthly", "quarterly", "yearly", "never"]
+    start_step_days: int = Field(default=5, ge=1, le=252)   # spacing of start dates
+
+
+class BacktestStat(BaseModel):
+    strategy: str
+    rebalance: str
+    runs: int                 # start dates simulated
+    cagr: float               # %, median over start dates
+    cagr_p5: float
+    cagr_p95: float
+    volatility: float         # %, annualised, median
+    max_drawdown: float       # %, median
+    worst_drawdown: float     # %, worst start date
+    sharpe: float             # median
+
+
+class BacktestResponse(BaseModel):
+    horizon_days: int
+    history_days: int
+    start_dates: int
+    results: List[BacktestStat]
+
+
+class RiskRequest(BaseModel):
+    # Tickers or allocation asset classes (e.g. "Gold / Commodities" from /portfolio/allocate)
+    assets: List[str]
+    holdings: List[List[float]]     # value per asset, one row per portfolio
+    confidence: float = Field(default=0.95, gt=0.5, lt=1)
+    horizon_days: int = Field(default=1, ge=1, le=60)
+    history: Literal["1y", "2y", "5y", "10y"] = "5y"
+    scenarios: Optional[List[str]] = None   # default: all
+
+
+class PortfolioRisk(BaseModel):
+    value: float
+    # Losses as % of value (positive = loss)
+    historical_var: float
+    historical_cvar: float
+    parametric_var: float
+    parametric_cvar: float
+    monte_carlo_var: float
+    monte_carlo_cvar: float
+    scenarios: dict                 # scenario name -> P&L % (negative = loss)
+
+
+class RiskResponse(BaseModel):
+    symbols: List[str]
+    observations: int
+    confidence: float
+    horizon_days: int
+    portfolios: List[PortfolioRisk]
 
 
 # ─── Prediction ───────────────────────────────────────────────────────────────
@@ -132,6 +214,26 @@ class NewsResponse(BaseModel):
     query: str
     articles: List[NewsArticle]
     overall_sentiment: str
+    fallback: bool = False   # NewsData unavailable: generic business headlines, not query-specific
+
+
+class SentimentBucket(BaseModel):
+    start: datetime
+    end: datetime
+    count: int
+    mean: float
+    decayed_score: float  # EWMA of sentiment up to the end of this bucket
+
+
+class TickerSentimentResponse(BaseModel):
+    ticker: str
+    resolution: str       # "hourly" | "daily"
+    article_count: int
+    decayed_score: float
+    signal_strength: float  # decayed article count; ~0 means stale
+    sentiment: str
+    buckets: List[SentimentBucket]
+    updated_at: Optional[datetime] = None
 
 
 # ─── Advisor ─────────────────────────────────────────────────────────────────
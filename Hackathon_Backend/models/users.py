@@ -0,0 +1,200 @@
+"""
+models/users.py - User Repository (shared DB store + read-through cache)
+
+Backs the auth routes with the `users` table so every worker and node sees
+the same users. Ids come from the database sequence (atomic under
+concurrency) and duplicate emails/wallets are rejected by unique indexes
+rather than by a racy check-then-insert. Lookups go through a short-lived
+in-process cache. The routes only ever insert users (nothing here updates
+or deletes a row), so the cache has no invalidation path and relies on
+USER_CACHE_TTL to pick up changes made outside this service. Only hits are
+cached, so a user created on another worker is visible immediately.
+
+With the async engine (DB_ASYNC) queries run on an AsyncSession; otherwise
+the sync session is driven from a worker thread. Without DATABASE_URL the
+repository falls back to an in-process store, which is only correct for a
+single worker.
+"""
+
+import asyncio
+import itertools
+from datetime import datetime
+from typing import Optional
+
+from core.cache import TTLCache
+from core.config import settings
+from models import database
+
+
+class UserExists(Exception):
+    """Email or wallet is already registered."""
+
+
+def _to_dict(user) -> dict:
+    created_at = user.created_at or datetime.utcnow()
+    return {
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "hashed_password": user.hashed_password,
+        "wallet_address": user.wallet_address,
+        "created_at": created_at.isoformat(),
+    }
+
+
+# ─── SQL Repository ───────────────────────────────────────────────────────────
+
+class SqlUserRepository:
+    def __init__(self, session_factory, cache_ttl: float):
+        self._session_factory = session_factory
+        self._cache = TTLCache("users", ttl=cache_ttl, max_entries=50_000)
+
+    # -- blocking DB work (runs in a thread) --
+
+    def _find(self, column: str, value: str) -> Optional[dict]:
+        from models.models import User
+
+        with self._session_factory() as db:
+            user = db.query(User).filter(getattr(User, column) == value).one_or_none()
+            return _to_dict(user) if user else None
+
+    def _insert(self, **fields) -> dict:
+        from sqlalchemy.exc import IntegrityError
+        from models.models import User
+
+        with self._session_factory() as db:
+            user = User(**fields)
+            db.add(user)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                raise UserExists(fields.get("email") or fields.get("wallet_address"))
+            db.refresh(user)
+            return _to_dict(user)
+
+    async def _fetch(self, column: str, value: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._find, column, value)
+
+    async def _store(self, **fields) -> dict:
+        return await asyncio.to_thread(self._insert, **fields)
+
+    # -- async API --
+
+    async def _lookup(self, column: str, value: str) -> Optional[dict]:
+        key = (column, value)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        user = await self._fetch(column, value)
+        if user is not None:
+            self._remember(user)
+        return user
+
+    def _remember(self, user: dict) -> None:
+        if user.get("email"):
+            self._cache.set(("email", user["email"]), user)
+        if user.get("wallet_address"):
+            self._cache.set(("wallet_address", user["wallet_address"]), user)
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        return await self._lookup("email", email)
+
+    async def get_by_wallet(self, wallet: str) -> Optional[dict]:
+        return await self._lookup("wallet_address", wallet.lower())
+
+    async def create(
+        self,
+        email: Optional[str],
+        full_name: str,
+        hashed_password: Optional[str] = None,
+        wallet_address: Optional[str] = None,
+    ) -> dict:
+        user = await self._store(
+            email=email,
+            full_name=full_name,
+            hashed_password=hashed_password,
+            wallet_address=wallet_address.lower() if wallet_address else None,
+        )
+        self._remember(user)
+        return user
+
+
+class AsyncSqlUserRepository(SqlUserRepository):
+    """Same repository over the async engine: no thread hop per query."""
+
+    async def _fetch(self, column: str, value: str) -> Optional[dict]:
+        from sqlalchemy import select
+        from models.models import User
+
+        async with self._session_factory() as db:
+            result = await db.execute(select(User).where(getattr(User, column) == value))
+            user = result.scalar_one_or_none()
+            return _to_dict(user) if user else None
+
+    async def _store(self, **fields) -> dict:
+        from sqlalchemy.exc import IntegrityError
+        from models.models import User
+
+        async with self._session_factory() as db:
+            user = User(**fields)
+            db.add(user)
+            try:
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                raise UserExists(fields.get("email") or fields.get("wallet_address"))
+            await db.refresh(user)
+            return _to_dict(user)
+
+
+# ─── In-Process Fallback ──────────────────────────────────────────────────────
+
+class InMemoryUserRepository:
+    """Single-worker fallback used when no database is configured."""
+
+    def __init__(self):
+        self._by_email: dict = {}
+        self._by_wallet: dict = {}
+        self._ids = itertools.count(1)
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        return self._by_email.get(email)
+
+    async def get_by_wallet(self, wallet: str) -> Optional[dict]:
+        return self._by_wallet.get(wallet.lower())
+
+    async def create(
+        self,
+        email: Optional[str],
+        full_name: str,
+        hashed_password: Optional[str] = None,
+        wallet_address: Optional[str] = None,
+    ) -> dict:
+        wallet = wallet_address.lower() if wallet_address else None
+        if (email and email in self._by_email) or (wallet and wallet in self._by_wallet):
+            raise UserExists(email or wallet)
+        user = {
+            "id": next(self._ids),
+            "email": email,
+            "full_name": full_name,
+            "hashed_password": hashed_password,
+            "wallet_address": wallet,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        if email:
+            self._by_email[email] = user
+        if wallet:
+            self._by_wallet[wallet] = user
+        return user
+
+
+def _build_repository():
+    if database.AsyncSessionLocal is not None:
+        return AsyncSqlUserRepository(database.AsyncSessionLocal, cache_ttl=settings.USER_CACHE_TTL)
+    if database.SessionLocal is not None:
+        return SqlUserRepository(database.SessionLocal, cache_ttl=settings.USER_CACHE_TTL)
+    return InMemoryUserRepository()
+
+
+users = _build_repository()
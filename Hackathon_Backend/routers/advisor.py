@@ -2,11 +2,21 @@
 routers/advisor.py - AI Advisor Routes (Gemini 1.5 Flash)
 """
 
-from fastapi import APIRouter, HTTPException
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Hashable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from models.schemas import AdvisorRequest, AdvisorResponse
-from services.advisor import get_advice
+from services.advisor import get_advice, stream_advice, stream_llm_response, ADVISOR_SOURCES
+from core.cache import TTLCache
 from core.config import settings
+from core.security import caller_id, optional_user, require_user
+from services import llm
+from services.conversation import conversations, estimate_tokens
+from services.persistence import recorder
 from datetime import datetime
 
 router = APIRouter(prefix="/api/advisor", tags=["Advisor"])
@@ -18,78 +28,241 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     reply: str
+    prompt_tokens: int = 0      # estimated tokens sent to the LLM for this turn
+    history_tokens: int = 0     # verbatim history kept after this turn
+    summary_tokens: int = 0     # rolling summary of compacted turns
 
 
-def _gemini_chat(prompt: str) -> str:
-    """Call Gemini 2.5 Flash and return the generated text."""
+async def _gemini_chat(prompt: str) -> str:
+    """Generate an interactive reply through the shared LLM gateway."""
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        result = model.generate_content(prompt)
-        return result.text
-    except Exception as e:
-        # Fallback to pure REST API if the library fails or rate limits
-        if "429" in str(e) or "Resource has been exhausted" in str(e) or "Quota" in str(e):
-            import urllib.request, json
-            
-            # The user's provided API key has hit the "Too Many Requests" rate limit for the free tier.
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={settings.GEMINI_API_KEY}"
-            if "key=" not in url or settings.GEMINI_API_KEY == "":
-                return "[AI unavailable: API Key missing in environment]"
-                
-            headers = {'Content-Type': 'application/json'}
-            data = {
-                "contents": [{"parts":[{"text": prompt}]}]
-            }
-            try:
-                req = urllib.request.Request(url, data=json.dumps(data).encode('utf-8'), headers=headers)
-                with urllib.request.urlopen(req) as response:
-                    res_data = json.loads(response.read().decode())
-                    return res_data['candidates'][0]['content']['parts'][0]['text']
-            except Exception as e2:
-                return f"[AI fallback unavailable: {e2}]"
-                
+        return await llm.gateway.generate(prompt, priority=llm.INTERACTIVE)
+    except llm.RateLimited:
+        return llm.RATE_LIMIT_MESSAGE
+    except llm.LLMUnavailable as e:
         return f"[AI unavailable: {e}]"
 
 
+# ─── Response Cache ───────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: int                        # seconds; 0 disables caching
+    key: Callable[..., Hashable]    # endpoint arguments -> cache key
+
+
+CACHE_POLICIES = {
+    "predict-insight": CachePolicy(
+        ttl=settings.LLM_CACHE_TTL_INSIGHT,
+        key=lambda ticker, days: ("predict-insight", ticker, days),     # ticker normalised by the route
+    ),
+    "chat": CachePolicy(
+        ttl=settings.LLM_CACHE_TTL_CHAT,
+        key=lambda message: ("chat", " ".join(message.lower().split())),
+    ),
+}
+
+_llm_cache = TTLCache("llm_responses", ttl=0, max_entries=settings.LLM_CACHE_MAX_ENTRIES)
+
+
+def _is_cacheable_reply(reply: str) -> bool:
+    """Never cache error/fallback strings such as "[AI unavailable: ...]"."""
+    return bool(reply) and not reply.startswith("[") and "too many requests" not in reply.lower()
+
+
+async def _cached_gemini_chat(endpoint: str, prompt: str, *key_args) -> str:
+    """
+    `_gemini_chat` behind the endpoint's cache policy. Identical concurrent
+    prompts share one upstream call; successful replies are kept for the TTL.
+    """
+    policy = CACHE_POLICIES[endpoint]
+    if policy.ttl <= 0:
+        return await _gemini_chat(prompt)
+    return await _llm_cache.get_or_set(
+        policy.key(*key_args),
+        lambda: _gemini_chat(prompt),
+        ttl=policy.ttl,
+        cache_if=_is_cacheable_reply,
+    )
+
+
+def _chat_prompt(message: str, history: str = "") -> str:
+    system_prompt = (
+        "You are MindVest, a professional AI financial advisor and stock market expert. "
+        "You help users understand stocks, investments, portfolio management, and market trends. "
+        "You provide clear, data-driven, personalized financial insights. "
+        "Always remind users that market predictions carry risk and this is not certified financial advice.\n\n"
+    )
+    if history:
+        system_prompt += history + "\n"
+    return system_prompt + f"User: {message}\nMindVest:"
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_response(request: Request, chunks: AsyncIterator[str], done: dict) -> StreamingResponse:
+    """
+    Relay LLM chunks as Server-Sent Events: `token` per chunk, then `done`.
+    Stops (and closes the upstream stream) as soon as the client disconnects.
+    """
+    async def body():
+        try:
+            async for text in chunks:
+                if await request.is_disconnected():
+                    break
+                yield _sse("token", {"text": text})
+            else:
+                yield _sse("done", {**done, "generated_at": datetime.utcnow().isoformat()})
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/ask", response_model=AdvisorResponse)
-async def ask_advisor(req: AdvisorRequest):
+async def ask_advisor(req: AdvisorRequest, claims: Optional[dict] = Depends(optional_user)):
     """
     Ask the AI financial advisor a question.
     Combines news sentiment + portfolio context → enriched LLM response.
+    Profile and portfolio context are only used for signed-in callers.
     """
     try:
-        return await get_advice(req)
+        response = await get_advice(req, caller_id(claims))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    recorder.record(
+        "advisor_query", user_id=caller_id(claims), query=req.query,
+        advice=response.advice, sources=response.sources,
+    )
+    return response
+
+
+def _memory_tokens(conv) -> dict:
+    if conv is None:
+        return {}
+    stats = conv.stats()
+    return {"history_tokens": stats["history_tokens"], "summary_tokens": stats["summary_tokens"]}
+
+
+def _conversation(claims: Optional[dict]):
+    """The caller's conversation, keyed on the JWT subject; None for anonymous callers."""
+    return conversations.get(claims["sub"]) if claims else None
+
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_advisor(req: ChatRequest):
+async def chat_with_advisor(req: ChatRequest, claims: Optional[dict] = Depends(optional_user)):
     """
     Simple AI chat endpoint for the frontend chatbot.
-    Uses Gemini 1.5 Flash with a financial advisor system prompt.
+    Signed-in users get conversation state kept server-side within a token
+    budget, so the client only sends the new message. Anonymous chats are
+    stateless.
     """
-    system_prompt = (
-        "You are MindVest, a professional AI financial advisor and stock market expert. "
-        "You help users understand stocks, investments, portfolio management, and market trends. "
-        "You provide clear, data-driven, personalized financial insights. "
-        "Always remind users that market predictions carry risk and this is not certified financial advice.\n\n"
-    )
-    full_prompt = system_prompt + f"User: {req.message}\nMindVest:"
-    
-    reply = _gemini_chat(full_prompt)
-    return ChatResponse(reply=reply)
+    conv = _conversation(claims)
+    history = conv.render() if conv else ""
+    prompt = _chat_prompt(req.message, history)
+
+    if history:
+        # Replies depend on the conversation so far — not shareable
+        reply = await _gemini_chat(prompt)
+    else:
+        reply = await _cached_gemini_chat("chat", prompt, req.message)
+
+    if conv is not None and _is_cacheable_reply(reply):
+        # Error/fallback replies would be replayed to the model on every later turn
+        conv.add("User", req.message)
+        conv.add("MindVest", reply)
+    recorder.record("advisor_query", user_id=caller_id(claims), query=req.message, advice=reply, sources=["chat"])
+    return ChatResponse(reply=reply, prompt_tokens=estimate_tokens(prompt), **_memory_tokens(conv))
+
+
+@router.get("/chat/memory")
+async def chat_memory(claims: dict = Depends(require_user)):
+    """Inspect the caller's server-side conversation memory."""
+    conv = conversations.peek(claims["sub"])
+    return {"user_id": claims.get("user_id"), **(conv.stats() if conv else {"turns": 0})}
+
+
+@router.delete("/chat/memory")
+async def reset_chat_memory(claims: dict = Depends(require_user)):
+    """Start a fresh conversation for the caller."""
+    conversations.reset(claims["sub"])
+    return {"user_id": claims.get("user_id"), "reset": True}
+
+
+@router.post("/ask/stream")
+async def ask_advisor_stream(req: AdvisorRequest, request: Request,
+                             claims: Optional[dict] = Depends(optional_user)):
+    """Streaming variant of /ask: relays advice token-by-token over SSE."""
+    user_id = caller_id(claims)
+
+    async def chunks():
+        parts = []
+        advice = stream_advice(req, user_id)
+        try:
+            async for text in advice:
+                parts.append(text)
+                yield text
+        finally:
+            await advice.aclose()
+            # Whatever reached the client, even if it disconnected early
+            if parts:
+                recorder.record("advisor_query", user_id=user_id, query=req.query,
+                                advice="".join(parts), sources=ADVISOR_SOURCES)
+
+    return _sse_response(request, chunks(), {"sources": ADVISOR_SOURCES})
+
+
+@router.post("/chat/stream")
+async def chat_with_advisor_stream(req: ChatRequest, request: Request,
+                                   claims: Optional[dict] = Depends(optional_user)):
+    """
+    Streaming variant of /chat: relays the reply token-by-token over SSE.
+    The turn is kept in the conversation only if the reply completed without
+    an error (not on a disconnect or an LLM fallback message).
+    """
+    conv = _conversation(claims)
+    prompt = _chat_prompt(req.message, conv.render() if conv else "")
+
+    async def chunks():
+        parts = []
+        completed = False
+        try:
+            async for text in stream_llm_response(prompt):
+                parts.append(text)
+                yield text
+            completed = True
+        finally:
+            reply = "".join(parts)
+            # stream_llm_response reports a failure as its final chunk
+            succeeded = completed and _is_cacheable_reply(reply) and _is_cacheable_reply(parts[-1])
+            if conv is not None and succeeded:
+                conv.add("User", req.message)
+                conv.add("MindVest", reply)
+            if parts:
+                recorder.record("advisor_query", user_id=caller_id(claims), query=req.message,
+                                advice=reply, sources=["chat"])
+
+    return _sse_response(request, chunks(), {"prompt_tokens": estimate_tokens(prompt)})
 
 
 @router.post("/predict-insight")
 async def predict_insight(ticker: str, days: int = 7):
     """Get AI insight on a stock prediction."""
+    # One spelling per ticker: the prompt must match what the cache key says it is
+    ticker = ticker.strip().upper()
     prompt = (
         f"Provide a brief 3-sentence investment insight for {ticker} stock for the next {days} days. "
         "Include potential catalysts, risks, and a sentiment (Bullish/Bearish/Neutral). "
         "Be concise and data-driven."
     )
-    reply = _gemini_chat(prompt)
+    reply = await _cached_gemini_chat("predict-insight", prompt, ticker, days)
     return {"ticker": ticker, "insight": reply, "generated_at": datetime.utcnow()}
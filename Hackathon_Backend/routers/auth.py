@@ -4,30 +4,45 @@ routers/auth.py - Authentication Routes (JWT + Web3)
 
 from fastapi import APIRouter, HTTPException, status
 from datetime import datetime, timedelta
-from models.schemas import UserRegister, UserLogin, WalletLogin, TokenResponse, UserOut, RegisterResponse
+from models.schemas import (
+    UserRegister, UserLogin, WalletLogin, WalletNonceResponse, TokenResponse, UserOut, RegisterResponse,
+)
 from core.config import settings
-from core.security import hash_password, verify_password, create_access_token
+from core.security import (
+    hash_password_async, verify_password_async, create_access_token, HashingPoolSaturated,
+)
+from core import wallet as wallet_auth
+from models.users import users, UserExists
 
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
 
-# --- In-memory user store (replace with DB in production) ---
-_USERS: dict = {}
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins right now, please retry in a moment",
+        headers={"Retry-After": "1"},
+    )
 
 
 @router.post("/register", response_model=RegisterResponse, status_code=status.HTTP_201_CREATED)
 async def register(user: UserRegister):
     """Register a new user with email + password."""
-    if user.email in _USERS:
+    if await users.get_by_email(user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    _USERS[user.email] = {
-        "id": len(_USERS) + 1,
-        "email": user.email,
-        "full_name": user.full_name or user.email.split("@")[0],
-        "hashed_password": hash_password(user.password),
-        "wallet_address": None,
-        "created_at": datetime.utcnow().isoformat(),
-    }
+    try:
+        hashed_password = await hash_password_async(user.password)
+    except HashingPoolSaturated:
+        raise _hashing_busy()
+
+    try:
+        await users.create(
+            email=user.email,
+            full_name=user.full_name or user.email.split("@")[0],
+            hashed_password=hashed_password,
+        )
+    except UserExists:
+        raise HTTPException(status_code=400, detail="Email already registered")
 
     return {"message": "Account created successfully! Please sign in."}
 
@@ -35,22 +50,27 @@ async def register(user: UserRegister):
 @router.post("/login", response_model=TokenResponse)
 async def login(credentials: UserLogin):
     """Login with email + password, returns JWT access token."""
-    user = _USERS.get(credentials.email)
-    if not user:
-        # Demo: auto-create user on first login so frontend demo works
-        _USERS[credentials.email] = {
-            "id": len(_USERS) + 1,
-            "email": credentials.email,
-            "full_name": credentials.email.split("@")[0],
-            "hashed_password": hash_password(credentials.password),
-            "wallet_address": None,
-            "created_at": datetime.utcnow().isoformat(),
-        }
-        user = _USERS[credentials.email]
-
-    if not verify_password(credentials.password, user["hashed_password"]):
-        # For demo: accept any password
-        pass
+    user = await users.get_by_email(credentials.email)
+    try:
+        if not user:
+            # Demo: auto-create user on first login so frontend demo works
+            hashed_password = await hash_password_async(credentials.password)
+            try:
+                user = await users.create(
+                    email=credentials.email,
+                    full_name=credentials.email.split("@")[0],
+                    hashed_password=hashed_password,
+                )
+            except UserExists:
+                # Created concurrently (possibly by another worker)
+                user = await users.get_by_email(credentials.email)
+        elif user["hashed_password"] and not await verify_password_async(
+            credentials.password, user["hashed_password"]
+        ):
+            # For demo: accept any password
+            pass
+    except HashingPoolSaturated:
+        raise _hashing_busy()
 
     token_data = {
         "sub": credentials.email,
@@ -61,23 +81,40 @@ async def login(credentials: UserLogin):
     return TokenResponse(access_token=access_token)
 
 
+@router.get("/web3-nonce", response_model=WalletNonceResponse)
+async def web3_nonce(wallet_address: str):
+    """Issue a single-use login nonce and the message the wallet must sign."""
+    wallet = wallet_address.lower()
+    issued = wallet_auth.nonces.issue(wallet)
+    return WalletNonceResponse(
+        wallet_address=wallet,
+        nonce=issued.nonce,
+        message=issued.message,
+        expires_at=issued.expires_at,
+    )
+
+
 @router.post("/web3-login", response_model=TokenResponse)
 async def web3_login(payload: WalletLogin):
-    """Login via Web3 wallet signature (MetaMask)."""
-    # In production: verify the signature against the message on-chain
+    """Login via Web3 wallet signature (MetaMask) over a nonce from /web3-nonce."""
     wallet = payload.wallet_address.lower()
+    if not await wallet_auth.verify_login(wallet, payload.message, payload.signature):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired wallet signature",
+        )
+
+    user = await users.get_by_wallet(wallet)
+    if not user:
+        try:
+            user = await users.create(
+                email=None,
+                full_name=f"Web3:{wallet[:6]}…{wallet[-4:]}",
+                wallet_address=wallet,
+            )
+        except UserExists:
+            user = await users.get_by_wallet(wallet)
 
-    if wallet not in _USERS:
-        _USERS[wallet] = {
-            "id": len(_USERS) + 1,
-            "email": None,
-            "full_name": f"Web3:{wallet[:6]}…{wallet[-4:]}",
-            "hashed_password": None,
-            "wallet_address": wallet,
-            "created_at": datetime.utcnow().isoformat(),
-        }
-
-    user = _USERS[wallet]
     token_data = {"sub": wallet, "user_id": user["id"], "full_name": user["full_name"]}
     access_token = create_access_token(token_data)
     return TokenResponse(access_token=access_token)
@@ -2,28 +2,145 @@
 routers/investment.py - Portfolio & Investment Routes
 """
 
-from fastapi import APIRouter, HTTPException
-from models.schemas import AllocationRequest, PortfolioResponse
-from engines.investment import generate_portfolio
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from models.schemas import (
+    AllocationRequest, BulkAllocationRequest, PortfolioResponse, BacktestRequest, BacktestResponse,
+    RiskRequest, RiskResponse,
+)
+from engines.backtest import REBALANCE_PERIODS, BacktestPoolSaturated, run_backtest
+from engines.market_data import HistoryUnavailable
+from engines.risk import analyse_portfolios
+from engines.rebalance import RebalanceBatch, rebalance, iter_ndjson
+from engines.investment import build_portfolio
+from services.persistence import recorder
+from core.conditional import FrozenJSON
+from core.security import caller_id, optional_user
 
 router = APIRouter(prefix="/api/investment", tags=["Investment"])
 
 
 @router.post("/portfolio/allocate", response_model=PortfolioResponse)
-async def allocate_portfolio(req: AllocationRequest):
+async def allocate_portfolio(req: AllocationRequest, claims: Optional[dict] = Depends(optional_user)):
     """
     Generate asset allocation plan based on risk profile and investment amount.
     risk_profile: 'conservative' | 'moderate' | 'aggressive'
+    risk_score: optional quiz score (0–100), placed on today's efficient frontier
+    method: 'mean_variance' (default) | 'min_variance' | 'risk_parity' | 'template'
     """
     try:
-        return generate_portfolio(req)
+        portfolio = await build_portfolio(req)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    recorder.record(
+        "portfolio",
+        user_id=caller_id(claims),
+        investment_amount=req.investment_amount,
+        risk_profile=req.risk_profile,
+        allocations=[a.model_dump() for a in portfolio.allocations],
+        rationale=portfolio.rationale,
+    )
+    return portfolio
+
+
+def _to_batch(req: BulkAllocationRequest) -> RebalanceBatch:
+    m = len(req.user_ids)
+    columns = {
+        "amounts": req.amounts,
+        "risk_profiles": req.risk_profiles,
+        "risk_scores": req.risk_scores,
+        "holdings": req.holdings,
+    }
+    for name, values in columns.items():
+        if values is not None and len(values) != m:
+            raise HTTPException(status_code=422, detail=f"{name} has {len(values)} entries, expected {m}")
+
+    k = len(req.holding_assets)
+    holdings = np.zeros((m, k)) if req.holdings is None else np.asarray(req.holdings, dtype=np.float64)
+    if holdings.shape != (m, k):
+        raise HTTPException(status_code=422, detail=f"holdings must be {m} rows x {k} columns")
+
+    scores = req.risk_scores if req.risk_scores is not None else [None] * m
+    return RebalanceBatch(
+        user_ids=np.asarray(req.user_ids, dtype=np.int64),
+        amounts=np.asarray(req.amounts, dtype=np.float64),
+        risk_profiles=req.risk_profiles or ["moderate"] * m,
+        risk_scores=np.array([np.nan if s is None else s for s in scores], dtype=np.float64),
+        holdings=holdings,
+        holding_assets=req.holding_assets,
+    )
+
+
+@router.post("/portfolio/allocate/bulk")
+async def allocate_portfolios_bulk(req: BulkAllocationRequest):
+    """
+    Target allocations and rebalancing trades for a whole batch of users,
+    computed as one matrix operation. Streams NDJSON: a `plan` record with
+    the asset columns, one `allocation` record per user, then a `summary`.
+    """
+    plan = await rebalance(_to_batch(req), req.method)
+    return StreamingResponse(
+        iter_ndjson(plan, req.min_trade),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post("/backtest", response_model=BacktestResponse)
+async def backtest_strategies(req: BacktestRequest):
+    """
+    Backtest allocation strategies over historical prices: every start date
+    (spaced `start_step_days` apart) x every rebalance frequency, reporting
+    CAGR, volatility, max drawdown and Sharpe.
+    """
+    unknown = [r for r in req.rebalance if r not in REBALANCE_PERIODS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown rebalance frequency: {', '.join(unknown)}")
+    try:
+        result = await run_backtest(
+            req.strategies,
+            horizon_years=req.horizon_years,
+            rebalance=req.rebalance,
+            start_step=req.start_step_days,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except BacktestPoolSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    if result is None:
+        raise HTTPException(status_code=503, detail="Price history is unavailable, try again later")
+    return result
+
+
+@router.post("/risk", response_model=RiskResponse)
+async def portfolio_risk(req: RiskRequest):
+    """
+    Historical, parametric and Monte Carlo VaR/CVaR plus stress scenarios for
+    one or more portfolios over the same assets, in a single call.
+    """
+    if not req.assets or not req.holdings:
+        raise HTTPException(status_code=422, detail="assets and holdings are required")
+    if any(len(row) != len(req.assets) for row in req.holdings):
+        raise HTTPException(status_code=422, detail=f"Each holdings row needs {len(req.assets)} values")
+    try:
+        return await analyse_portfolios(
+            req.assets, req.holdings, req.confidence, req.horizon_days, req.history, req.scenarios,
+        )
+    except HistoryUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"{e}, try again later")
+
 
 @router.get("/allocation-templates", response_model=dict)
 async def allocation_templates():
     """Return all pre-defined allocation templates by risk profile."""
+    return _templates.response()
+
+
+def _template_catalogue() -> dict:
     from engines.investment import ALLOCATION_TEMPLATES, RATIONALE_MAP
     return {
         profile: {
@@ -32,3 +149,6 @@ async def allocation_templates():
         }
         for profile, items in ALLOCATION_TEMPLATES.items()
     }
+
+
+_templates = FrozenJSON(_template_catalogue)
@@ -2,27 +2,50 @@
 routers/learning.py - Learning Module Routes (Quiz + Risk Profiling)
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
 from models.schemas import QuizSubmission, RiskProfile
-from engines.learning import get_all_questions, calculate_risk_profile
+from engines.learning import get_all_questions, calculate_risk_profile, remember_risk_profile, LEARNING_TOPICS
+
+from core.security import caller_id, optional_user
+from services.advisor import forget_user_context
+from services.persistence import recorder
+from core.conditional import FrozenJSON
 
 router = APIRouter(prefix="/api/learning", tags=["Learning"])
 
+# Static payloads: serialized once, served with an ETag
+_questions = FrozenJSON(get_all_questions)
+_topics = FrozenJSON(lambda: LEARNING_TOPICS)
+
 
 @router.get("/quiz/questions", response_model=List[dict])
 async def quiz_questions():
     """Return all quiz questions (without weights/answers)."""
-    return get_all_questions()
+    return _questions.response()
 
 
 @router.post("/quiz/submit", response_model=RiskProfile)
-async def submit_quiz(submission: QuizSubmission):
+async def submit_quiz(submission: QuizSubmission, claims: Optional[dict] = Depends(optional_user)):
     """
     Submit quiz answers, calculate and return the user's risk profile.
+    The profile belongs to the signed-in caller (user_id 0 when anonymous,
+    which isn't remembered for the advisor); the body's user_id is ignored.
     """
     try:
-        return calculate_risk_profile(submission)
+        user_id = caller_id(claims)
+        profile = calculate_risk_profile(submission.model_copy(update={"user_id": user_id or 0}))
+        remember_risk_profile(profile)
+        if user_id is not None:
+            forget_user_context(user_id)
+        recorder.record(
+            "quiz_result",
+            user_id=user_id,
+            answers=[a.model_dump() for a in submission.answers],
+            risk_score=profile.score,
+            risk_profile=profile.profile,
+        )
+        return profile
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -30,11 +53,4 @@ async def submit_quiz(submission: QuizSubmission):
 @router.get("/topics", response_model=List[dict])
 async def list_topics():
     """Return learning topics catalogue."""
-    return [
-        {"id": "basics",      "title": "Stock Market Basics",     "icon": "📈", "xp": 50,  "status": "available"},
-        {"id": "fundamental", "title": "Fundamental Analysis",     "icon": "🔍", "xp": 75,  "status": "available"},
-        {"id": "technical",   "title": "Technical Analysis",       "icon": "📊", "xp": 100, "status": "available"},
-        {"id": "risk",        "title": "Risk Management",          "icon": "⚠️", "xp": 75,  "status": "available"},
-        {"id": "options",     "title": "Options & Derivatives",    "icon": "🎯", "xp": 150, "status": "locked"},
-        {"id": "crypto",      "title": "Crypto & Web3",            "icon": "₿",  "xp": 200, "status": "locked"},
-    ]
+    return _topics.response()
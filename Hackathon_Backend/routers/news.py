@@ -2,9 +2,14 @@
 routers/news.py - News Sentiment Routes
 """
 
+import json
+
 from fastapi import APIRouter, HTTPException, Query
-from models.schemas import NewsRequest, NewsResponse
-from engines.news import get_news_with_sentiment
+from fastapi.responses import StreamingResponse
+from models.schemas import NewsRequest, NewsResponse, TickerSentimentResponse
+from engines.news import get_news_with_sentiment, stream_news_with_sentiment
+from engines.sentiment_series import get_ticker_sentiment
+from engines.tickers import normalise_symbol
 
 router = APIRouter(prefix="/api/news", tags=["News"])
 
@@ -31,3 +36,52 @@ async def get_news_post(req: NewsRequest):
         return await get_news_with_sentiment(req)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stream")
+async def stream_news(
+    query: str = Query(default="Indian stock market", description="Search query"),
+    limit: int = Query(default=10, ge=1, le=50),
+    format: str = Query(default="ndjson", enum=["ndjson", "sse"]),
+):
+    """
+    Stream news articles as soon as each one's sentiment is ready.
+    Emits one record per article followed by a final summary record with
+    `overall_sentiment`. `format=ndjson` sends one JSON object per line
+    ({"type": "article"|"summary", "data": {...}}); `format=sse` sends
+    Server-Sent Events with the same payloads.
+    """
+    req = NewsRequest(query=query, limit=limit)
+
+    async def body():
+        try:
+            async for kind, data in stream_news_with_sentiment(req):
+                if format == "sse":
+                    yield f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+                else:
+                    yield json.dumps({"type": kind, "data": data}) + "\n"
+        except Exception as e:
+            error = {"detail": str(e)}
+            if format == "sse":
+                yield f"event: error\ndata: {json.dumps(error)}\n\n"
+            else:
+                yield json.dumps({"type": "error", "data": error}) + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/sentiment/{ticker}", response_model=TickerSentimentResponse)
+async def get_ticker_sentiment_series(
+    ticker: str,
+    resolution: str = Query(default="hourly", enum=["hourly", "daily"]),
+    limit: int = Query(default=48, ge=1, le=500),
+):
+    """
+    Precomputed per-ticker sentiment time series, built incrementally from
+    every scored article. Does not trigger a fetch.
+    """
+    symbol = normalise_symbol(ticker)
+    if symbol is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ticker: {ticker}")
+    return get_ticker_sentiment(symbol, resolution, limit)
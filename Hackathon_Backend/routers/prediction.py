@@ -4,10 +4,15 @@ routers/prediction.py - AI/ML Stock Prediction Routes
 
 from fastapi import APIRouter, HTTPException, Query
 from models.schemas import PredictionRequest, PredictionResponse
-from engines.prediction import run_prediction
+from engines.prediction import run_prediction_async
+from engines.tickers import SUPPORTED_TICKERS
+from services.persistence import recorder
+from core.conditional import FrozenJSON
 
 router = APIRouter(prefix="/api/predict", tags=["Prediction"])
 
+_tickers = FrozenJSON(lambda: SUPPORTED_TICKERS)
+
 
 @router.post("/", response_model=PredictionResponse)
 async def predict(req: PredictionRequest, model: str = Query(default="lstm", enum=["prophet", "lstm"])):
@@ -18,21 +23,23 @@ async def predict(req: PredictionRequest, model: str = Query(default="lstm", enu
     - model: 'prophet' or 'lstm'
     """
     try:
-        return run_prediction(req, model=model)
+        result = await run_prediction_async(req, model=model)
     except ImportError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    recorder.record(
+        "prediction",
+        ticker=result.ticker,
+        days=req.days,
+        model_used=result.model_used,
+        predictions=[p.model_dump() for p in result.predictions],
+    )
+    return result
+
 
 @router.get("/tickers", response_model=list)
 async def list_tickers():
     """Return supported stock tickers and their Yahoo Finance symbols."""
-    return [
-        {"symbol": "RELIANCE",   "yf_ticker": "RELIANCE.NS", "name": "Reliance Industries"},
-        {"symbol": "TCS",        "yf_ticker": "TCS.NS",       "name": "Tata Consultancy"},
-        {"symbol": "INFY",       "yf_ticker": "INFY.NS",      "name": "Infosys"},
-        {"symbol": "HDFC",       "yf_ticker": "HDFCBANK.NS",  "name": "HDFC Bank"},
-        {"symbol": "WIPRO",      "yf_ticker": "WIPRO.NS",     "name": "Wipro"},
-        {"symbol": "TATAMOTORS", "yf_ticker": "TATAMOTORS.NS","name": "Tata Motors"},
-    ]
+    return _tickers.response()
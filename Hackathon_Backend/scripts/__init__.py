@@ -0,0 +1,3 @@
+"""
+scripts/__init__.py
+"""
@@ -0,0 +1,244 @@
+"""
+scripts/score_news_archive.py - Offline Bulk Sentiment Scoring for News Archives
+
+Streams a JSONL or CSV archive through the local sentiment scorer on a
+process pool and bulk-writes results into a local SQLite database.
+Never calls an upstream API.
+
+    python -m scripts.score_news_archive archive.jsonl --db news_scores.db
+    python -m scripts.score_news_archive archive.csv --workers 8 --batch-size 5000
+
+Memory is bounded by `batch_size * workers * 2` records in flight. Batches
+are committed in archive order together with a checkpoint, so an interrupted
+run resumes where it stopped (pass --restart to ignore the checkpoint).
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from engines.news import score_sentiment_local
+from engines.sentiment_series import tag_tickers
+
+
+# ─── Reading ──────────────────────────────────────────────────────────────────
+
+def _normalise(record: dict) -> dict:
+    """Accept NewsAPI, NewsData and flat CSV field names."""
+    source = record.get("source") or record.get("source_id") or ""
+    if isinstance(source, dict):
+        source = source.get("name", "")
+    return {
+        "title": record.get("title") or "",
+        "description": record.get("description") or "",
+        "url": record.get("url") or record.get("link") or "",
+        "published_at": record.get("publishedAt") or record.get("published_at") or record.get("pubDate") or "",
+        "source": source,
+    }
+
+
+def read_archive(path: str, fmt: Optional[str] = None) -> Iterator[dict]:
+    """Yield normalised article records one at a time."""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield _normalise(row)
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield _normalise(json.loads(line))
+                except json.JSONDecodeError:
+                    # Keep record positions stable so checkpoints stay valid
+                    yield _normalise({})
+
+
+def _batches(records: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ─── Scoring (runs in worker processes) ───────────────────────────────────────
+
+def score_batch(batch: List[dict]) -> List[Tuple]:
+    """Score one batch; returns rows ready for executemany."""
+    scored_at = datetime.utcnow().isoformat()
+    rows = []
+    for r in batch:
+        text = f"{r['title']} {r['description']}".strip()
+        if not text:
+            continue
+        key = r["url"] or text
+        result = score_sentiment_local(text)
+        rows.append((
+            hashlib.sha1(key.encode("utf-8")).hexdigest(),
+            r["title"],
+            r["url"],
+            r["published_at"],
+            r["source"],
+            result["sentiment"],
+            result["score"],
+            result["summary"],
+            ",".join(tag_tickers(text)),
+            scored_at,
+        ))
+    return rows
+
+
+# ─── Storage ──────────────────────────────────────────────────────────────────
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS article_scores (
+    id           TEXT PRIMARY KEY,
+    title        TEXT,
+    url          TEXT,
+    published_at TEXT,
+    source       TEXT,
+    sentiment    TEXT,
+    score        REAL,
+    summary      TEXT,
+    tickers      TEXT,
+    scored_at    TEXT
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    archive    TEXT PRIMARY KEY,
+    records    INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+INSERT_SQL = "INSERT OR REPLACE INTO article_scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def open_store(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _archive_key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def load_checkpoint(conn: sqlite3.Connection, archive: str) -> int:
+    row = conn.execute("SELECT records FROM checkpoints WHERE archive = ?", (archive,)).fetchone()
+    return row[0] if row else 0
+
+
+def write_batch(conn: sqlite3.Connection, archive: str, rows: List[Tuple], records_done: int) -> None:
+    """Insert a scored batch and advance the checkpoint in one transaction."""
+    with conn:
+        conn.executemany(INSERT_SQL, rows)
+        conn.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+            (archive, records_done, datetime.utcnow().isoformat()),
+        )
+
+
+# ─── Pipeline ─────────────────────────────────────────────────────────────────
+
+def run(
+    archive_path: str,
+    db_path: str,
+    fmt: Optional[str] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 2000,
+    restart: bool = False,
+    report_every: float = 5.0,
+) -> dict:
+    """Score an archive end to end; returns run statistics."""
+    workers = workers or os.cpu_count() or 1
+    conn = open_store(db_path)
+    archive = _archive_key(archive_path)
+    done = 0 if restart else load_checkpoint(conn, archive)
+    if done:
+        print(f"Resuming {archive_path} after {done:,} records")
+
+    records = islice(read_archive(archive_path, fmt), done, None)
+    window = workers * 2
+    pending: deque = deque()
+    started = last_report = time.perf_counter()
+    processed = written = 0
+
+    def drain_one():
+        nonlocal done, processed, written, last_report
+        future, size = pending.popleft()
+        rows = future.result()
+        done += size
+        processed += size
+        written += len(rows)
+        write_batch(conn, archive, rows, done)
+        now = time.perf_counter()
+        if now - last_report >= report_every:
+            rate = processed / (now - started)
+            print(f"  {done:,} records ({rate:,.0f}/s)", flush=True)
+            last_report = now
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in _batches(records, batch_size):
+            pending.append((pool.submit(score_batch, batch), len(batch)))
+            # Results are consumed in submit order, which keeps the
+            # checkpoint contiguous and memory bounded by the window.
+            if len(pending) >= window:
+                drain_one()
+        while pending:
+            drain_one()
+
+    conn.close()
+    elapsed = time.perf_counter() - started
+    stats = {
+        "archive": archive_path,
+        "records": processed,
+        "rows_written": written,
+        "total_records": done,
+        "seconds": round(elapsed, 2),
+        "records_per_sec": round(processed / elapsed, 1) if elapsed else 0.0,
+    }
+    print(
+        f"Scored {processed:,} records ({written:,} rows) in {stats['seconds']}s "
+        f"— {stats['records_per_sec']:,.0f} records/s"
+    )
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-score a news archive with the local sentiment scorer.")
+    parser.add_argument("archive", help="Path to a .jsonl or .csv article archive")
+    parser.add_argument("--db", default="news_scores.db", help="SQLite output database")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Override format detection")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint")
+    args = parser.parse_args(argv)
+
+    run(
+        args.archive,
+        args.db,
+        fmt=args.format,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        restart=args.restart,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,80 +2,202 @@
 services/advisor.py - The "Brain" (Unified AI Advisory Layer)
 """
 
+import asyncio
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 
 from models.schemas import AdvisorRequest, AdvisorResponse, AllocationRequest
-from engines.learning import calculate_risk_profile, QuizSubmission
+from core.cache import TTLCache
+from engines.learning import get_latest_risk_profile
 from engines.investment import generate_portfolio
-from engines.prediction import run_prediction, PredictionRequest
+from engines.market import fetch_yahoo_quote
+from engines.prediction import run_prediction_async, PredictionRequest
 from engines.news import get_news_with_sentiment, NewsRequest
-from core.config import settings
+from engines.retrieval import retrieve
+from engines.sentiment_series import get_ticker_sentiment, tag_tickers
+from engines.tickers import SUPPORTED_TICKERS
+from services import llm
 
 
 # ─── LLM Client (Gemini) ─────────────────────────────────────────────────────
 
-def _get_llm_response(prompt: str) -> str:
-    """Call Gemini Pro and return the generated text."""
+async def _get_llm_response(prompt: str) -> str:
+    """Generate a reply through the shared LLM gateway."""
     try:
-        import google.generativeai as genai  # type: ignore
-
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-flash-latest")
-        result = model.generate_content(prompt)
-        return result.text
-    except Exception as e:
-        if "429" in str(e) or "Resource has been exhausted" in str(e) or "Quota" in str(e):
-            import urllib.request, json
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={settings.GEMINI_API_KEY}"
-            if "key=" not in url or settings.GEMINI_API_KEY == "":
-                return "[AI unavailable: API Key missing in environment]"
-            headers = {'Content-Type': 'application/json'}
-            data = {"contents": [{"parts":[{"text": prompt}]}]}
-            try:
-                req = urllib.request.Request(url, data=json.dumps(data).encode('utf-8'), headers=headers)
-                with urllib.request.urlopen(req) as response:
-                    res_data = json.loads(response.read().decode())
-                    return res_data['candidates'][0]['content']['parts'][0]['text']
-            except Exception as e2:
-                if "429" in str(e2):
-                    return "I'm currently receiving too many requests! Google's Free AI tier has a strict rate limit (15 requests/minute). Please wait 1 minute and try your prediction/request again. ⏳"
-                return f"[AI fallback unavailable: {e2}]"
+        return await llm.gateway.generate(prompt, priority=llm.STANDARD)
+    except llm.RateLimited:
+        return llm.RATE_LIMIT_MESSAGE
+    except llm.LLMUnavailable as e:
         return f"[LLM unavailable: {e}]"
 
 
+async def stream_llm_response(prompt: str) -> AsyncIterator[str]:
+    """
+    Stream generated text chunk by chunk through the LLM gateway. Closing the
+    generator closes the upstream connection, so a client disconnect stops
+    generation instead of paying for the full reply.
+    """
+    try:
+        async for chunk in llm.gateway.stream(prompt, priority=llm.INTERACTIVE):
+            yield chunk
+    except llm.RateLimited:
+        yield llm.RATE_LIMIT_MESSAGE
+    except llm.LLMUnavailable as e:
+        yield f"[LLM unavailable: {e}]"
+
+
 # ─── Context Builder ──────────────────────────────────────────────────────────
 
-async def _build_context(user_id: int, query: str) -> str:
+# Each source must answer within its deadline or it is left out of the prompt.
+SOURCE_DEADLINES = {
+    "retrieval":    0.25,
+    "news":         3.0,
+    "forecast":     4.0,
+    "quotes":       2.0,
+    "risk_profile": 0.5,
+    "portfolio":    0.5,
+}
+
+# How long each source's result is reused across turns (seconds)
+SOURCE_TTLS = {
+    "retrieval":    60,
+    "news":         300,
+    "forecast":     1800,
+    "quotes":       30,
+    "risk_profile": 600,
+    "portfolio":    600,
+}
+
+MIN_SIGNAL_STRENGTH = 1.0  # decayed article count before the precomputed signal is trusted
+
+_context_cache = TTLCache("advisor_context", ttl=300, max_entries=10_000)
+
+
+def _query_tickers(query: str) -> List[dict]:
+    symbols = set(tag_tickers(query))
+    return [t for t in SUPPORTED_TICKERS if t["symbol"] in symbols]
+
+
+async def _retrieval_source(query: str) -> Optional[str]:
+    # Only the few most relevant snippets go into the prompt, not raw articles
+    snippets = retrieve(query)
+    if not snippets:
+        return None
+    return "Relevant notes:\n" + "\n".join(f"- [{s['kind']}] {s['text']}" for s in snippets)
+
+
+async def _news_source(query: str, tickers: List[dict]) -> Optional[str]:
+    # Prefer the precomputed per-ticker signal over a fresh fetch-and-score cycle
+    signals = [get_ticker_sentiment(t["symbol"]) for t in tickers]
+    fresh = [sig for sig in signals if sig.signal_strength >= MIN_SIGNAL_STRENGTH]
+    if tickers and len(fresh) == len(tickers):
+        return "; ".join(
+            f"{sig.ticker} news sentiment: {sig.sentiment} (score {sig.decayed_score:+.2f}, "
+            f"{sig.article_count} articles)"
+            for sig in fresh
+        )
+    news_resp = await get_news_with_sentiment(NewsRequest(query=query, limit=5))
+    return (
+        f"Latest market sentiment on '{query}': {news_resp.overall_sentiment}. "
+        f"Top headline: {news_resp.articles[0].title if news_resp.articles else 'N/A'}"
+    )
+
+
+async def _forecast_source(tickers: List[dict]) -> Optional[str]:
+    lines = []
+    for t in tickers[:2]:
+        resp = await run_prediction_async(PredictionRequest(ticker=t["yf_ticker"], days=7), "lstm")
+        if resp.predictions:
+            last = resp.predictions[-1]
+            lines.append(f"{t['symbol']} 7-day forecast ({resp.model_used}): {last.predicted_price} on {last.date}")
+    return "; ".join(lines) or None
+
+
+async def _quotes_source(tickers: List[dict]) -> Optional[str]:
+    quotes = await asyncio.gather(*(fetch_yahoo_quote(t["yf_ticker"]) for t in tickers[:5]))
+    lines = [
+        f"{sym}: ₹{info['price']} ({info['pct']:+.2f}% today)"
+        for sym, info in (q for q in quotes if q)
+    ]
+    return ("Live quotes: " + ", ".join(lines)) if lines else None
+
+
+async def _risk_profile_source(user_id: int) -> Optional[str]:
+    profile = get_latest_risk_profile(user_id)
+    if profile is None:
+        return None
+    return f"User risk profile: {profile.profile} (score {profile.score}/100)"
+
+
+async def _portfolio_source(user_id: int) -> Optional[str]:
+    profile = get_latest_risk_profile(user_id)
+    if profile is None:
+        return None
+    portfolio = generate_portfolio(
+        AllocationRequest(user_id=user_id, investment_amount=100_000, risk_profile=profile.profile)
+    )
+    mix = ", ".join(f"{a.asset} {a.percentage:g}%" for a in portfolio.allocations)
+    return f"Suggested allocation for this profile: {mix}"
+
+
+USER_SOURCES = ("risk_profile", "portfolio")
+
+
+def forget_user_context(user_id: int) -> None:
+    """Drop a user's cached profile-derived context, e.g. after they retake the quiz."""
+    for name in USER_SOURCES:
+        _context_cache.invalidate((name, user_id))
+
+
+async def _gather_source(name: str, key: tuple, factory) -> Optional[str]:
     """
-    Aggregate data from all engines to build rich context for the LLM prompt.
-    In production, load actual user profile & portfolio from DB.
+    Resolve one context source within its deadline. The computation is shared
+    and cached, so a source that misses the deadline still warms the cache
+    for the next turn instead of being thrown away.
     """
-    context_parts = [f"User query: {query}"]
-
-    # --- News sentiment snippet ---
     try:
-        news_resp = await get_news_with_sentiment(NewsRequest(query=query, limit=5))
-        context_parts.append(
-            f"Latest market sentiment on '{query}': {news_resp.overall_sentiment}. "
-            f"Top headline: {news_resp.articles[0].title if news_resp.articles else 'N/A'}"
+        return await asyncio.wait_for(
+            _context_cache.get_or_set((name, *key), factory, ttl=SOURCE_TTLS[name], cache_if=bool),
+            timeout=SOURCE_DEADLINES[name],
         )
     except Exception:
-        pass
+        return None
+
 
+async def _build_context(user_id: Optional[int], query: str) -> str:
+    """
+    Aggregate data from all engines to build rich context for the LLM prompt.
+    Sources are fetched concurrently, each with its own deadline, so latency
+    is bounded by the slowest useful source rather than the sum. `user_id`
+    must come from the caller's token: anonymous callers (None) get no
+    profile or portfolio context.
+    """
+    context_parts = [f"User query: {query}"]
+    tickers = _query_tickers(query)
+    symbols = tuple(t["symbol"] for t in tickers)
+
+    jobs = [
+        _gather_source("retrieval", (query.lower(),), lambda: _retrieval_source(query)),
+        _gather_source("news", (symbols or query.lower(),), lambda: _news_source(query, tickers)),
+    ]
+    if user_id is not None and user_id > 0:
+        jobs.append(_gather_source("risk_profile", (user_id,), lambda: _risk_profile_source(user_id)))
+        jobs.append(_gather_source("portfolio", (user_id,), lambda: _portfolio_source(user_id)))
+    if tickers:
+        jobs.append(_gather_source("forecast", symbols, lambda: _forecast_source(tickers)))
+        jobs.append(_gather_source("quotes", symbols, lambda: _quotes_source(tickers)))
+
+    context_parts.extend(part for part in await asyncio.gather(*jobs) if part)
     return "\n".join(context_parts)
 
 
 # ─── Main Advisor ─────────────────────────────────────────────────────────────
 
-async def get_advice(request: AdvisorRequest) -> AdvisorResponse:
-    """
-    The unified AI layer:
-    1. Builds context from all engines
-    2. Sends an enriched prompt to the LLM
-    3. Returns structured financial advice
-    """
-    context = await _build_context(request.user_id, request.query)
+ADVISOR_SOURCES = ["NewsAPI", "Yahoo Finance", "Gemini AI"]
+
+
+async def _build_prompt(request: AdvisorRequest, user_id: Optional[int]) -> str:
+    context = await _build_context(user_id, request.query)
 
     system_prompt = (
         "You are MindVest, an expert AI financial advisor. "
@@ -83,12 +205,29 @@ async def get_advice(request: AdvisorRequest) -> AdvisorResponse:
         "Always remind users that this is not certified financial advice.\n\n"
     )
 
-    full_prompt = system_prompt + context + f"\n\nUser: {request.query}\nMindVest:"
+    return system_prompt + context + f"\n\nUser: {request.query}\nMindVest:"
 
-    advice_text = _get_llm_response(full_prompt)
+
+async def get_advice(request: AdvisorRequest, user_id: Optional[int] = None) -> AdvisorResponse:
+    """
+    The unified AI layer (`user_id`: the authenticated caller, None if anonymous):
+    1. Builds context from all engines
+    2. Sends an enriched prompt to the LLM
+    3. Returns structured financial advice
+    """
+    full_prompt = await _build_prompt(request, user_id)
+
+    advice_text = await _get_llm_response(full_prompt)
 
     return AdvisorResponse(
         advice=advice_text,
-        sources=["NewsAPI", "Yahoo Finance", "Gemini AI"],
+        sources=ADVISOR_SOURCES,
         generated_at=datetime.utcnow(),
     )
+
+
+async def stream_advice(request: AdvisorRequest, user_id: Optional[int] = None) -> AsyncIterator[str]:
+    """Streaming variant of `get_advice`: yields advice text as it is generated."""
+    full_prompt = await _build_prompt(request, user_id)
+    async for chunk in stream_llm_response(full_prompt):
+        yield chunk
@@ -0,0 +1,121 @@
+"""
+services/conversation.py - Token-Budgeted Conversation Memory for the Chat Advisor
+
+Keeps per-user chat state server-side, keyed on the JWT subject (anonymous
+chats get no memory). Recent turns are kept verbatim; once
+the history exceeds its token budget, the oldest turns are folded into a
+rolling extractive summary (no extra LLM call), so prompt size stays bounded
+however long the conversation runs.
+"""
+
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Optional
+
+from core.config import settings
+
+
+MIN_RECENT_TURNS = 2          # always keep the latest exchange verbatim
+SUMMARY_SNIPPET_CHARS = 160   # per folded turn
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+
+def _first_sentence(text: str, limit: int = SUMMARY_SNIPPET_CHARS) -> str:
+    text = " ".join(text.split())
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    snippet = match.group(1) if match else text
+    return snippet if len(snippet) <= limit else snippet[: limit - 1].rstrip() + "…"
+
+
+@dataclass
+class Turn:
+    role: str      # "User" | "MindVest"
+    text: str
+    tokens: int
+
+
+@dataclass
+class Conversation:
+    turns: Deque[Turn] = field(default_factory=deque)
+    summary: Deque[str] = field(default_factory=deque)
+    history_tokens: int = 0
+    summary_tokens: int = 0
+    compacted_turns: int = 0
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def add(self, role: str, text: str) -> None:
+        turn = Turn(role, text, estimate_tokens(text))
+        self.turns.append(turn)
+        self.history_tokens += turn.tokens
+        self.updated_at = time.monotonic()
+        self._compact()
+
+    def _compact(self) -> None:
+        budget = settings.CHAT_HISTORY_TOKEN_BUDGET
+        while self.history_tokens > budget and len(self.turns) > MIN_RECENT_TURNS:
+            turn = self.turns.popleft()
+            self.history_tokens -= turn.tokens
+            line = f"{turn.role}: {_first_sentence(turn.text)}"
+            self.summary.append(line)
+            self.summary_tokens += estimate_tokens(line)
+            self.compacted_turns += 1
+
+        # The summary itself is rolling: drop its oldest lines past its budget
+        while self.summary_tokens > settings.CHAT_SUMMARY_TOKEN_BUDGET and len(self.summary) > 1:
+            self.summary_tokens -= estimate_tokens(self.summary.popleft())
+
+    def render(self) -> str:
+        parts = []
+        if self.summary:
+            parts.append("Summary of earlier conversation:\n" + "\n".join(self.summary))
+        if self.turns:
+            parts.append("\n".join(f"{t.role}: {t.text}" for t in self.turns))
+        return "\n\n".join(parts)
+
+    def stats(self) -> dict:
+        return {
+            "turns": len(self.turns),
+            "history_tokens": self.history_tokens,
+            "summary_tokens": self.summary_tokens,
+            "compacted_turns": self.compacted_turns,
+        }
+
+
+class ConversationStore:
+    """Bounded, idle-expiring map of token subject -> Conversation."""
+
+    def __init__(self, max_conversations: int, idle_ttl: float):
+        self.max_conversations = max_conversations
+        self.idle_ttl = idle_ttl
+        self._data: "OrderedDict[str, Conversation]" = OrderedDict()
+
+    def get(self, subject: str) -> Conversation:
+        conv = self._data.get(subject)
+        if conv is None or time.monotonic() - conv.updated_at > self.idle_ttl:
+            conv = Conversation()
+            self._data[subject] = conv
+        self._data.move_to_end(subject)
+        while len(self._data) > self.max_conversations:
+            self._data.popitem(last=False)
+        return conv
+
+    def peek(self, subject: str) -> Optional[Conversation]:
+        return self._data.get(subject)
+
+    def reset(self, subject: str) -> None:
+        self._data.pop(subject, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+conversations = ConversationStore(
+    max_conversations=settings.CHAT_MAX_CONVERSATIONS,
+    idle_ttl=settings.CHAT_IDLE_TTL,
+)
@@ -0,0 +1,428 @@
+"""
+services/llm.py - Unified Async LLM Gateway (Gemini REST)
+
+Every LLM call in the backend goes through `gateway`:
+- one token bucket per model, sized to the provider quota (LLM_RPM)
+- a priority queue, so interactive chat is served before background work
+- jittered exponential retry on 429 / 5xx / timeouts, every attempt bounded
+  by the caller's deadline (not just the queueing)
+- a model fallback chain picked from models_list.txt, so when one model's
+  quota is exhausted the next one absorbs the traffic
+- per-model latency and quota metrics
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from core.config import settings
+from core.http_client import get_client
+
+
+# Priorities (lower is served first)
+INTERACTIVE = 0
+STANDARD = 1
+BACKGROUND = 2
+
+# Text models in order of preference; only those present in models_list.txt are used
+PREFERRED_MODELS = [
+    "gemini-2.5-flash",
+    "gemini-flash-latest",
+    "gemini-2.0-flash",
+    "gemini-2.5-flash-lite",
+    "gemini-flash-lite-latest",
+    "gemini-2.0-flash-lite",
+]
+
+DEFAULT_COOLDOWN = 30.0   # seconds a model rests after a 429 without a usable Retry-After
+
+MODELS_LIST_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models_list.txt")
+
+
+class LLMUnavailable(Exception):
+    """Raised when no model in the chain could serve the request."""
+
+
+class RateLimited(LLMUnavailable):
+    """Every model in the chain is out of quota."""
+
+
+def load_model_chain(path: str = MODELS_LIST_PATH) -> List[str]:
+    """Fallback chain: LLM_MODEL_CHAIN if set, else preferred models found in models_list.txt."""
+    if settings.LLM_MODEL_CHAIN:
+        return [m.strip() for m in settings.LLM_MODEL_CHAIN.split(",") if m.strip()]
+    try:
+        with open(path, encoding="utf-8") as f:
+            available = {line.strip().removeprefix("models/") for line in f if line.strip()}
+    except OSError:
+        return list(PREFERRED_MODELS)
+    chain = [m for m in PREFERRED_MODELS if m in available]
+    return chain or list(PREFERRED_MODELS)
+
+
+# ─── Rate Limiting ────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """Requests-per-minute limiter; `cooldown` empties it after a provider 429."""
+
+    def __init__(self, rpm: int):
+        self.capacity = float(max(rpm, 1))
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def cooldown(self, seconds: float) -> None:
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+@dataclass
+class ModelStats:
+    requests: int = 0
+    successes: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.latency_total += seconds
+        self.latency_max = max(self.latency_max, seconds)
+
+    def as_dict(self) -> dict:
+        completed = self.successes + self.errors + self.rate_limited
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "avg_latency_ms": round(self.latency_total / completed * 1000, 1) if completed else 0.0,
+            "max_latency_ms": round(self.latency_max * 1000, 1),
+        }
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    deadline: float = field(compare=False)
+    grant: asyncio.Future = field(compare=False)
+    release: asyncio.Event = field(compare=False)
+
+
+def parse_retry_after(value: Optional[str], default: float = DEFAULT_COOLDOWN) -> float:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date); `default` if absent or unusable."""
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return default
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return seconds if seconds > 0 else default
+
+
+def _remaining(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+class _RetryableError(Exception):
+    def __init__(self, message: str, rate_limited: bool = False, retry_after: float = 0.0):
+        super().__init__(message)
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+
+
+# ─── Gateway ──────────────────────────────────────────────────────────────────
+
+class LLMGateway:
+    def __init__(self, models: List[str], rpm: int, concurrency: int, max_retries: int):
+        self.models = models
+        self.buckets: Dict[str, TokenBucket] = {m: TokenBucket(rpm) for m in models}
+        self.stats: Dict[str, ModelStats] = {m: ModelStats() for m in models}
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._seq = itertools.count()
+
+    # -- lifecycle --
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue(maxsize=settings.LLM_QUEUE_MAX)
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def shutdown(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    # -- scheduling --
+
+    def _pick_model(self, exclude: tuple = ()) -> tuple:
+        """(model, wait) for the model in the chain that frees up soonest."""
+        best, best_wait = None, float("inf")
+        for model in self.models:
+            if model in exclude:
+                continue
+            wait = self.buckets[model].wait_time()
+            if wait == 0:
+                return model, 0.0
+            if wait < best_wait:
+                best, best_wait = model, wait
+        return best, best_wait
+
+    async def _worker(self) -> None:
+        while True:
+            job: _Job = await self._queue.get()
+            try:
+                if job.grant.cancelled():
+                    continue
+                if time.monotonic() > job.deadline:
+                    job.grant.set_exception(RateLimited("LLM queue deadline exceeded"))
+                    continue
+                job.grant.set_result(None)
+                # Hold this concurrency slot until the caller is done
+                await job.release.wait()
+            finally:
+                self._queue.task_done()
+
+    async def _admit(self, priority: int, deadline: float) -> asyncio.Event:
+        """Wait for a concurrency slot in priority order; returns its release event."""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        job = _Job(priority, next(self._seq), deadline, loop.create_future(), asyncio.Event())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise RateLimited("LLM queue is full")
+        try:
+            await asyncio.wait_for(asyncio.shield(job.grant), timeout=_remaining(deadline))
+        except asyncio.TimeoutError:
+            job.grant.cancel()
+            job.release.set()
+            raise RateLimited("LLM queue deadline exceeded")
+        except BaseException:
+            job.grant.cancel()
+            job.release.set()
+            raise
+        return job.release
+
+    async def _acquire_model(self, deadline: float, exclude: tuple = ()) -> str:
+        while True:
+            model, wait = self._pick_model(exclude)
+            if model is None:
+                raise LLMUnavailable("No model available in the fallback chain")
+            if wait == 0:
+                self.buckets[model].take()
+                return model
+            if time.monotonic() + wait > deadline:
+                raise RateLimited("All models are rate limited")
+            await asyncio.sleep(min(wait, 1.0))
+
+    async def _pause_before_retry(self, attempt: int, deadline: float, tried: tuple) -> None:
+        """Jittered exponential backoff — skipped when another model is ready now."""
+        if self._pick_model(tried)[1] == 0:
+            return
+        backoff = min(8.0, 0.5 * (2 ** attempt)) * random.uniform(0.5, 1.5)
+        await asyncio.sleep(min(backoff, _remaining(deadline)))
+
+    # -- upstream --
+
+    def _url(self, model: str, method: str) -> str:
+        return f"{settings.GEMINI_API_BASE}/models/{model}:{method}"
+
+    def _classify(self, response: httpx.Response) -> None:
+        if response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            raise _RetryableError("429 rate limited", rate_limited=True, retry_after=retry_after)
+        if response.status_code >= 500:
+            raise _RetryableError(f"{response.status_code} upstream error")
+        response.raise_for_status()
+
+    async def _call(self, model: str, prompt: str) -> str:
+        response = await get_client("gemini").post(
+            self._url(model, "generateContent"),
+            headers={"x-goog-api-key": settings.GEMINI_API_KEY},
+            json={"contents": [{"parts": [{"text": prompt}]}]},
+            extensions={"site": "generate"},
+        )
+        self._classify(response)
+        data = response.json()
+        return data["candidates"][0]["content"]["parts"][0]["text"]
+
+    def _record_failure(self, model: str, err: Exception) -> None:
+        if isinstance(err, _RetryableError) and err.rate_limited:
+            self.stats[model].rate_limited += 1
+            self.buckets[model].cooldown(err.retry_after)
+        else:
+            self.stats[model].errors += 1
+
+    # -- public API --
+
+    async def generate(self, prompt: str, priority: int = STANDARD, timeout: float = 60.0) -> str:
+        """Generate a full reply. Raises LLMUnavailable / RateLimited."""
+        if not settings.GEMINI_API_KEY:
+            raise LLMUnavailable("API Key missing in environment")
+
+        deadline = time.monotonic() + timeout
+        release = await self._admit(priority, deadline)
+        try:
+            last_error: Optional[Exception] = None
+            tried: tuple = ()
+            for attempt in range(self.max_retries + 1):
+                model = await self._acquire_model(deadline, exclude=tried)
+                stats = self.stats[model]
+                stats.requests += 1
+                started = time.monotonic()
+                try:
+                    text = await asyncio.wait_for(self._call(model, prompt), _remaining(deadline))
+                    stats.successes += 1
+                    stats.observe(time.monotonic() - started)
+                    return text
+                except (_RetryableError, httpx.TransportError, asyncio.TimeoutError) as e:
+                    stats.observe(time.monotonic() - started)
+                    self._record_failure(model, e)
+                    last_error = e
+                    # Prefer a different model next time; reset once all were tried
+                    tried = tried + (model,) if len(tried) + 1 < len(self.models) else ()
+                    if time.monotonic() + 0.1 > deadline:
+                        break
+                    await self._pause_before_retry(attempt, deadline, tried)
+                except Exception as e:
+                    stats.errors += 1
+                    raise LLMUnavailable(str(e)) from e
+            if isinstance(last_error, _RetryableError) and last_error.rate_limited:
+                raise RateLimited(str(last_error))
+            raise LLMUnavailable(str(last_error) or "LLM deadline exceeded")
+        finally:
+            release.set()
+
+    async def stream(self, prompt: str, priority: int = INTERACTIVE, timeout: float = 60.0) -> AsyncIterator[str]:
+        """
+        Stream a reply chunk by chunk. Falls back to the next model only
+        while nothing has been yielded yet; mid-stream errors propagate.
+        """
+        if not settings.GEMINI_API_KEY:
+            raise LLMUnavailable("API Key missing in environment")
+
+        deadline = time.monotonic() + timeout
+        release = await self._admit(priority, deadline)
+        try:
+            tried: tuple = ()
+            for attempt in range(self.max_retries + 1):
+                model = await self._acquire_model(deadline, exclude=tried)
+                stats = self.stats[model]
+                stats.requests += 1
+                started = time.monotonic()
+                yielded = False
+                client = get_client("gemini")
+                request = client.build_request(
+                    "POST",
+                    self._url(model, "streamGenerateContent"),
+                    params={"alt": "sse"},
+                    headers={"x-goog-api-key": settings.GEMINI_API_KEY},
+                    json={"contents": [{"parts": [{"text": prompt}]}]},
+                    extensions={"site": "stream"},
+                )
+                try:
+                    # Connect and every read are bounded by the deadline; the yields
+                    # between them are the consumer's time, so no timeout block spans them
+                    response = await asyncio.wait_for(client.send(request, stream=True), _remaining(deadline))
+                    try:
+                        self._classify(response)
+                        lines = response.aiter_lines()
+                        while True:
+                            try:
+                                line = await asyncio.wait_for(lines.__anext__(), _remaining(deadline))
+                            except StopAsyncIteration:
+                                break
+                            if not line.startswith("data:"):
+                                continue
+                            chunk = json.loads(line[len("data:"):])
+                            for candidate in chunk.get("candidates", [])[:1]:
+                                for part in candidate.get("content", {}).get("parts", []):
+                                    if part.get("text"):
+                                        yielded = True
+                                        yield part["text"]
+                    finally:
+                        await response.aclose()
+                    stats.successes += 1
+                    stats.observe(time.monotonic() - started)
+                    return
+                except (_RetryableError, httpx.TransportError, asyncio.TimeoutError) as e:
+                    stats.observe(time.monotonic() - started)
+                    self._record_failure(model, e)
+                    if yielded or time.monotonic() + 0.1 > deadline or attempt == self.max_retries:
+                        if isinstance(e, _RetryableError) and e.rate_limited:
+                            raise RateLimited(str(e)) from e
+                        raise LLMUnavailable(str(e) or "LLM deadline exceeded") from e
+                    tried = tried + (model,) if len(tried) + 1 < len(self.models) else ()
+                    await self._pause_before_retry(attempt, deadline, tried)
+                except Exception as e:
+                    stats.errors += 1
+                    raise LLMUnavailable(str(e)) from e
+        finally:
+            release.set()
+
+    def metrics(self) -> dict:
+        return {
+            "models": {
+                m: {
+                    **self.stats[m].as_dict(),
+                    "tokens_available": round(min(self.buckets[m].capacity, self.buckets[m].tokens), 2),
+                    "cooldown_s": round(max(0.0, self.buckets[m].blocked_until - time.monotonic()), 1),
+                }
+                for m in self.models
+            },
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "rpm_per_model": settings.LLM_RPM,
+            "concurrency": self.concurrency,
+        }
+
+
+gateway = LLMGateway(
+    models=load_model_chain(),
+    rpm=settings.LLM_RPM,
+    concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_retries=settings.LLM_MAX_RETRIES,
+)
+
+
+RATE_LIMIT_MESSAGE = (
+    "I'm currently receiving too many requests! Google's Free AI tier has a strict rate limit "
+    "(15 requests/minute). Please wait 1 minute and try your prediction/request again. ⏳"
+)
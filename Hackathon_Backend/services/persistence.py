@@ -0,0 +1,241 @@
+"""
+services/persistence.py - Write-Behind Persistence for Hot Endpoints
+
+Routes hand finished records (predictions, quiz results, portfolios, advisor
+queries) to `recorder.record(...)`, which only appends to an in-memory buffer
+and never waits on the database. A background task bulk-inserts each table's
+buffer once it reaches PERSIST_BATCH_SIZE rows or every PERSIST_FLUSH_INTERVAL
+seconds, and drains everything on shutdown.
+
+Memory is bounded by PERSIST_MAX_PENDING rows; past that the overflow policy
+either drops the oldest buffered row ("drop_oldest") or the new one
+("drop_newest"). Callers that would rather wait than lose data (batch jobs)
+use `await recorder.put(...)`, which applies backpressure instead.
+
+Routes attribute rows to the caller's token (never a user_id from the
+request body); anonymous callers are stored with a NULL user_id, as is any
+id <= 0, rather than a value the users foreign key would reject. If a bulk insert still hits an integrity error (e.g. a client
+sending an id that has no users row), the batch is retried row by row so one
+bad record doesn't sink the rest. Without DATABASE_URL recording is a no-op.
+"""
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from core.config import settings
+from core.metrics import timed
+from models import database
+
+
+# record kind -> models.models class name
+TABLES = {
+    "prediction": "Prediction",
+    "quiz_result": "QuizResult",
+    "portfolio": "Portfolio",
+    "advisor_query": "AdvisorQuery",
+}
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+
+def user_ref(user_id: Optional[int]) -> Optional[int]:
+    """The users.id to store for a caller: None unless it's a real (positive) id."""
+    return user_id if user_id and user_id > 0 else None
+
+
+def _model(kind: str):
+    from models import models
+    return getattr(models, TABLES[kind])
+
+
+class WriteBehindQueue:
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int, overflow: str):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.enabled = database.AsyncSessionLocal is not None or database.SessionLocal is not None
+
+        self._buffers: Dict[str, Deque[dict]] = {kind: deque() for kind in TABLES}
+        self.pending = 0
+        self._wakeup = asyncio.Event()
+        self._flushed = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0     # rows refused by the database (constraint violations)
+        self.batches = 0
+        self.last_flush_ms = 0.0
+
+    # ─── Producers ───────────────────────────────────────────────────────────
+
+    def record(self, kind: str, **fields) -> bool:
+        """Buffer one row without blocking. False if it was dropped."""
+        if not self.enabled:
+            return False
+        if self.pending >= self.max_pending:
+            if self.overflow == "drop_newest":
+                self.dropped += 1
+                return False
+            self._drop_oldest(kind)
+        fields.setdefault("created_at", datetime.now(timezone.utc))
+        if "user_id" in fields:
+            fields["user_id"] = user_ref(fields["user_id"])
+        buffer = self._buffers[kind]
+        buffer.append(fields)
+        self.pending += 1
+        if len(buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def put(self, kind: str, **fields) -> bool:
+        """Like `record`, but waits for a flush instead of dropping when full."""
+        while self.enabled and self.pending >= self.max_pending:
+            self._flushed.clear()
+            self._wakeup.set()
+            await self._flushed.wait()
+        return self.record(kind, **fields)
+
+    def _drop_oldest(self, kind: str) -> None:
+        buffer = self._buffers[kind] or max(self._buffers.values(), key=len)
+        buffer.popleft()
+        self.pending -= 1
+        self.dropped += 1
+
+    # ─── Flushing ────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[persistence] flush failed: {e}")
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            started = time.perf_counter()
+            for kind, buffer in self._buffers.items():
+                while buffer:
+                    count = min(len(buffer), self.batch_size)
+                    rows = [buffer.popleft() for _ in range(count)]
+                    self.pending -= count
+                    try:
+                        await self._write(kind, rows)
+                    except Exception as e:
+                        print(f"[persistence] {kind}: {len(rows)} rows not written, will retry: {e}")
+                        self._requeue(kind, rows)
+                        break
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            self._flushed.set()
+
+    def _requeue(self, kind: str, rows: List[dict]) -> None:
+        """Put a failed batch back in front, within the memory bound."""
+        room = max(0, self.max_pending - self.pending)
+        keep = rows[:room]
+        self._buffers[kind].extendleft(reversed(keep))
+        self.pending += len(keep)
+        self.dropped += len(rows) - len(keep)
+
+    async def _write(self, kind: str, rows: List[dict]) -> None:
+        with timed("db_write"):
+            if database.AsyncSessionLocal is not None:
+                written, rejected = await self._write_async(_model(kind), rows)
+            else:
+                written, rejected = await asyncio.to_thread(self._write_sync, _model(kind), rows)
+        self.written += written
+        self.rejected += rejected
+        self.batches += 1
+
+    async def _write_async(self, model, rows: List[dict]):
+        from sqlalchemy import insert
+        from sqlalchemy.exc import IntegrityError
+
+        async with database.AsyncSessionLocal() as db:
+            try:
+                await db.execute(insert(model), rows)
+                await db.commit()
+                return len(rows), 0
+            except IntegrityError:
+                await db.rollback()
+
+            written = 0
+            for row in rows:
+                try:
+                    await db.execute(insert(model), [row])
+                    await db.commit()
+                    written += 1
+                except IntegrityError:
+                    await db.rollback()
+            return written, len(rows) - written
+
+    @staticmethod
+    def _write_sync(model, rows: List[dict]):
+        from sqlalchemy import insert
+        from sqlalchemy.exc import IntegrityError
+
+        with database.SessionLocal() as db:
+            try:
+                db.execute(insert(model), rows)
+                db.commit()
+                return len(rows), 0
+            except IntegrityError:
+                db.rollback()
+
+            written = 0
+            for row in rows:
+                try:
+                    db.execute(insert(model), [row])
+                    db.commit()
+                    written += 1
+                except IntegrityError:
+                    db.rollback()
+            return written, len(rows) - written
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "by_table": {kind: len(buffer) for kind, buffer in self._buffers.items()},
+            "overflow": self.overflow,
+            "written": self.written,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+recorder = WriteBehindQueue(
+    batch_size=settings.PERSIST_BATCH_SIZE,
+    flush_interval=settings.PERSIST_FLUSH_INTERVAL,
+    max_pending=settings.PERSIST_MAX_PENDING,
+    overflow=settings.PERSIST_OVERFLOW,
+)
@@ -0,0 +1,105 @@
+"""
+tests/test_advisor_context.py - Advisor Context Cache Invalidation on Quiz Retake
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.cache import TTLCache
+from core.security import create_access_token
+from engines import learning as quiz
+from engines.learning import QUIZ_BANK
+from routers import learning
+from services import advisor
+
+
+def _answers(pick):
+    return [{"question_id": q["id"], "selected_option": q["weights"].index(pick(q["weights"]))} for q in QUIZ_BANK]
+
+
+def _context(user_id: int):
+    async def scenario():
+        return [
+            await advisor._gather_source("risk_profile", (user_id,), lambda: advisor._risk_profile_source(user_id)),
+            await advisor._gather_source("portfolio", (user_id,), lambda: advisor._portfolio_source(user_id)),
+        ]
+    return asyncio.run(scenario())
+
+
+def _auth(user_id: int) -> dict:
+    token = create_access_token({"sub": f"user{user_id}@example.com", "user_id": user_id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(advisor, "_context_cache", TTLCache("advisor_context_test", ttl=300))
+    monkeypatch.setattr(quiz, "_LATEST_PROFILES", quiz.OrderedDict())
+    monkeypatch.setattr(learning.recorder, "record", lambda *args, **kwargs: None)
+    app = FastAPI()
+    app.include_router(learning.router)
+    return TestClient(app)
+
+
+def test_retaking_the_quiz_refreshes_cached_profile_context(client):
+    client.post("/api/learning/quiz/submit", json={"user_id": 42, "answers": _answers(min)}, headers=_auth(42))
+    before = _context(42)
+    assert "conservative" in before[0]
+
+    client.post("/api/learning/quiz/submit", json={"user_id": 42, "answers": _answers(max)}, headers=_auth(42))
+    after = _context(42)
+    assert "aggressive" in after[0]
+    assert after[1] != before[1]
+
+
+def test_profiles_belong_to_the_token_not_the_request_body(client):
+    client.post("/api/learning/quiz/submit", json={"user_id": 7, "answers": _answers(max)}, headers=_auth(42))
+    client.post("/api/learning/quiz/submit", json={"user_id": 7, "answers": _answers(min)})   # anonymous
+
+    assert quiz.get_latest_risk_profile(42).profile == "aggressive"
+    assert quiz.get_latest_risk_profile(7) is None
+    assert quiz.get_latest_risk_profile(0) is None
+
+
+def test_anonymous_advice_has_no_per_user_context(client, monkeypatch):
+    async def nothing(*args):
+        return None
+
+    monkeypatch.setattr(advisor, "_retrieval_source", nothing)
+    monkeypatch.setattr(advisor, "_news_source", nothing)
+    client.post("/api/learning/quiz/submit", json={"user_id": 42, "answers": _answers(max)}, headers=_auth(42))
+
+    anonymous = asyncio.run(advisor._build_context(None, "what should I buy"))
+    signed_in = asyncio.run(advisor._build_context(42, "what should I buy"))
+
+    assert anonymous == "User query: what should I buy"
+    assert "User risk profile: aggressive" in signed_in and "Suggested allocation" in signed_in
+    assert ("risk_profile", None) not in advisor._context_cache._data
+
+
+def test_invalidate_detaches_an_inflight_computation():
+    cache = TTLCache("t", ttl=60)
+    release = None
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+
+        async def slow_old():
+            await release.wait()
+            return "old"
+
+        async def new():
+            return "new"
+
+        pending = asyncio.ensure_future(cache.get_or_set("k", slow_old))
+        await asyncio.sleep(0)
+        cache.invalidate("k")
+        fresh = await cache.get_or_set("k", new)     # doesn't join the stale computation
+        release.set()
+        return await pending, fresh, cache.get("k")
+
+    assert asyncio.run(scenario()) == ("old", "new", "new")
@@ -0,0 +1,69 @@
+"""
+tests/test_backtest.py - Backtest Kernel vs. Day-by-Day Simulation, Pool Admission
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from engines import backtest
+
+
+def _day_by_day(prices, weights, start, period, horizon):
+    """Reference: hold units between rebalances, reset to target weights every `period` days."""
+    period = period or horizon
+    values = np.empty((horizon, len(weights)))
+    for j, w in enumerate(weights):
+        value = 1.0
+        units = value * w / prices[start]
+        for t in range(horizon):
+            value = units @ prices[start + t]
+            values[t, j] = value
+            if t % period == 0:
+                units = value * w / prices[start + t]
+    return values
+
+
+@pytest.mark.parametrize("period", [1, 5, 21, 63, 0])
+def test_kernel_matches_day_by_day_rebalancing(period):
+    rng = np.random.default_rng(7)
+    prices = 100 * np.cumprod(1 + rng.normal(0.0004, 0.01, size=(400, 4)), axis=0)
+    weights = rng.dirichlet(np.ones(4), size=3)
+    starts = np.array([0, 17, 150, 270])
+    horizon = 127
+
+    paths = backtest.simulate(prices, weights, starts, period, horizon)
+
+    for i, start in enumerate(starts):
+        np.testing.assert_allclose(paths[i], _day_by_day(prices, weights, start, period, horizon),
+                                   rtol=1e-12, atol=0)
+
+
+def _grid():
+    rng = np.random.default_rng(1)
+    prices = 100 * np.cumprod(1 + rng.normal(0, 0.01, size=(300, 3)), axis=0)
+    return prices, np.full((1, 3), 1 / 3), np.arange(0, 200, 10), [21, 0], 64
+
+
+def test_small_grids_run_in_process_without_starting_the_pool():
+    pool = backtest.BacktestPool(workers=2, max_pending=1)
+    prices, weights, starts, periods, horizon = _grid()
+
+    result = asyncio.run(pool.run_grid(prices, weights, starts, periods, horizon))
+
+    expected = backtest.run_grid(prices, weights, starts, periods, horizon)
+    np.testing.assert_array_equal(result[21]["cagr"], expected[21]["cagr"])
+    assert pool._executor is None
+
+
+def test_large_grid_is_rejected_when_the_pool_is_full(monkeypatch):
+    monkeypatch.setattr(backtest, "PARALLEL_MIN_CELLS", 0)
+    monkeypatch.setattr(backtest, "CHUNK_CELLS", 1000)
+    pool = backtest.BacktestPool(workers=2, max_pending=1)
+    pool.workers = 2            # regardless of the CPUs on this machine
+    pool.pending = 1            # another grid already holds the pool
+
+    with pytest.raises(backtest.BacktestPoolSaturated):
+        asyncio.run(pool.run_grid(*_grid()))
+    assert pool.rejected == 1 and pool._executor is None
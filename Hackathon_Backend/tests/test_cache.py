@@ -0,0 +1,87 @@
+"""
+tests/test_cache.py - TTLCache Coalescing & the Cached Insight Route
+"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.cache import TTLCache
+from routers import advisor
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = TTLCache("t", ttl=60)
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get_or_set("k", factory) for _ in range(10)))
+        return results, await cache.get_or_set("k", factory)
+
+    results, later = asyncio.run(scenario())
+    assert results == ["value"] * 10 and later == "value"
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 9, 1)
+
+
+def test_vetoed_results_are_shared_but_not_kept():
+    cache = TTLCache("t", ttl=60)
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "error"
+
+    async def scenario():
+        first = await asyncio.gather(*(cache.get_or_set("k", factory, cache_if=lambda v: v != "error")
+                                       for _ in range(3)))
+        await cache.get_or_set("k", factory, cache_if=lambda v: v != "error")
+        return first
+
+    assert asyncio.run(scenario()) == ["error"] * 3
+    assert len(calls) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_computation():
+    cache = TTLCache("t", ttl=60)
+
+    async def factory():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def scenario():
+        impatient = asyncio.ensure_future(cache.get_or_set("k", factory))
+        patient = asyncio.ensure_future(cache.get_or_set("k", factory))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(scenario()) == "value"
+    assert cache.get("k") == "value"
+
+
+def test_insight_spellings_of_one_ticker_share_a_reply(monkeypatch):
+    prompts = []
+
+    async def fake_chat(prompt):
+        prompts.append(prompt)
+        return "Bullish."
+
+    monkeypatch.setattr(advisor, "_gemini_chat", fake_chat)
+    monkeypatch.setattr(advisor, "_llm_cache", TTLCache("llm_test", ttl=0))
+    app = FastAPI()
+    app.include_router(advisor.router)
+    client = TestClient(app)
+
+    replies = [client.post("/api/advisor/predict-insight", params={"ticker": t, "days": 7}).json()
+               for t in (" tcs ", "TCS", "Tcs")]
+
+    assert len(prompts) == 1 and "for TCS stock" in prompts[0]
+    assert {r["ticker"] for r in replies} == {"TCS"}
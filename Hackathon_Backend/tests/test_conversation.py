@@ -0,0 +1,142 @@
+"""
+tests/test_conversation.py - Chat Memory Compaction & Per-Identity Keying
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.config import settings
+from core.security import create_access_token
+from routers import advisor
+from services import llm
+from services.conversation import Conversation, ConversationStore, MIN_RECENT_TURNS, estimate_tokens
+
+
+def test_history_is_compacted_into_a_bounded_summary(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_HISTORY_TOKEN_BUDGET", 50)
+    monkeypatch.setattr(settings, "CHAT_SUMMARY_TOKEN_BUDGET", 40)
+    conv = Conversation()
+    for i in range(20):
+        conv.add("User", f"Question {i} about index funds. " + "detail " * 10)
+
+    assert conv.history_tokens <= 50 or len(conv.turns) == MIN_RECENT_TURNS
+    assert conv.history_tokens == sum(t.tokens for t in conv.turns)
+    assert conv.summary_tokens == sum(estimate_tokens(line) for line in conv.summary)
+    assert conv.summary_tokens <= 40 or len(conv.summary) == 1
+    assert conv.compacted_turns == 20 - len(conv.turns)
+    # Folded turns keep only their first sentence; the newest turn stays verbatim
+    assert conv.summary[-1].startswith("User: Question") and "detail" not in conv.summary[-1]
+    assert conv.render().endswith(conv.turns[-1].text)
+
+
+def test_latest_exchange_survives_an_oversized_turn(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_HISTORY_TOKEN_BUDGET", 10)
+    conv = Conversation()
+    conv.add("User", "hi")
+    conv.add("MindVest", "word " * 200)
+    assert len(conv.turns) == MIN_RECENT_TURNS
+
+
+def test_store_is_bounded_and_expires_idle_conversations():
+    store = ConversationStore(max_conversations=2, idle_ttl=60)
+    store.get("a").add("User", "one")
+    store.get("b").add("User", "two")
+    store.get("c")
+    assert store.peek("a") is None and len(store) == 2
+
+    stale = store.get("b")
+    stale.updated_at -= 120
+    assert store.get("b") is not stale
+
+
+# ─── Routes ───────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(monkeypatch):
+    prompts = []
+
+    async def fake_chat(prompt):
+        prompts.append(prompt)
+        return "Diversify."
+
+    async def fake_cached(endpoint, prompt, *key_args):
+        return await fake_chat(prompt)
+
+    monkeypatch.setattr(advisor, "_gemini_chat", fake_chat)
+    monkeypatch.setattr(advisor, "_cached_gemini_chat", fake_cached)
+    monkeypatch.setattr(advisor, "conversations", ConversationStore(max_conversations=10, idle_ttl=60))
+    monkeypatch.setattr(advisor.recorder, "record", lambda *args, **kwargs: None)
+
+    app = FastAPI()
+    app.include_router(advisor.router)
+    test_client = TestClient(app)
+    test_client.prompts = prompts
+    return test_client
+
+
+def _auth(sub: str, user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': sub, 'user_id': user_id})}"}
+
+
+def test_anonymous_chats_share_no_memory(client):
+    client.post("/api/advisor/chat", json={"message": "My secret plan", "user_id": 0})
+    client.post("/api/advisor/chat", json={"message": "Hello", "user_id": 0})
+    assert "My secret plan" not in client.prompts[-1]
+    assert len(advisor.conversations) == 0
+
+
+def test_memory_follows_the_token_not_the_body(client):
+    alice, bob = _auth("alice@example.com", 1), _auth("bob@example.com", 2)
+    client.post("/api/advisor/chat", json={"message": "Alice likes gold", "user_id": 2}, headers=alice)
+    client.post("/api/advisor/chat", json={"message": "Hi", "user_id": 1}, headers=bob)
+    assert "Alice likes gold" not in client.prompts[-1]
+
+    reply = client.post("/api/advisor/chat", json={"message": "And silver?"}, headers=alice).json()
+    assert "Alice likes gold" in client.prompts[-1]
+    assert reply["history_tokens"] > 0
+
+
+def test_memory_endpoints_require_auth_and_are_scoped_to_the_caller(client):
+    alice, bob = _auth("alice@example.com", 1), _auth("bob@example.com", 2)
+    client.post("/api/advisor/chat", json={"message": "Alice likes gold"}, headers=alice)
+
+    assert client.get("/api/advisor/chat/memory").status_code == 401
+    assert client.delete("/api/advisor/chat/memory").status_code == 401
+    assert client.get("/api/advisor/chat/memory", headers={"Authorization": "Bearer junk"}).status_code == 401
+
+    assert client.delete("/api/advisor/chat/memory", headers=bob).json()["reset"] is True
+    assert client.get("/api/advisor/chat/memory", headers=alice).json()["turns"] == 2
+    client.delete("/api/advisor/chat/memory", headers=alice)
+    assert client.get("/api/advisor/chat/memory", headers=alice).json()["turns"] == 0
+
+
+def test_fallback_replies_are_not_remembered(client, monkeypatch):
+    alice = _auth("alice@example.com", 1)
+
+    async def unavailable(prompt):
+        return "[AI unavailable: upstream timeout]"
+
+    monkeypatch.setattr(advisor, "_gemini_chat", unavailable)
+    monkeypatch.setattr(advisor, "_cached_gemini_chat", lambda endpoint, prompt, *args: unavailable(prompt))
+    client.post("/api/advisor/chat", json={"message": "Alice likes gold"}, headers=alice)
+
+    assert client.get("/api/advisor/chat/memory", headers=alice).json()["turns"] == 0
+
+
+@pytest.mark.parametrize("chunks, remembered", [
+    (["Buy ", "index funds."], 2),
+    (["Buy ", "[LLM unavailable: stream reset]"], 0),
+    ([llm.RATE_LIMIT_MESSAGE], 0),
+])
+def test_streamed_turns_are_remembered_only_when_complete(client, monkeypatch, chunks, remembered):
+    alice = _auth("alice@example.com", 1)
+
+    async def stream(prompt):
+        for text in chunks:
+            yield text
+
+    monkeypatch.setattr(advisor, "stream_llm_response", stream)
+    client.post("/api/advisor/chat/stream", json={"message": "What now?"}, headers=alice)
+
+    assert client.get("/api/advisor/chat/memory", headers=alice).json()["turns"] == remembered
@@ -0,0 +1,51 @@
+"""
+tests/test_hashing.py - bcrypt Pool Admission Control
+"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core import hashing, security
+from routers import auth
+
+
+def test_inline_pool_hashes_and_verifies():
+    pool = hashing.HashingPool(workers=0, max_pending=0, rounds=4)
+
+    async def scenario():
+        hashed = await pool.hash("s3cret")
+        return await pool.verify("s3cret", hashed), await pool.verify("wrong", hashed)
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_burst_past_max_pending_is_rejected_not_queued():
+    pool = hashing.HashingPool(workers=1, max_pending=2, rounds=4)
+
+    async def scenario():
+        await pool.start()
+        return await asyncio.gather(*(pool.hash(f"pw{i}") for i in range(5)), return_exceptions=True)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    hashed = [r for r in results if isinstance(r, str)]
+    rejected = [r for r in results if isinstance(r, hashing.HashingPoolSaturated)]
+    assert len(hashed) == 2 and len(rejected) == 3
+    assert hashing.verify_password("pw0", hashed[0])
+    assert (pool.pending, pool.completed, pool.rejected) == (0, 2, 3)
+
+
+def test_saturated_pool_turns_into_503_with_retry_after(monkeypatch):
+    monkeypatch.setattr(security, "hashing_pool", hashing.HashingPool(workers=1, max_pending=0, rounds=4))
+    app = FastAPI()
+    app.include_router(auth.router)
+
+    response = TestClient(app).post("/api/auth/register", json={"email": "new@example.com", "password": "pw"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
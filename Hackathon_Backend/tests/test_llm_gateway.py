@@ -0,0 +1,85 @@
+"""
+tests/test_llm_gateway.py - LLM Gateway Deadlines, Retry-After & Error Mapping
+"""
+
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from core.config import settings
+from services import llm
+
+
+def _gateway(monkeypatch, handler, models=("m1", "m2")) -> llm.LLMGateway:
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "test-key")
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://gemini")
+    monkeypatch.setattr(llm, "get_client", lambda name: client)
+    return llm.LLMGateway(models=list(models), rpm=1000, concurrency=2, max_retries=3)
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert llm.parse_retry_after("12") == 12.0
+    soon = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=90), usegmt=True)
+    assert 85 <= llm.parse_retry_after(soon) <= 90
+    assert llm.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == llm.DEFAULT_COOLDOWN
+    assert llm.parse_retry_after("soon-ish") == llm.DEFAULT_COOLDOWN
+    assert llm.parse_retry_after(None) == llm.DEFAULT_COOLDOWN
+
+
+def test_http_date_retry_after_cools_the_model_down(monkeypatch):
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+
+    def handler(request):
+        if "/m1:" in request.url.path:
+            return httpx.Response(429, headers={"Retry-After": later})
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "ok"}]}}]})
+
+    gateway = _gateway(monkeypatch, handler)
+    assert asyncio.run(gateway.generate("hi", timeout=5)) == "ok"
+    assert gateway.metrics()["models"]["m1"]["cooldown_s"] > 100
+
+
+def test_generate_attempts_are_bounded_by_the_caller_deadline(monkeypatch):
+    async def hang(request):
+        await asyncio.sleep(30)
+
+    gateway = _gateway(monkeypatch, hang)
+    started = time.monotonic()
+    with pytest.raises(llm.LLMUnavailable):
+        asyncio.run(gateway.generate("hi", timeout=0.3))
+    assert time.monotonic() - started < 1.5
+
+
+def test_stream_read_is_bounded_by_the_caller_deadline(monkeypatch):
+    async def trickle():
+        yield b'data: {"candidates": [{"content": {"parts": [{"text": "Hel"}]}}]}\n\n'
+        await asyncio.sleep(30)
+
+    gateway = _gateway(monkeypatch, lambda request: httpx.Response(200, content=trickle()))
+
+    async def consume():
+        chunks = []
+        with pytest.raises(llm.LLMUnavailable):
+            async for chunk in gateway.stream("hi", timeout=0.3):
+                chunks.append(chunk)
+        return chunks
+
+    started = time.monotonic()
+    assert asyncio.run(consume()) == ["Hel"]
+    assert time.monotonic() - started < 1.5
+
+
+def test_stream_maps_client_errors_to_llm_unavailable(monkeypatch):
+    gateway = _gateway(monkeypatch, lambda request: httpx.Response(400, json={"error": "bad request"}))
+
+    async def consume():
+        async for _ in gateway.stream("hi", timeout=5):
+            pass
+
+    with pytest.raises(llm.LLMUnavailable):
+        asyncio.run(consume())
+    assert gateway.metrics()["models"]["m1"]["errors"] == 1
@@ -0,0 +1,95 @@
+"""
+tests/test_optimizer.py - Mean-Variance Frontier, Risk Parity & Allocation Rounding
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from engines import optimizer
+from engines.optimizer import OPTIMIZER_UNIVERSE
+
+
+@pytest.fixture(scope="module")
+def frontier():
+    rng = np.random.default_rng(3)
+    n = len(OPTIMIZER_UNIVERSE)
+    drift = rng.uniform(-0.0002, 0.0008, n)
+    vol = rng.uniform(0.002, 0.03, n)
+    prices = 100 * np.exp(np.cumsum(drift + vol * rng.standard_normal((750, n)), axis=0))
+    return optimizer.build_frontier(prices, OPTIMIZER_UNIVERSE, "2024-01-01")
+
+
+def _feasible(weights, caps):
+    weights = np.atleast_2d(weights)
+    return (np.allclose(weights.sum(axis=1), 1, atol=1e-9)
+            and (weights >= -1e-12).all() and (weights <= caps + 1e-9).all())
+
+
+def test_projection_lands_on_the_capped_simplex():
+    rng = np.random.default_rng(0)
+    caps = np.array([0.6, 0.3, 0.6, 0.4, 0.3])
+    v = rng.normal(0, 1, (50, 5))
+    projected = optimizer.project_capped_simplex(v, caps)
+    assert _feasible(projected, caps)
+    # Already-feasible points are fixed points of the projection
+    np.testing.assert_allclose(optimizer.project_capped_simplex(projected, caps), projected, atol=1e-9)
+
+
+def test_mean_variance_matches_brute_force_on_three_assets():
+    mu = np.array([0.05, 0.09, 0.14])
+    cov = np.array([[0.010, 0.002, 0.001], [0.002, 0.040, 0.012], [0.001, 0.012, 0.090]])
+    caps = np.array([0.7, 0.6, 0.5])
+    aversions = np.array([0.5, 3.0, 20.0])
+
+    solved = optimizer.mean_variance_weights(mu, cov, caps, aversions)
+    assert _feasible(solved, caps)
+
+    step = 0.005
+    grid = np.array([(a, b, 1 - a - b) for a, b in itertools.product(np.arange(0, 1 + step, step), repeat=2)
+                     if 1 - a - b >= -1e-12])
+    grid = grid[(grid <= caps + 1e-12).all(axis=1)]
+    for a, w in zip(aversions, solved):
+        objective = lambda x: x @ mu - a / 2 * np.einsum("ij,jk,ik->i", x, cov, x)
+        assert objective(w[None])[0] >= objective(grid).max() - 1e-6
+
+
+def test_risk_parity_equalises_contributions_when_uncapped():
+    cov = np.array([[0.04, 0.006, 0.0], [0.006, 0.01, 0.002], [0.0, 0.002, 0.0025]])
+    w = optimizer.risk_parity_weights(cov)
+    contributions = w * (cov @ w)
+    assert w.sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-6)
+
+
+def test_frontier_is_ordered_and_feasible(frontier):
+    caps = np.array([a.max_weight for a in OPTIMIZER_UNIVERSE])
+    assert _feasible(frontier.weights, caps)
+    assert _feasible(frontier.min_variance, caps) and _feasible(frontier.risk_parity, caps)
+    assert (np.diff(frontier.volatilities) >= 0).all()
+    assert 0.0 <= frontier.shrinkage <= 1.0
+    # The minimum-variance portfolio is no riskier than the frontier's safest end
+    assert frontier.portfolio_stats(frontier.min_variance)[1] <= frontier.volatilities[0] + 1e-6
+
+
+def test_lookup_moves_up_the_frontier_with_risk(frontier):
+    weights = frontier.lookup([0.0, 0.2, 0.5, 0.85, 1.0, 1.7])
+    vols = [frontier.portfolio_stats(w)[1] for w in weights]
+    assert vols == sorted(vols)
+    np.testing.assert_array_equal(weights[0], frontier.weights[0])
+    np.testing.assert_array_equal(weights[-1], frontier.weights[-1])     # clipped to 1
+
+
+def test_risk_fraction_prefers_the_quiz_score():
+    assert optimizer.risk_fraction(42, "aggressive") == 0.42
+    assert optimizer.risk_fraction(None, "Aggressive") == optimizer.PROFILE_RISK_FRACTION["aggressive"]
+    assert optimizer.risk_fraction(None, "unknown") == optimizer.PROFILE_RISK_FRACTION["moderate"]
+
+
+def test_allocations_round_to_exactly_100_percent_without_dust():
+    weights = np.array([0.333, 0.333, 0.331, 0.002, 0.001, 0.0, 0.0])
+    allocations = optimizer.to_allocations(OPTIMIZER_UNIVERSE, weights, 10_000)
+    assert round(sum(a.percentage for a in allocations), 6) == 100.0
+    assert len(allocations) == 3
+    assert sum(a.amount for a in allocations) == pytest.approx(10_000, abs=0.05)
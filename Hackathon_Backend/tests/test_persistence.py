@@ -0,0 +1,103 @@
+"""
+tests/test_persistence.py - Write-Behind Rows: Attribution & Anonymous Callers
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from core.security import create_access_token
+from models import database
+from models import models
+from models.database import Base
+from models.schemas import AdvisorResponse
+from routers import advisor as advisor_routes
+from services.persistence import WriteBehindQueue, user_ref
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rows.db'}")
+    # Enforce the users foreign key the way Postgres does
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(bind=engine, tables=[models.User.__table__, models.AdvisorQuery.__table__])
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(database, "SessionLocal", factory)
+    monkeypatch.setattr(database, "AsyncSessionLocal", None)
+    yield factory
+    engine.dispose()
+
+
+def test_user_ref_only_keeps_real_ids():
+    assert [user_ref(v) for v in (None, 0, -1, 7)] == [None, None, None, 7]
+
+
+def test_anonymous_rows_are_stored_with_null_user_in_one_batch(session_factory):
+    with session_factory() as db:
+        db.add(models.User(id=1, email="a@example.com", full_name="A"))
+        db.commit()
+
+    queue = WriteBehindQueue(batch_size=10, flush_interval=60, max_pending=100, overflow="drop_oldest")
+    for user_id in (0, 1, 0):
+        queue.record("advisor_query", user_id=user_id, query="q", advice="a", sources=["chat"])
+    asyncio.run(queue.flush())
+
+    assert (queue.written, queue.rejected, queue.batches) == (3, 0, 1)
+    with session_factory() as db:
+        stored = db.execute(select(models.AdvisorQuery.user_id).order_by(models.AdvisorQuery.id)).scalars().all()
+    assert stored == [None, 1, None]
+
+
+# ─── Attribution ──────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def recorded(monkeypatch):
+    rows = []
+    monkeypatch.setattr(advisor_routes.recorder, "record", lambda kind, **fields: rows.append((kind, fields)))
+
+    async def fake_advice(req, user_id=None):
+        return AdvisorResponse(advice="Diversify.", sources=["test"], generated_at=datetime.utcnow())
+
+    async def fake_stream(req, user_id=None):
+        for text in ("Diver", "sify."):
+            yield text
+
+    monkeypatch.setattr(advisor_routes, "get_advice", fake_advice)
+    monkeypatch.setattr(advisor_routes, "stream_advice", fake_stream)
+    monkeypatch.setattr(advisor_routes, "stream_llm_response", lambda prompt: fake_stream(None))
+    return rows
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(advisor_routes.router)
+    return TestClient(app)
+
+
+def _auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'u@example.com', 'user_id': user_id})}"}
+
+
+@pytest.mark.parametrize("path", ["/api/advisor/ask", "/api/advisor/ask/stream"])
+def test_advisor_queries_are_attributed_to_the_token(recorded, path):
+    client = _client()
+    client.post(path, json={"user_id": 7, "query": "q"}, headers=_auth(42))
+    client.post(path, json={"user_id": 7, "query": "q"})
+
+    assert [(kind, fields["user_id"], fields["advice"]) for kind, fields in recorded] == [
+        ("advisor_query", 42, "Diversify."), ("advisor_query", None, "Diversify."),
+    ]
+
+
+def test_streamed_chat_is_recorded_once_complete(recorded):
+    response = _client().post("/api/advisor/chat/stream", json={"message": "hi", "user_id": 7}, headers=_auth(42))
+
+    assert "event: done" in response.text
+    assert [(kind, fields["user_id"], fields["advice"], fields["sources"]) for kind, fields in recorded] == [
+        ("advisor_query", 42, "Diversify.", ["chat"]),
+    ]
@@ -0,0 +1,97 @@
+"""
+tests/test_rebalance.py - Bulk Rebalancing vs. Per-User Allocation, NDJSON Stream
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from engines import optimizer, rebalance
+from engines.investment import ALLOCATION_TEMPLATES
+from engines.optimizer import OPTIMIZER_UNIVERSE
+
+
+@pytest.fixture(scope="module")
+def frontier():
+    rng = np.random.default_rng(11)
+    n = len(OPTIMIZER_UNIVERSE)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, (600, n)), axis=0))
+    return optimizer.build_frontier(prices, OPTIMIZER_UNIVERSE, "2024-01-01")
+
+
+def _batch():
+    return rebalance.RebalanceBatch(
+        user_ids=np.array([1, 2, 3, 4]),
+        amounts=np.array([1000.0, 0.0, 250.0, 5000.0]),
+        risk_profiles=["conservative", "Aggressive", "moderate", "unknown"],
+        risk_scores=np.array([np.nan, np.nan, 90.0, np.nan]),
+        holdings=np.array([[500.0, 0.0], [2000.0, 300.0], [0.0, 0.0], [100.0, 100.0]]),
+        holding_assets=["Large-Cap Stocks", "Legacy Fund"],
+    )
+
+
+def test_batch_plan_matches_single_user_allocation(frontier):
+    batch = _batch()
+    plan = rebalance.plan_rebalance(batch, frontier)
+
+    assert plan.method == "mean_variance"
+    assert plan.assets[-1] == "Legacy Fund"           # held only today
+    for i in range(len(batch.user_ids)):
+        fraction = optimizer.risk_fraction(
+            None if np.isnan(batch.risk_scores[i]) else batch.risk_scores[i], batch.risk_profiles[i],
+        )
+        expected = optimizer.select_weights(frontier, "mean_variance", fraction)
+        np.testing.assert_allclose(plan.weights[i, :len(OPTIMIZER_UNIVERSE)], expected)
+    np.testing.assert_allclose(plan.totals, batch.holdings.sum(axis=1) + batch.amounts)
+
+
+def test_trades_invest_new_money_and_sell_dropped_assets(frontier):
+    batch = _batch()
+    plan = rebalance.plan_rebalance(batch, frontier)
+    legacy = plan.assets.index("Legacy Fund")
+
+    np.testing.assert_allclose(plan.trades.sum(axis=1), batch.amounts, atol=1e-9)
+    np.testing.assert_allclose(plan.targets[:, legacy], 0.0)
+    np.testing.assert_allclose(plan.trades[:, legacy], -batch.holdings[:, 1])
+
+
+def test_fixed_portfolio_methods_ignore_risk(frontier):
+    plan = rebalance.plan_rebalance(_batch(), frontier, method="risk_parity")
+    np.testing.assert_allclose(plan.weights[:, :len(OPTIMIZER_UNIVERSE)],
+                               np.tile(frontier.risk_parity, (4, 1)))
+
+
+def test_templates_without_a_frontier_follow_score_bands():
+    plan = rebalance.plan_rebalance(_batch(), None)
+    assert plan.method == "template"
+
+    def row(profile):
+        weights = dict.fromkeys(plan.assets, 0.0)
+        for item in ALLOCATION_TEMPLATES[profile]:
+            weights[item["asset"]] = item["percentage"] / 100.0
+        return [weights[a] for a in plan.assets]
+
+    expected = [row("conservative"), row("aggressive"), row("aggressive"), row("moderate")]
+    np.testing.assert_allclose(plan.weights, expected)
+
+
+def test_ndjson_stream_has_one_record_per_user_and_balanced_summary(frontier, monkeypatch):
+    monkeypatch.setattr(rebalance, "NDJSON_CHUNK_ROWS", 3)      # exercise chunking
+    plan = rebalance.plan_rebalance(_batch(), frontier)
+    records = [json.loads(line) for chunk in rebalance.iter_ndjson(plan, min_trade=0.01)
+               for line in chunk.splitlines()]
+
+    assert [r["type"] for r in records] == ["plan"] + ["allocation"] * 4 + ["summary"]
+    assert records[0]["data"]["assets"] == plan.assets
+    assert [r["data"]["user_id"] for r in records[1:-1]] == [1, 2, 3, 4]
+    summary = records[-1]["data"]
+    assert summary["users"] == 4
+    assert summary["buy"] - summary["sell"] == pytest.approx(6250.0, abs=0.05)
+
+
+def test_small_trades_are_suppressed():
+    plan = rebalance.plan_rebalance(_batch(), None)
+    records = [json.loads(line) for chunk in rebalance.iter_ndjson(plan, min_trade=1e9)
+               for line in chunk.splitlines()]
+    assert all(t == 0 for r in records if r["type"] == "allocation" for t in r["data"]["trades"])
@@ -0,0 +1,249 @@
+"""
+tests/test_resilience.py - Circuit Breaker, Hedged Requests & Stale-While-Revalidate
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core import resilience
+from core.config import settings
+from engines import news
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "hedge_counts", {})
+    monkeypatch.setattr(settings, "BREAKER_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "BREAKER_RESET_TIMEOUT", 30.0)
+
+
+class Clock:
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        # Only resilience's view of time; the event loop keeps the real clock
+        monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=lambda: self.now))
+
+
+# ─── Circuit Breaker ──────────────────────────────────────────────────────────
+
+def test_breaker_opens_after_consecutive_failures_and_probes_once(monkeypatch):
+    clock = Clock(monkeypatch)
+    circuit = resilience.CircuitBreaker("up", failure_threshold=3, reset_timeout=30)
+
+    circuit.failure(); circuit.failure(); circuit.success()
+    assert circuit.state == resilience.CLOSED           # a success resets the count
+
+    for _ in range(3):
+        circuit.failure()
+    assert circuit.state == resilience.OPEN and not circuit.allow()
+
+    clock.now += 31
+    assert circuit.allow() and circuit.state == resilience.HALF_OPEN
+    assert not circuit.allow()                           # one probe at a time
+    circuit.failure()
+    assert circuit.state == resilience.OPEN and circuit.trips == 2
+
+    clock.now += 31
+    assert circuit.allow()
+    circuit.success()
+    assert circuit.state == resilience.CLOSED and circuit.allow()
+
+
+def test_cancelled_probe_frees_the_half_open_slot(monkeypatch):
+    clock = Clock(monkeypatch)
+    circuit = resilience.CircuitBreaker("up", failure_threshold=1, reset_timeout=30)
+    circuit.failure()
+    clock.now += 31
+    assert circuit.allow()
+    circuit.release()
+    assert circuit.allow()
+
+
+def test_guarded_fails_fast_while_open_and_no_data_is_not_a_failure():
+    async def broken():
+        raise RuntimeError("down")
+
+    async def empty():
+        raise resilience.NoData("nothing")
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(resilience.NoData):
+                await resilience.guarded("up", empty, timeout=1)
+        assert resilience.breaker("up").state == resilience.CLOSED
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                await resilience.guarded("up", broken, timeout=1)
+        with pytest.raises(resilience.CircuitOpen):
+            await resilience.guarded("up", broken, timeout=1)
+
+    asyncio.run(scenario())
+    assert resilience.breaker("up").rejected == 1
+
+
+# ─── Hedged Requests ──────────────────────────────────────────────────────────
+
+def _source(value, delay=0.0, error=None, calls=None):
+    async def call():
+        if calls is not None:
+            calls.append(value)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return value
+    return call
+
+
+def test_hedge_starts_fallback_after_delay_and_cancels_the_loser():
+    calls = []
+    result = asyncio.run(resilience.hedged(
+        [("primary", _source("slow", delay=5, calls=calls)), ("fallback", _source("fast", calls=calls))],
+        delay=0.05, timeout=10,
+    ))
+    assert result == "fast" and calls == ["slow", "fast"]
+    assert resilience.hedge_counts == {"fallback": 1}
+    # The cancelled primary is neither a success nor a failure
+    assert resilience.breaker("primary").failures == 0
+
+
+def test_fast_primary_never_starts_the_fallback():
+    calls = []
+    result = asyncio.run(resilience.hedged(
+        [("primary", _source("a", calls=calls)), ("fallback", _source("b", calls=calls))],
+        delay=0.5, timeout=10,
+    ))
+    assert result == "a" and calls == ["a"]
+
+
+def test_without_delay_fallback_runs_only_on_failure():
+    calls = []
+    slow = asyncio.run(resilience.hedged(
+        [("primary", _source("query", delay=0.2, calls=calls)), ("fallback", _source("generic", calls=calls))],
+        delay=None, timeout=10,
+    ))
+    assert slow == "query" and calls == ["query"]
+
+    failed = asyncio.run(resilience.hedged(
+        [("primary", _source("x", error=RuntimeError("500"))), ("fallback", _source("generic"))],
+        delay=None, timeout=10,
+    ))
+    assert failed == "generic"
+
+
+def test_open_primary_goes_straight_to_fallback_and_all_down_raises():
+    for _ in range(3):
+        resilience.breaker("primary").failure()
+    calls = []
+    assert asyncio.run(resilience.hedged(
+        [("primary", _source("p", calls=calls)), ("fallback", _source("f", calls=calls))], delay=1, timeout=1,
+    )) == "f"
+    assert calls == ["f"]
+
+    with pytest.raises(resilience.UpstreamUnavailable):
+        asyncio.run(resilience.hedged(
+            [("primary", _source("p")), ("fallback", _source("f", delay=5))], delay=1, timeout=0.05,
+        ))
+
+
+# ─── Stale-While-Revalidate ───────────────────────────────────────────────────
+
+def test_stale_value_is_served_while_one_refresh_runs(monkeypatch):
+    clock = Clock(monkeypatch)
+    cache = resilience.StaleWhileRevalidate("t", fresh_ttl=10, stale_ttl=100)
+    version = {"n": 0}
+
+    async def load():
+        version["n"] += 1
+        await asyncio.sleep(0.01)
+        return version["n"]
+
+    async def scenario():
+        first = await asyncio.gather(*(cache.get("k", load) for _ in range(3)))
+        clock.now += 11
+        stale = await asyncio.gather(*(cache.get("k", load) for _ in range(3)))
+        await asyncio.sleep(0.05)
+        return first, stale, await cache.get("k", load)
+
+    first, stale, refreshed = asyncio.run(scenario())
+    assert first == [1, 1, 1]          # coalesced miss
+    assert stale == [1, 1, 1]          # served stale, one background refresh
+    assert refreshed == 2 and version["n"] == 2
+    assert cache.stats()["stale_served"] == 3
+
+
+def test_failed_refresh_keeps_the_last_good_value(monkeypatch):
+    clock = Clock(monkeypatch)
+    cache = resilience.StaleWhileRevalidate("t", fresh_ttl=10, stale_ttl=100)
+
+    async def broken():
+        raise resilience.UpstreamUnavailable("down")
+
+    async def scenario():
+        await cache.get("k", _source("good"))
+        clock.now += 50
+        values = [await cache.get("k", broken) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        return values
+
+    assert asyncio.run(scenario()) == ["good", "good"]
+    assert cache.stats()["refresh_failures"] >= 1
+
+
+def test_per_value_ttls_shorten_fallback_entries(monkeypatch):
+    clock = Clock(monkeypatch)
+    cache = resilience.StaleWhileRevalidate("t", fresh_ttl=100, stale_ttl=1000,
+                                            ttls=lambda v: (5, 5) if v == "fallback" else (100, 1000))
+    calls = []
+
+    async def scenario():
+        await cache.get("k", _source("fallback", calls=calls))
+        clock.now += 6                                     # still fresh under the default 100 s
+        stale = await cache.get("k", _source("real", calls=calls))
+        await asyncio.sleep(0.01)
+        clock.now += 6
+        return stale, await cache.get("k", _source("later", calls=calls))
+
+    assert asyncio.run(scenario()) == ("fallback", "real")
+    assert calls == ["fallback", "real"]
+
+
+# ─── News Sources ─────────────────────────────────────────────────────────────
+
+def test_slow_newsdata_is_not_replaced_by_generic_headlines(monkeypatch):
+    monkeypatch.setattr(settings, "NEWS_API_KEY", "pub_test")
+    monkeypatch.setattr(news, "_articles", resilience.StaleWhileRevalidate(
+        "news_test", 120, 3600, ttls=news._article_ttls))
+
+    async def slow_newsdata(query, limit):
+        await asyncio.sleep(0.2)
+        return [{"title": f"{query} results"}]
+
+    async def mirror(limit):
+        return [{"title": "generic", "fallback": True}]
+
+    monkeypatch.setattr(news, "_fetch_newsdata", slow_newsdata)
+    monkeypatch.setattr(news, "_fetch_mirror", mirror)
+    articles = asyncio.run(news.fetch_news_articles("TCS", 5))
+    assert articles == [{"title": "TCS results"}] and not news.is_fallback(articles)
+
+
+def test_mirror_results_are_marked_and_cached_briefly(monkeypatch):
+    monkeypatch.setattr(settings, "NEWS_API_KEY", "pub_test")
+
+    async def failing_newsdata(query, limit):
+        raise RuntimeError("503")
+
+    async def mirror(limit):
+        return [{"title": "generic", "fallback": True}]
+
+    monkeypatch.setattr(news, "_fetch_newsdata", failing_newsdata)
+    monkeypatch.setattr(news, "_fetch_mirror", mirror)
+    monkeypatch.setattr(news, "_articles", resilience.StaleWhileRevalidate(
+        "news_test", 120, 3600, ttls=news._article_ttls))
+
+    articles = asyncio.run(news.fetch_news_articles("TCS", 5))
+    assert news.is_fallback(articles)
+    assert news._article_ttls(articles) == (settings.NEWS_FALLBACK_TTL, settings.NEWS_FALLBACK_TTL)
@@ -0,0 +1,72 @@
+"""
+tests/test_retrieval.py - Vector Index Re-ingestion & Delta Compaction
+"""
+
+import numpy as np
+
+from engines import retrieval
+from engines.retrieval import Embedder, VectorIndex, news_doc
+
+
+def _index() -> VectorIndex:
+    texts = ["index funds and diversification", "gold prices rally", "bank stocks fall on rate fears"]
+    return VectorIndex(Embedder.fit(texts))
+
+
+def _news(n: int, tag: str = ""):
+    return [news_doc(f"Headline {i} about market {i % 7} {tag}", None, f"https://n/{i}", "neutral") for i in range(n)]
+
+
+def test_reingesting_unchanged_articles_adds_no_rows():
+    index = _index()
+    index.add(_news(50))
+    rows = index._delta_rows
+    for _ in range(5):
+        index.add(_news(50))
+    assert index._delta_rows == rows and len(index) == 50
+
+
+def test_changed_text_replaces_the_previous_version():
+    index = _index()
+    index.add(_news(3))
+    index.add([news_doc("Headline 1 rewritten: gold rally", None, "https://n/1", "positive")])
+    assert len(index) == 3
+    hits = index.search("gold rally rewritten", k=3)
+    assert hits[0][1]["text"].startswith("Headline 1 rewritten")
+    assert sum(d["id"] == "news:https://n/1" for _, d in index.search("headline", k=10)) == 1
+
+
+def test_duplicates_within_a_batch_keep_the_last_version():
+    index = _index()
+    first, second = news_doc("old", None, "u", "neutral"), news_doc("new", None, "u", "neutral")
+    index.add([first, second])
+    assert index._delta_rows == 1 and index.docs[-1]["text"] == second["text"]
+
+
+def test_delta_is_compacted_once_replaced_rows_dominate(monkeypatch):
+    monkeypatch.setattr(retrieval, "COMPACT_MIN_DEAD", 20)
+    index = _index()
+    for round_ in range(10):
+        index.add(_news(30, tag=f"v{round_}"))
+    # Without compaction this would be 300 rows, 270 of them dead
+    assert index._delta_rows < 90 and len(index) == 30
+    assert len(index.docs) == len(index.alive) == len(index.kinds) == index._delta_rows
+    assert all(index.docs[pos]["id"] == doc_id for doc_id, pos in index._positions.items())
+
+    hits = index.search("Headline 4 about market 4 v9", k=1)
+    assert hits[0][1]["text"].startswith("Headline 4 about market 4 v9")
+
+
+def test_compaction_keeps_loaded_base_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(retrieval, "COMPACT_MIN_DEAD", 5)
+    built = _index()
+    built.add(_news(10))
+    built.save(str(tmp_path))
+
+    index = VectorIndex.load(str(tmp_path))
+    n_base = len(index.base)
+    for round_ in range(4):
+        index.add(_news(8, tag=f"v{round_}"))
+    assert len(index.base) == n_base and len(index) == 10
+    assert not index.alive[:8].any() and index.alive[8:n_base].all()
+    assert np.isfinite(index.search("Headline 9", k=3)[0][0])
@@ -0,0 +1,51 @@
+"""
+tests/test_risk.py - Portfolio Risk Request Validation & Missing History
+"""
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from engines import market_data, risk
+from routers import investment
+
+
+def _history(seed):
+    rng = np.random.default_rng(seed)
+    days = np.arange(18_000, 18_400)
+    return days, 100 * np.cumprod(1 + rng.normal(0, 0.01, len(days)))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_history(symbol, range_="2y"):
+        return None if symbol.startswith("NOPE") else _history(len(symbol))
+
+    monkeypatch.setattr(market_data, "get_price_history", fake_history)
+    monkeypatch.setattr(risk, "_models", risk.TTLCache("risk_models_test", ttl=60))
+    app = FastAPI()
+    app.include_router(investment.router)
+    return TestClient(app)
+
+
+def _body(assets, **extra):
+    return {"assets": assets, "holdings": [[100.0] * len(assets)], **extra}
+
+
+def test_risk_report_over_available_history(client):
+    response = client.post("/api/investment/risk", json=_body(["GOLDBEES.NS", "TCS"], history="2y"))
+    assert response.status_code == 200
+    assert response.json()["symbols"] == ["GOLDBEES.NS", "TCS.NS"]
+
+
+def test_unavailable_history_names_the_missing_symbols(client):
+    response = client.post("/api/investment/risk", json=_body(["TCS", "NOPE1.NS", "NOPE2.NS"]))
+    assert response.status_code == 503
+    detail = response.json()["detail"]
+    assert "NOPE1.NS" in detail and "NOPE2.NS" in detail and "TCS.NS" not in detail
+
+
+def test_unknown_history_range_is_rejected(client):
+    response = client.post("/api/investment/risk", json=_body(["TCS"], history="3y"))
+    assert response.status_code == 422
@@ -0,0 +1,87 @@
+"""
+tests/test_wallet_nonces.py - Single-Use Wallet Login Nonces Across Workers
+"""
+
+import asyncio
+
+import pytest
+from eth_keys import keys
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from core import wallet
+from models.database import Base
+from models import models  # noqa: F401  (registers used_nonces)
+from models.nonces import AsyncSqlNonceLedger, InMemoryNonceLedger, SqlNonceLedger
+
+SECRET = "test-secret"
+WALLET = "0x" + "ab" * 20
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'nonces.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine, tables=[models.UsedNonce.__table__])
+    engine.dispose()
+    return url
+
+
+def _sync_ledger(url):
+    return SqlNonceLedger(sessionmaker(bind=create_engine(url)))
+
+
+def _async_ledger(url):
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    return AsyncSqlNonceLedger(async_sessionmaker(engine, expire_on_commit=False))
+
+
+@pytest.mark.parametrize("make_ledger", [_sync_ledger, _async_ledger])
+def test_second_consume_is_rejected_on_another_worker(db_url, make_ledger):
+    # Two stores over separate engines stand in for two worker processes
+    worker_a = wallet.NonceStore(SECRET, make_ledger(db_url))
+    worker_b = wallet.NonceStore(SECRET, make_ledger(db_url))
+    issued = worker_a.issue(WALLET)
+
+    async def scenario():
+        return [await worker_b.consume(WALLET, issued.nonce),
+                await worker_a.consume(WALLET, issued.nonce),
+                await worker_b.consume(WALLET, issued.nonce)]
+
+    assert asyncio.run(scenario()) == [True, False, False]
+
+
+def test_in_memory_ledger_rejects_reuse():
+    store = wallet.NonceStore(SECRET, InMemoryNonceLedger())
+    issued = store.issue(WALLET)
+    assert asyncio.run(store.consume(WALLET, issued.nonce)) is True
+    assert asyncio.run(store.consume(WALLET, issued.nonce)) is False
+
+
+def test_tampered_expired_or_foreign_nonces_are_rejected():
+    store = wallet.NonceStore(SECRET, InMemoryNonceLedger())
+    issued = store.issue(WALLET)
+    expires, rand, tag = issued.nonce.split(".")
+
+    assert asyncio.run(store.consume("0x" + "cd" * 20, issued.nonce)) is False
+    assert asyncio.run(store.consume(WALLET, f"{int(expires) + 999}.{rand}.{tag}")) is False
+    assert asyncio.run(store.consume(WALLET, "not-a-nonce")) is False
+
+    expired = wallet.NonceStore(SECRET, InMemoryNonceLedger(), ttl=-1).issue(WALLET)
+    assert asyncio.run(store.consume(WALLET, expired.nonce)) is False
+    # None of the rejected attempts burned the genuine nonce
+    assert asyncio.run(store.consume(WALLET, issued.nonce)) is True
+
+
+def test_signed_login_cannot_be_replayed(monkeypatch):
+    key = keys.PrivateKey(b"\x01" * 32)
+    address = key.public_key.to_checksum_address().lower()
+    monkeypatch.setattr(wallet, "nonces", wallet.NonceStore(SECRET, InMemoryNonceLedger()))
+
+    issued = wallet.nonces.issue(address)
+    signature = key.sign_msg_hash(wallet._personal_message_hash(issued.message))
+    sig_hex = "0x" + signature.to_bytes()[:64].hex() + format(signature.v + 27, "02x")
+
+    assert asyncio.run(wallet.verify_login(address, issued.message, sig_hex)) is True
+    assert asyncio.run(wallet.verify_login(address, issued.message, sig_hex)) is False